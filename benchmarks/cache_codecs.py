@@ -0,0 +1,85 @@
+"""
+キャッシュ形式ごとの書き込み・読み込み速度とファイルサイズを比べる。
+
+    PYTHONPATH=src python benchmarks/cache_codecs.py --rows 1000000
+
+合成した分足（OHLC + 出来高、tz 付き）を各形式で書いて読み、最良値を出す。
+feather は圧縮方式ごとに、csv は旧形式との比較用に含める。
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from desktop_tutorial import codecs
+
+
+def _frame(rows: int) -> pd.DataFrame:
+    idx = pd.date_range("2000-01-03 09:30", periods=rows, freq="min", tz="America/New_York")
+    rng = np.random.default_rng(0)
+    close = 100 + rng.standard_normal(rows).cumsum() * 0.1
+    return pd.DataFrame(
+        {
+            "open": close + rng.standard_normal(rows) * 0.01,
+            "high": close + 0.05,
+            "low": close - 0.05,
+            "close": close,
+            "adjclose": close,
+            "volume": rng.integers(0, 100_000, rows),
+        },
+        index=idx,
+    )
+
+
+def _candidates() -> list[codecs.Codec]:
+    out = []
+    if codecs.get("feather").available:
+        for compression in ("zstd", "lz4", "uncompressed"):
+            out.append(codecs.feather_codec(compression, name=f"feather-{compression}"))
+    out += [codecs.get(name) for name in ("parquet", "npz", "csv") if name in codecs.available()]
+    return out
+
+
+def _best(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-csv", action="store_true", help="csv は遅いので省く")
+    args = parser.parse_args(argv)
+
+    df = _frame(args.rows)
+    mib = df.memory_usage(index=True).sum() / 1024**2
+    print(f"default: {codecs.default()}   frame: {args.rows} rows, {mib:.1f} MiB")
+    print(f"{'codec':<22}{'write MiB/s':>12}{'read MiB/s':>12}{'size MiB':>10}{'ratio':>8}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for codec in _candidates():
+            if args.skip_csv and codec.name == "csv":
+                continue
+            path = Path(tmp) / f"bench.{codec.name}"
+            write = _best(lambda c=codec, p=path: c.write(df, p, 65_536), args.repeat)
+            read = _best(lambda c=codec, p=path: c.read(p), args.repeat)
+            size = path.stat().st_size / 1024**2
+            print(
+                f"{codec.name:<22}{mib / write:>12.0f}{mib / read:>12.0f}"
+                f"{size:>10.1f}{size / mib:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+cache.write / YahooProvider._normalize のピークメモリ（RSS）を比べる。
+
+    PYTHONPATH=src python benchmarks/cache_write_memory.py --rows 2000000 --symbols 4
+
+before … 以前の実装（write 前の df.copy()、列名変更のための df.copy()）
+after  … 現在の実装（freq はメタデータへ、列名だけ差し替えた浅いコピー）
+
+各ケースを別プロセスで実行し、大きな DF を作った直後からのピーク RSS の増分を出す。
+ru_maxrss を使うので Linux / macOS 専用。
+"""
+
+from __future__ import annotations
+
+import argparse
+import resource
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CASES = ("write-before", "write-after", "normalize-before", "normalize-after")
+
+
+def _peak_mib() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux は KiB、macOS はバイト
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def _raw_frame(rows: int, symbols: int) -> pd.DataFrame:
+    """yfinance のグループ取得と同じ形（項目 × 銘柄の MultiIndex 列）"""
+    index = pd.date_range("1990-01-01", periods=rows, freq="min")
+    fields = ["Open", "High", "Low", "Close", "Adj Close", "Volume"]
+    columns = pd.MultiIndex.from_product([fields, [f"S{i}" for i in range(symbols)]])
+    rng = np.random.default_rng(0)
+    # parquet から読んだ DF と同じく列ごとに連続した配列を持たせる。
+    # 作る段階で一時コピーが出るとピークが先に上がってしまうので、配列はそのまま使う
+    data = {i: rng.random(rows) for i in range(len(columns))}
+    df = pd.DataFrame(data, index=index, copy=False)
+    df.columns = columns
+    return df
+
+
+def _normalize_before(df: pd.DataFrame) -> pd.DataFrame:
+    cols = df.columns.get_level_values(0)
+    cols = pd.Index(cols.astype(str)).str.replace(r"\s+", "", regex=True).str.lower()
+    df = df.copy()
+    df.columns = cols
+    return df
+
+
+def _run_case(case: str, rows: int, symbols: int) -> None:
+    from desktop_tutorial import cache
+    from desktop_tutorial.providers.yahoo import normalize_columns
+
+    raw = _raw_frame(rows, symbols)
+    base = _peak_mib()
+
+    if case.startswith("normalize"):
+        out = _normalize_before(raw) if case == "normalize-before" else normalize_columns(raw)
+        assert list(out.columns[:2]) == ["open", "open"]
+    else:
+        # 銘柄ごとに分ける前の幅広の DF をそのまま 1 ファイルに書く
+        flat = raw.copy(deep=False)
+        flat.columns = [f"{f}_{s}".lower() for f, s in raw.columns]
+        with tempfile.TemporaryDirectory() as tmp:
+            cache._CACHEDIR = Path(tmp)
+            base = _peak_mib()
+            if case == "write-before":
+                out = flat.copy()
+                out.index.freq = pd.tseries.frequencies.to_offset("1min")
+                path = cache._build_path("BENCH", None, None, "1min", "parquet")
+                cache._write_frame(out, path, "parquet")
+            else:
+                cache.write(flat, symbol="BENCH", start=None, end=None, freq="1min")
+
+    frame_mib = raw.memory_usage(index=True).sum() / 1024**2
+    print(f"{case:<18} frame {frame_mib:8.1f} MiB   peak +{_peak_mib() - base:8.1f} MiB")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--symbols", type=int, default=4)
+    parser.add_argument("--case", choices=CASES, help="1 ケースだけ実行（内部用）")
+    args = parser.parse_args(argv)
+
+    if args.case:
+        _run_case(args.case, args.rows, args.symbols)
+        return
+    for case in CASES:
+        subprocess.run(
+            [sys.executable, __file__, "--case", case,
+             "--rows", str(args.rows), "--symbols", str(args.symbols)],
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+import logging
+import queue
+import smtplib
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from typing import Dict, List, Optional
+
+import requests
+
+# SMTP ユーザー名が無い（認証なしのリレー）ときの差出人
+_DEFAULT_SENDER = "maintenance-monitor@localhost"
+
+# 重い順。ダイジェストの件名には最も重いレベルを使う
+_SEVERITY = {'INFO': 0, 'WARNING': 1, 'CRITICAL': 2, 'EMERGENCY': 3}
+
+
+@dataclass
+class Alert:
+    """送信待ちのアラート 1 件"""
+    account: str
+    level: str
+    message: str
+    created_at: float = field(default_factory=time.time)
+
+
+def render_digest(alerts: List[Alert]) -> tuple:
+    """
+    まとめて送るアラートの件名と本文。1 件ならこれまでのメールと同じ内容
+    """
+    level = max((a.level for a in alerts), key=lambda lv: _SEVERITY.get(lv, 0))
+    if len(alerts) == 1:
+        return f"信用維持率アラート - {level}", alerts[0].message
+
+    subject = f"信用維持率アラート - {level} ({len(alerts)}件)"
+    parts = []
+    for alert in alerts:
+        header = f"[{alert.account}] {alert.level}"
+        parts.append(f"{header}\n{alert.message.strip()}\n")
+    return subject, "\n".join(parts)
+
+
+class AlertSink(ABC):
+    """アラートの送り先"""
+
+    name = "sink"
+
+    @abstractmethod
+    def send(self, subject: str, body: str):
+        """1 通送る。失敗したら例外"""
+
+    def close(self):  # noqa: B027 後片付けが要らない送り先のための既定の実装
+        """接続などの後片付け。既定では何もしない"""
+
+
+class LogSink(AlertSink):
+    """ログに書くだけ（開発環境モード）"""
+
+    name = "log"
+
+    def __init__(self, recipients: Optional[List[str]] = None):
+        self.recipients = recipients or []
+
+    def send(self, subject: str, body: str):
+        logging.info("=== メールアラート（開発環境） ===")
+        logging.info(f"送信先: {', '.join(self.recipients)}")
+        logging.info(f"件名: {subject}")
+        logging.info(f"本文:\n{body}")
+        logging.info("=== メールアラート終了 ===")
+
+
+class EmailSink(AlertSink):
+    """
+    SMTP で送る。接続は送信のたびに張らず使い回し、切れていたら 1 回だけ張り直す。
+    STARTTLS はサーバーが対応していれば（starttls=None のとき）使い、
+    ログインはユーザー名が設定されているときだけ行う。
+    """
+
+    name = "email"
+
+    def __init__(self, server: str, port: int, sender: str, recipients: List[str],
+                 username: str = "", password: str = "", starttls: Optional[bool] = None,
+                 timeout: float = 10.0):
+        self.server = server
+        self.port = port
+        self.sender = sender
+        self.recipients = recipients
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self._smtp: Optional[smtplib.SMTP] = None
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.server, self.port, timeout=self.timeout)
+        smtp.ehlo()
+        use_tls = smtp.has_extn('starttls') if self.starttls is None else self.starttls
+        if use_tls:
+            smtp.starttls()
+            smtp.ehlo()
+        if self.username:
+            smtp.login(self.username, self.password)
+        return smtp
+
+    def send(self, subject: str, body: str):
+        msg = MIMEMultipart()
+        msg['From'] = self.sender
+        msg['To'] = ', '.join(self.recipients)
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain', 'utf-8'))
+
+        for attempt in range(2):
+            if self._smtp is None:
+                self._smtp = self._connect()
+            try:
+                self._smtp.send_message(msg)
+                return
+            except (smtplib.SMTPServerDisconnected, OSError):
+                # 放置している間にサーバー側で切られた接続
+                self._smtp = None
+                if attempt:
+                    raise
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+
+
+class SlackSink(AlertSink):
+    """Slack の Incoming Webhook に送る"""
+
+    name = "slack"
+
+    def __init__(self, webhook_url: str, timeout: float = 10.0):
+        self.webhook_url = webhook_url
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def send(self, subject: str, body: str):
+        response = self.session.post(
+            self.webhook_url, json={'text': f"*{subject}*\n```{body}```"}, timeout=self.timeout
+        )
+        response.raise_for_status()
+
+    def close(self):
+        self.session.close()
+
+
+class LineSink(AlertSink):
+    """LINE Notify に送る"""
+
+    name = "line"
+    URL = "https://notify-api.line.me/api/notify"
+
+    def __init__(self, token: str, url: str = URL, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers['Authorization'] = f'Bearer {token}'
+
+    def send(self, subject: str, body: str):
+        response = self.session.post(
+            self.url, data={'message': f"{subject}\n{body}"}, timeout=self.timeout
+        )
+        response.raise_for_status()
+
+    def close(self):
+        self.session.close()
+
+
+def build_sinks(alert_config, notifications: Optional[Dict] = None) -> List[AlertSink]:
+    """
+    MaintenanceMonitor の alert_config と設定ファイルの notifications から送り先を作る
+    """
+    sinks: List[AlertSink] = []
+    if alert_config.email_enabled:
+        if getattr(alert_config, 'development_mode', True):
+            sinks.append(LogSink(alert_config.email_recipients))
+        else:
+            sinks.append(EmailSink(
+                alert_config.smtp_server,
+                alert_config.smtp_port,
+                sender=alert_config.smtp_username or _DEFAULT_SENDER,
+                recipients=alert_config.email_recipients,
+                username=alert_config.smtp_username,
+                password=alert_config.smtp_password,
+            ))
+
+    notifications = notifications or {}
+    slack = notifications.get('slack') or {}
+    if slack.get('enabled') and slack.get('webhookUrl'):
+        sinks.append(SlackSink(slack['webhookUrl']))
+    line = notifications.get('line') or {}
+    if line.get('enabled') and line.get('token'):
+        sinks.append(LineSink(line['token']))
+    return sinks
+
+
+_STOP = object()
+
+
+class AlertDispatcher:
+    """
+    アラートを監視ループから切り離して送る
+
+    ・submit はキューに積むだけで待たない。キューが一杯なら捨てて件数を数える
+    ・専用スレッドが取り出し、最初の 1 件から coalesce_window 秒以内に来た分を
+      口座ごとに 1 通のダイジェストにまとめて、その口座の送り先すべてに送る
+    ・送り先ごとに失敗を切り分ける（Slack が落ちていてもメールは届く）
+    """
+
+    def __init__(self, maxsize: int = 1000, coalesce_window: float = 2.0, max_batch: int = 50):
+        self.coalesce_window = coalesce_window
+        self.max_batch = max_batch
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._routes: Dict[str, List[AlertSink]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.stats = {'queued': 0, 'dropped': 0, 'sent': 0, 'failed': 0}
+
+    def register(self, account: str, sinks: List[AlertSink]):
+        """account のアラートの送り先を設定（既存の送り先は閉じる）"""
+        with self._lock:
+            old = self._routes.get(account, [])
+            self._routes[account] = list(sinks)
+        for sink in old:
+            if sink not in sinks:
+                sink.close()
+
+    def submit(self, alert: Alert) -> bool:
+        """アラートを積む。積めなければ False"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(alert)
+        except queue.Full:
+            self.stats['dropped'] += 1
+            logging.error(f"アラートキューが一杯のため破棄しました: [{alert.account}] {alert.level}")
+            return False
+        self.stats['queued'] += 1
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """積まれた分を送り終えるまで待つ。timeout までに終われば True"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: Optional[float] = 10.0):
+        """残りを送ってからスレッドを止め、送り先を閉じる"""
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            self._thread = None
+        with self._lock:
+            routes, self._routes = self._routes, {}
+        for sinks in routes.values():
+            for sink in sinks:
+                sink.close()
+
+    # ---------- 送信スレッド ----------
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name='alert-dispatcher', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            batch, stop = [item], False
+            deadline = time.monotonic() + self.coalesce_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            try:
+                self._deliver(batch)
+            finally:
+                for _ in range(len(batch) + stop):
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _deliver(self, batch: List[Alert]):
+        by_account: Dict[str, List[Alert]] = {}
+        for alert in batch:
+            by_account.setdefault(alert.account, []).append(alert)
+
+        for account, alerts in by_account.items():
+            with self._lock:
+                sinks = list(self._routes.get(account, []))
+            subject, body = render_digest(alerts)
+            for sink in sinks:
+                try:
+                    sink.send(subject, body)
+                    self.stats['sent'] += 1
+                except Exception as e:
+                    self.stats['failed'] += 1
+                    logging.error(f"アラート送信エラー（{sink.name}）: {e}")
@@ -0,0 +1,101 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class ConfigWatcher:
+    """
+    JSON 設定ファイルの変更検知と保存
+
+    ・changed() は最短 interval 秒おきに stat して、最後に読んだ／書いたときの
+      (mtime, サイズ) から変わっていれば True（自分で書いた分では反応しない）
+    ・write() は最後に読んだ／書いた内容と同じなら何もしない。書くときは一時ファイルに
+      書いてから os.replace で置き換えるので、読む側が書きかけを見ることはない
+    ・最後に読んだ／書いた後にほかから書き換えられていれば write() は書かない
+      （read() で読み直してから書く）。検証に通らなかった内容は読んだことにしないので、
+      直されるまで上書きせず、changed() も同じ内容では繰り返し反応しない
+    """
+
+    def __init__(self, path: str, interval: float = 1.0, clock=time.monotonic):
+        self.path = path
+        self.interval = interval
+        self._clock = clock
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._content: Optional[Dict[str, Any]] = None
+        self._checked_at: Optional[float] = None
+        self._rejected: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def changed(self) -> bool:
+        """前回の読み書き以降にファイルが変わったか"""
+        now = self._clock()
+        with self._lock:
+            if self._checked_at is not None and now - self._checked_at < self.interval:
+                return False
+            self._checked_at = now
+            stamp = self._stat()
+            return stamp is not None and stamp not in (self._stamp, self._rejected)
+
+    def read(self, validate: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Dict[str, Any]:
+        """
+        読み込む。ファイルが無ければ FileNotFoundError、JSON が壊れていれば ValueError。
+        validate(config) が例外を投げたらそのまま伝え、前回読んだ内容を基準のままにする
+        """
+        with self._lock:
+            stamp = self._stat()
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    config = json.load(f)
+                if not isinstance(config, dict):
+                    raise ValueError("設定ファイルの最上位はオブジェクトである必要があります")
+                if validate is not None:
+                    validate(config)
+            except FileNotFoundError:
+                raise
+            except Exception:
+                self._rejected = stamp
+                raise
+            self._stamp = stamp
+            self._rejected = None
+            self._content = config
+            return config
+
+    def write(self, config: Dict[str, Any]) -> bool:
+        """
+        内容が変わっていれば原子的に書き換えて True。
+        前回の読み書き以降にファイルが書き換えられていれば、上書きせずに False
+        """
+        with self._lock:
+            stamp = self._stat()
+            if stamp != self._stamp:
+                logging.warning(f"{self.path} はほかから書き換えられているため保存しません")
+                return False
+            if config == self._content:
+                return False
+            directory = os.path.dirname(os.path.abspath(self.path))
+            tmp = os.path.join(
+                directory,
+                f".{os.path.basename(self.path)}.{os.getpid()}.{threading.get_ident()}.tmp",
+            )
+            try:
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump(config, f, indent=2, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+            self._stamp = self._stat()
+            self._content = json.loads(json.dumps(config))
+            return True
@@ -1,11 +1,19 @@
-import requests
+import asyncio
 import json
 import logging
-from typing import Dict, Optional, Any
-from abc import ABC, abstractmethod
 import sqlite3
-import pandas as pd
-from datetime import datetime, timedelta
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from streaming_stats import StreamingWindowStats
+
 
 class DataConnector(ABC):
     """データソース接続の抽象基底クラス"""
@@ -24,6 +32,21 @@ class DataConnector(ABC):
     def get_position_info(self) -> Dict[str, Any]:
         """ポジション情報を取得"""
         pass
+    
+    def get_snapshot(self) -> Dict[str, Any]:
+        """維持率・口座・ポジションをまとめて取得（まとめて取れるコネクターは上書きする）"""
+        return {
+            'maintenance_rate': self.get_maintenance_rate(),
+            'account': self.get_account_info(),
+            'positions': self.get_position_info(),
+        }
+    
+    def is_healthy(self) -> bool:
+        """接続が使える状態か（ConnectorManager が作り直すかの判断に使う）"""
+        return True
+    
+    def close(self):  # noqa: B027 後片付けが要らないコネクターのための既定の実装
+        """接続などの後片付け。既定では何もしない"""
 
 class MockDataConnector(DataConnector):
     """モックデータコネクター（テスト用）"""
@@ -36,7 +59,6 @@ class MockDataConnector(DataConnector):
     def get_maintenance_rate(self) -> float:
         """シミュレーション用の信用維持率を生成"""
         import random
-        import math
         
         # 時間経過による改善傾向を加味
         time_factor = datetime.now().hour / 24.0  # 0-1の範囲
@@ -76,23 +98,45 @@ class MockDataConnector(DataConnector):
 class APIDataConnector(DataConnector):
     """API経由でデータを取得するコネクター"""
     
-    def __init__(self, api_url: str, api_key: str, api_secret: str = None):
+    def __init__(self, api_url: str, api_key: str, api_secret: str = None,
+                 timeout: float = 10.0, pool_maxsize: int = 10):
         self.api_url = api_url
         self.api_key = api_key
         self.api_secret = api_secret
+        self.timeout = timeout
         self.session = requests.Session()
+        # 並行取得時に同じホストへの接続を使い回せるようプールを広げる
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
         self.session.headers.update({
             'Authorization': f'Bearer {api_key}',
             'Content-Type': 'application/json'
         })
+        self.last_error: Optional[Exception] = None
     
-    def get_maintenance_rate(self) -> float:
-        """APIから信用維持率を取得"""
+    def _get_json(self, path: str) -> Any:
+        """GET して JSON を返す。直近の失敗は last_error に残す"""
         try:
-            response = self.session.get(f"{self.api_url}/account/maintenance-rate")
+            response = self.session.get(f"{self.api_url}{path}", timeout=self.timeout)
             response.raise_for_status()
-            
             data = response.json()
+        except requests.RequestException as e:
+            self.last_error = e
+            raise
+        self.last_error = None
+        return data
+    
+    def is_healthy(self) -> bool:
+        return self.last_error is None
+    
+    def close(self):
+        self.session.close()
+    
+    def get_maintenance_rate(self) -> float:
+        """APIから信用維持率を取得"""
+        try:
+            data = self._get_json("/account/maintenance-rate")
             return float(data.get('maintenance_rate', 0))
             
         except requests.RequestException as e:
@@ -102,10 +146,7 @@ class APIDataConnector(DataConnector):
     def get_account_info(self) -> Dict[str, Any]:
         """APIから口座情報を取得"""
         try:
-            response = self.session.get(f"{self.api_url}/account/info")
-            response.raise_for_status()
-            
-            return response.json()
+            return self._get_json("/account/info")
             
         except requests.RequestException as e:
             logging.error(f"口座情報取得エラー: {e}")
@@ -114,37 +155,108 @@ class APIDataConnector(DataConnector):
     def get_position_info(self) -> Dict[str, Any]:
         """APIからポジション情報を取得"""
         try:
-            response = self.session.get(f"{self.api_url}/positions")
-            response.raise_for_status()
-            
-            return response.json()
+            return self._get_json("/positions")
             
         except requests.RequestException as e:
             logging.error(f"ポジション情報取得エラー: {e}")
             return {}
 
 class DatabaseDataConnector(DataConnector):
-    """データベースからデータを取得するコネクター"""
+    """
+    データベースからデータを取得するコネクター
+
+    接続はスレッドごとに 1 本を使い回し（sqlite3 が文をキャッシュするので同じ SQL は
+    再コンパイルされない）、1 行だけ欲しい問い合わせは pandas を通さずカーソルで読む。
+    timestamp 列のインデックスは初回接続時に作成する。
+    """
+    
+    _LATEST_ACCOUNT = "SELECT * FROM account_data ORDER BY timestamp DESC LIMIT 1"
+    _LATEST_POSITION = "SELECT * FROM position_data ORDER BY timestamp DESC LIMIT 1"
+    # 口座とポジションの最新行を 1 回で取る（どちらかが空でも 1 行返る）
+    _SNAPSHOT = f"""
+    SELECT a.*, p.*
+    FROM (SELECT 1)
+    LEFT JOIN ({_LATEST_ACCOUNT}) AS a ON 1
+    LEFT JOIN ({_LATEST_POSITION}) AS p ON 1
+    """
+    _INDEXES = (
+        "CREATE INDEX IF NOT EXISTS idx_account_data_timestamp ON account_data(timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_position_data_timestamp ON position_data(timestamp)",
+    )
     
     def __init__(self, db_path: str):
         self.db_path = db_path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._indexed = False
+        self._n_account: Optional[int] = None
+    
+    def _connection(self) -> sqlite3.Connection:
+        """このスレッド用の接続（無ければ作る）"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+            self._ensure_indexes(conn)
+        return conn
+    
+    def _ensure_indexes(self, conn: sqlite3.Connection):
+        if self._indexed:
+            return
+        try:
+            with conn:
+                for ddl in self._INDEXES:
+                    conn.execute(ddl)
+            self._indexed = True
+        except sqlite3.Error as e:
+            # テーブルがまだ無いなど。次の接続で再挑戦する
+            logging.debug(f"インデックス作成をスキップ: {e}")
+    
+    def _fetchone(self, query: str) -> Optional[sqlite3.Row]:
+        try:
+            return self._connection().execute(query).fetchone()
+        except sqlite3.Error:
+            self._discard()
+            raise
+    
+    def _discard(self):
+        """エラーの出た接続を捨て、次回つなぎ直す"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.conn = None
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+    
+    def is_healthy(self) -> bool:
+        try:
+            self._fetchone("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+    
+    def close(self):
+        """全スレッドの接続を閉じる"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
     
     def get_maintenance_rate(self) -> float:
         """データベースから最新の信用維持率を取得"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            query = """
-            SELECT maintenance_rate 
-            FROM account_data 
-            ORDER BY timestamp DESC 
-            LIMIT 1
-            """
-            
-            result = pd.read_sql_query(query, conn)
-            conn.close()
-            
-            if not result.empty:
-                return float(result.iloc[0]['maintenance_rate'])
+            row = self._fetchone(
+                "SELECT maintenance_rate FROM account_data ORDER BY timestamp DESC LIMIT 1"
+            )
+            if row is not None:
+                return float(row[0])
             else:
                 return 167.0
                 
@@ -155,20 +267,8 @@ class DatabaseDataConnector(DataConnector):
     def get_account_info(self) -> Dict[str, Any]:
         """データベースから口座情報を取得"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            query = """
-            SELECT * FROM account_data 
-            ORDER BY timestamp DESC 
-            LIMIT 1
-            """
-            
-            result = pd.read_sql_query(query, conn)
-            conn.close()
-            
-            if not result.empty:
-                return result.iloc[0].to_dict()
-            else:
-                return {}
+            row = self._fetchone(self._LATEST_ACCOUNT)
+            return dict(row) if row is not None else {}
                 
         except Exception as e:
             logging.error(f"口座情報取得エラー: {e}")
@@ -177,24 +277,102 @@ class DatabaseDataConnector(DataConnector):
     def get_position_info(self) -> Dict[str, Any]:
         """データベースからポジション情報を取得"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            query = """
-            SELECT * FROM position_data 
-            ORDER BY timestamp DESC 
-            LIMIT 1
-            """
-            
-            result = pd.read_sql_query(query, conn)
-            conn.close()
-            
-            if not result.empty:
-                return result.iloc[0].to_dict()
-            else:
-                return {}
+            row = self._fetchone(self._LATEST_POSITION)
+            return dict(row) if row is not None else {}
                 
         except Exception as e:
             logging.error(f"ポジション情報取得エラー: {e}")
             return {}
+    
+    def get_snapshot(self) -> Dict[str, Any]:
+        """維持率・口座・ポジションを 1 回の問い合わせで取得"""
+        try:
+            conn = self._connection()
+            if self._n_account is None:
+                # 列名が重なる（timestamp など）ので、口座側の列数で切り分ける
+                self._n_account = len(conn.execute("PRAGMA table_info(account_data)").fetchall())
+            cursor = conn.execute(self._SNAPSHOT)
+            row = cursor.fetchone()
+        except Exception as e:
+            self._discard()
+            logging.error(f"スナップショット取得エラー: {e}")
+            return super().get_snapshot()
+        
+        names = [d[0] for d in cursor.description]
+        account = dict(zip(names[:self._n_account], row[:self._n_account]))
+        positions = dict(zip(names[self._n_account:], row[self._n_account:]))
+        if all(v is None for v in account.values()):
+            account = {}
+        if all(v is None for v in positions.values()):
+            positions = {}
+        rate = account.get('maintenance_rate')
+        return {
+            'maintenance_rate': float(rate) if rate is not None else 167.0,
+            'account': account,
+            'positions': positions,
+        }
+
+class AsyncDataConnector:
+    """同期コネクターをスレッドプールで動かす非同期アダプター"""
+    
+    def __init__(self, connector: DataConnector, executor: Optional[Executor] = None,
+                 max_workers: int = 8):
+        self.connector = connector
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='connector'
+        )
+    
+    async def _call(self, func):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func)
+    
+    async def get_maintenance_rate(self) -> float:
+        """信用維持率を取得"""
+        return await self._call(self.connector.get_maintenance_rate)
+    
+    async def get_account_info(self) -> Dict[str, Any]:
+        """口座情報を取得"""
+        return await self._call(self.connector.get_account_info)
+    
+    async def get_position_info(self) -> Dict[str, Any]:
+        """ポジション情報を取得"""
+        return await self._call(self.connector.get_position_info)
+    
+    async def get_snapshot(self) -> Dict[str, Any]:
+        """維持率・口座・ポジションを同時に取得"""
+        if type(self.connector).get_snapshot is not DataConnector.get_snapshot:
+            # 1 回でまとめて取れるコネクターはそれに任せる
+            return await self._call(self.connector.get_snapshot)
+        rate, account, positions = await asyncio.gather(
+            self.get_maintenance_rate(),
+            self.get_account_info(),
+            self.get_position_info(),
+        )
+        return {'maintenance_rate': rate, 'account': account, 'positions': positions}
+    
+    def close(self):
+        """専用のスレッドプールを片付ける"""
+        if self._own_executor:
+            self._executor.shutdown(wait=True)
+
+async def gather_snapshots(connectors: Dict[str, AsyncDataConnector],
+                           limit: int = 16) -> Dict[str, Any]:
+    """
+    複数口座のスナップショットを同時に limit 件まで並行取得する。
+    失敗した口座は例外オブジェクトをそのまま値として返す。
+    """
+    sem = asyncio.Semaphore(limit)
+    
+    async def _one(connector: AsyncDataConnector):
+        async with sem:
+            return await connector.get_snapshot()
+    
+    names = list(connectors)
+    results = await asyncio.gather(
+        *(_one(connectors[name]) for name in names), return_exceptions=True
+    )
+    return dict(zip(names, results))
 
 class DataConnectorFactory:
     """データコネクターのファクトリークラス"""
@@ -212,83 +390,177 @@ class DataConnectorFactory:
         else:
             raise ValueError(f"サポートされていないコネクタータイプ: {connector_type}")
 
+class ConnectorManager:
+    """
+    コネクターを名前ごとに 1 つだけ作って使い回す。
+
+    ・同じ名前・同じ設定なら前回のインスタンスを返す（HTTP セッションや DB 接続を維持）
+    ・設定が変わった、invalidate された、health_interval 秒ごとの is_healthy() が
+      False だった、のいずれかで古いものを close して作り直す
+    """
+    
+    def __init__(self, health_interval: float = 30.0, factory=None, clock=time.monotonic):
+        self.health_interval = health_interval
+        self._factory = factory or DataConnectorFactory.create_connector
+        self._clock = clock
+        # name → (設定キー, コネクター, 最後に健全性を確認した時刻)
+        self._entries: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _config_key(connector_type: str, kwargs: Dict[str, Any]) -> str:
+        return json.dumps([connector_type.lower(), kwargs], sort_keys=True, default=str)
+    
+    def get(self, connector_type: str, kwargs: Optional[Dict[str, Any]] = None,
+            name: str = 'default') -> DataConnector:
+        """name 用のコネクターを返す（必要なときだけ作り直す）"""
+        kwargs = kwargs or {}
+        key = self._config_key(connector_type, kwargs)
+        now = self._clock()
+        stale = None
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == key:
+                connector, checked = entry[1], entry[2]
+                if now - checked < self.health_interval:
+                    return connector
+                if connector.is_healthy():
+                    self._entries[name] = (key, connector, now)
+                    return connector
+                logging.warning(f"コネクター {name} が応答しないため作り直します")
+            if entry is not None:
+                stale = entry[1]
+            connector = self._factory(connector_type, **kwargs)
+            self._entries[name] = (key, connector, now)
+        if stale is not None:
+            stale.close()
+        return connector
+    
+    def invalidate(self, name: str = 'default'):
+        """name のコネクターを捨て、次の get で作り直させる"""
+        with self._lock:
+            entry = self._entries.pop(name, None)
+        if entry is not None:
+            entry[1].close()
+    
+    def close(self):
+        with self._lock:
+            entries, self._entries = self._entries, {}
+        for _, connector, _ in entries.values():
+            connector.close()
+
 class DataAnalyzer:
-    """データ分析クラス"""
+    """
+    データ分析クラス
+    
+    既定の窓（window_hours）は逐次統計で追加ごとに O(1) で更新し、
+    それ以外の窓は NumPy 配列からまとめて計算する。
+    """
     
-    def __init__(self, connector: DataConnector):
+    def __init__(self, connector: DataConnector, max_points: int = 100_000,
+                 window_hours: int = 24):
         self.connector = connector
-        self.history = []
+        self.max_points = max_points
+        self.window_hours = window_hours
+        self._stream = StreamingWindowStats(window_hours * 3600, max_points=max_points)
+        # 有効なデータは [_head, _tail) の範囲。時刻はエポック秒
+        self._ts = np.empty(1024, dtype=np.float64)
+        self._rates = np.empty(1024, dtype=np.float64)
+        self._head = 0
+        self._tail = 0
     
-    def analyze_trend(self, hours: int = 24) -> Dict[str, Any]:
-        """トレンド分析"""
-        if len(self.history) < 2:
-            return {'trend': 'INSUFFICIENT_DATA', 'slope': 0, 'confidence': 0}
-        
-        # 指定時間内のデータを抽出
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        recent_data = [
-            entry for entry in self.history 
-            if datetime.fromisoformat(entry['timestamp']) > cutoff_time
+    @property
+    def history(self) -> List[Dict[str, Any]]:
+        """互換用：{'timestamp': ISO 文字列, 'rate': 値} のリスト"""
+        return [
+            {'timestamp': datetime.fromtimestamp(t).isoformat(), 'rate': r}
+            for t, r in zip(self._ts[self._head:self._tail].tolist(),
+                            self._rates[self._head:self._tail].tolist())
         ]
+    
+    def __len__(self) -> int:
+        return self._tail - self._head
+    
+    def _window(self, hours: float):
+        """直近 hours 時間（現在時刻基準）の時刻・維持率のビュー"""
+        ts = self._ts[self._head:self._tail]
+        cutoff = datetime.now().timestamp() - hours * 3600
+        i = int(np.searchsorted(ts, cutoff, side='right'))
+        return ts[i:], self._rates[self._head + i:self._tail]
+    
+    def _window_stats(self, hours: float) -> Optional[Dict[str, float]]:
+        """窓内の回帰・決定係数・標準偏差を 1 回でまとめて計算。2 点未満なら None"""
+        if hours == self.window_hours:
+            self._stream.expire(datetime.now().timestamp())
+            return self._stream.snapshot()
         
-        if len(recent_data) < 2:
-            return {'trend': 'INSUFFICIENT_DATA', 'slope': 0, 'confidence': 0}
-        
-        # 線形回帰でトレンドを計算
-        timestamps = [datetime.fromisoformat(entry['timestamp']) for entry in recent_data]
-        rates = [entry['rate'] for entry in recent_data]
-        
-        # 時間を数値に変換（時間単位）
-        time_nums = [(t - timestamps[0]).total_seconds() / 3600 for t in timestamps]
+        ts, rates = self._window(hours)
+        n = len(ts)
+        if n < 2:
+            return None
         
-        # 線形回帰
-        slope, intercept = self._linear_regression(time_nums, rates)
+        x = (ts - ts[0]) / 3600  # 時間単位
+        x_mean = x.mean()
+        y_mean = rates.mean()
+        dx = x - x_mean
+        dy = rates - y_mean
+        sxx = float(dx @ dx)
+        sxy = float(dx @ dy)
+        syy = float(dy @ dy)
         
-        # トレンド判定
+        slope = sxy / sxx if sxx else 0.0
+        r_squared = (sxy * sxy) / (sxx * syy) if sxx and syy else 0.0
+        return {
+            'slope': slope,
+            'r_squared': r_squared,
+            'volatility': (syy / n) ** 0.5,
+            'data_points': n,
+        }
+    
+    @staticmethod
+    def _trend_label(slope: float) -> str:
         if slope > 0.1:
-            trend = 'IMPROVING'
-        elif slope < -0.1:
-            trend = 'DECLINING'
-        else:
-            trend = 'STABLE'
-        
-        # 信頼度計算（R²）
-        confidence = self._calculate_r_squared(time_nums, rates, slope, intercept)
+            return 'IMPROVING'
+        if slope < -0.1:
+            return 'DECLINING'
+        return 'STABLE'
+    
+    def analyze_trend(self, hours: int = 24) -> Dict[str, Any]:
+        """トレンド分析"""
+        stats = self._window_stats(hours)
+        if stats is None:
+            return {'trend': 'INSUFFICIENT_DATA', 'slope': 0, 'confidence': 0}
         
         return {
-            'trend': trend,
-            'slope': slope,
-            'confidence': confidence,
-            'data_points': len(recent_data)
+            'trend': self._trend_label(stats['slope']),
+            'slope': stats['slope'],
+            'confidence': stats['r_squared'],
+            'data_points': stats['data_points']
         }
     
     def _linear_regression(self, x, y):
         """線形回帰計算"""
-        n = len(x)
-        if n == 0:
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if len(x) == 0:
             return 0, 0
         
-        sum_x = sum(x)
-        sum_y = sum(y)
-        sum_xy = sum(x[i] * y[i] for i in range(n))
-        sum_x2 = sum(x[i] ** 2 for i in range(n))
-        
-        slope = (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x ** 2)
-        intercept = (sum_y - slope * sum_x) / n
+        dx = x - x.mean()
+        sxx = float(dx @ dx)
+        slope = float(dx @ (y - y.mean())) / sxx if sxx else 0.0
+        intercept = float(y.mean() - slope * x.mean())
         
         return slope, intercept
     
     def _calculate_r_squared(self, x, y, slope, intercept):
         """決定係数（R²）の計算"""
-        n = len(x)
-        if n == 0:
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        if len(x) == 0:
             return 0
         
-        y_pred = [slope * xi + intercept for xi in x]
-        y_mean = sum(y) / n
-        
-        ss_res = sum((y[i] - y_pred[i]) ** 2 for i in range(n))
-        ss_tot = sum((y[i] - y_mean) ** 2 for i in range(n))
+        ss_res = float(np.sum((y - (slope * x + intercept)) ** 2))
+        ss_tot = float(np.sum((y - y.mean()) ** 2))
         
         if ss_tot == 0:
             return 0
@@ -297,29 +569,20 @@ class DataAnalyzer:
     
     def get_volatility(self, hours: int = 24) -> float:
         """ボラティリティ計算"""
-        if len(self.history) < 2:
+        stats = self._window_stats(hours)
+        if stats is None:
             return 0
-        
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        recent_data = [
-            entry for entry in self.history 
-            if datetime.fromisoformat(entry['timestamp']) > cutoff_time
-        ]
-        
-        if len(recent_data) < 2:
-            return 0
-        
-        rates = [entry['rate'] for entry in recent_data]
-        mean_rate = sum(rates) / len(rates)
-        
-        variance = sum((rate - mean_rate) ** 2 for rate in rates) / len(rates)
-        return (variance ** 0.5)
+        return stats['volatility']
     
-    def predict_next_rate(self, hours_ahead: int = 1) -> Dict[str, Any]:
-        """将来の信用維持率を予測"""
-        trend_analysis = self.analyze_trend()
+    def predict_next_rate(self, hours_ahead: int = 1, hours: int = 24,
+                          current_rate: Optional[float] = None) -> Dict[str, Any]:
+        """
+        将来の信用維持率を予測
+        current_rate を渡せばそれを現在値とする（監視ループで取得済みの値。コネクターへ問い合わせない）
+        """
+        stats = self._window_stats(hours)
         
-        if trend_analysis['trend'] == 'INSUFFICIENT_DATA':
+        if stats is None:
             return {
                 'predicted_rate': None,
                 'confidence': 0,
@@ -327,35 +590,46 @@ class DataAnalyzer:
             }
         
         # 現在のレートを取得
-        current_rate = self.connector.get_maintenance_rate()
+        if current_rate is None:
+            current_rate = self.connector.get_maintenance_rate()
         
         # 線形予測
-        predicted_rate = current_rate + (trend_analysis['slope'] * hours_ahead)
+        predicted_rate = current_rate + (stats['slope'] * hours_ahead)
         
         # 信頼区間の計算（簡易版）
-        volatility = self.get_volatility()
-        confidence_interval = volatility * 1.96  # 95%信頼区間
+        confidence_interval = stats['volatility'] * 1.96  # 95%信頼区間
         
         return {
             'predicted_rate': round(predicted_rate, 2),
-            'confidence': trend_analysis['confidence'],
+            'confidence': stats['r_squared'],
             'confidence_interval': round(confidence_interval, 2),
             'method': 'LINEAR_REGRESSION',
-            'trend': trend_analysis['trend']
+            'trend': self._trend_label(stats['slope'])
         }
     
-    def add_data_point(self, rate: float):
-        """データポイントを追加"""
-        self.history.append({
-            'timestamp': datetime.now().isoformat(),
-            'rate': rate
-        })
+    def add_data_point(self, rate: float, timestamp: Optional[datetime] = None):
+        """データポイントを追加（時刻は昇順に来る前提）"""
+        if self._tail == len(self._ts):
+            self._make_room()
+        ts = (timestamp or datetime.now()).timestamp()
+        self._ts[self._tail] = ts
+        self._rates[self._tail] = rate
+        self._tail += 1
+        self._stream.add(ts, rate)
         
-        # 履歴を1000件に制限
-        if len(self.history) > 1000:
-            self.history = self.history[-1000:]
-
-
-
-
-
+        # 履歴を max_points 件に制限（先頭をずらすだけでコピーしない）
+        if self._tail - self._head > self.max_points:
+            self._head = self._tail - self.max_points
+    
+    def _make_room(self):
+        """配列が埋まったら前に詰める。詰めても半分以上埋まっていれば 2 倍に広げる"""
+        n = self._tail - self._head
+        capacity = len(self._ts)
+        if n * 2 > capacity:
+            capacity *= 2
+        ts = np.empty(capacity, dtype=np.float64)
+        rates = np.empty(capacity, dtype=np.float64)
+        ts[:n] = self._ts[self._head:self._tail]
+        rates[:n] = self._rates[self._head:self._tail]
+        self._ts, self._rates = ts, rates
+        self._head, self._tail = 0, n
@@ -0,0 +1,304 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+# ダウンサンプリングの段（秒）。raw → 1 分 → 1 時間の順に集約する
+TIERS = {'1m': 60, '1h': 3600}
+
+# 保持期間（秒）。None は無期限
+DEFAULT_RETENTION = {
+    'raw': 30 * 86400,
+    '1m': 365 * 86400,
+    '1h': None,
+}
+
+_LEVELS = ('WARNING', 'CRITICAL', 'EMERGENCY')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples_raw (
+    account     TEXT NOT NULL,
+    ts          REAL NOT NULL,
+    rate        REAL NOT NULL,
+    alert_level TEXT NOT NULL,
+    status      TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_samples_raw ON samples_raw(account, ts);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+_ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples_{tier} (
+    account      TEXT NOT NULL,
+    bucket       INTEGER NOT NULL,
+    n            INTEGER NOT NULL,
+    mean         REAL NOT NULL,
+    m2           REAL NOT NULL,
+    min          REAL NOT NULL,
+    max          REAL NOT NULL,
+    n_warning    INTEGER NOT NULL,
+    n_critical   INTEGER NOT NULL,
+    n_emergency  INTEGER NOT NULL,
+    PRIMARY KEY (account, bucket)
+) WITHOUT ROWID;
+"""
+
+
+class HistoryStore:
+    """
+    信用維持率の監視履歴を SQLite（WAL モード）に追記保存する
+
+    ・append はメモリ上のバッファに積むだけで、batch_size 件か flush_interval 秒ごとに
+      1 トランザクションでまとめて書く
+    ・確定した分・時間のバケットは 1 分足・1 時間足（件数・平均・偏差平方和・最小・最大・
+      アラート件数）に集約し、保持期間を過ぎた細かい段は消す
+    ・レポート用の集計は SQL 側で行い、全件をメモリに読み込まない
+    """
+
+    def __init__(self, path: str = "maintenance_history.db", batch_size: int = 64,
+                 flush_interval: float = 5.0, retention: Optional[Dict[str, Optional[float]]] = None,
+                 clock=time.time):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention = dict(DEFAULT_RETENTION, **(retention or {}))
+        self._clock = clock
+        self._pending: List[Tuple[str, float, float, str, str]] = []
+        self._last_flush = clock()
+        self._last_compact = 0.0
+        self._lock = threading.RLock()
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA + "".join(_ROLLUP_SCHEMA.format(tier=t) for t in TIERS))
+
+    # ---------- 書き込み ----------
+    def append(self, rate: float, alert_level: str, status: str,
+               timestamp: Optional[float] = None, account: str = "default"):
+        """1 サンプルを追加（timestamp はエポック秒。省略時は現在時刻）"""
+        ts = self._clock() if timestamp is None else timestamp
+        with self._lock:
+            self._pending.append((account, float(ts), float(rate), alert_level, status))
+            if (len(self._pending) >= self.batch_size
+                    or self._clock() - self._last_flush >= self.flush_interval):
+                self.flush()
+
+    def flush(self):
+        """バッファを書き出し、1 分以上経っていれば集約と古いデータの削除も行う"""
+        with self._lock:
+            if self._pending:
+                with self._transaction():
+                    self._conn.executemany(
+                        "INSERT INTO samples_raw VALUES (?, ?, ?, ?, ?)", self._pending
+                    )
+                self._pending.clear()
+            self._last_flush = self._clock()
+            if self._last_flush - self._last_compact >= TIERS['1m']:
+                self.compact(self._last_flush)
+
+    def compact(self, now: Optional[float] = None):
+        """確定したバケットを上の段へ集約し、保持期間を過ぎた行を削除する"""
+        now = self._clock() if now is None else now
+        with self._lock, self._transaction():
+            source = 'raw'
+            for tier, size in TIERS.items():
+                done = int(now // size) * size  # これより前のバケットは確定済み
+                mark = self._get_meta(f'rolled_{tier}', 0.0)
+                if done > mark:
+                    if source == 'raw':
+                        self._rollup_raw(tier, size, mark, done)
+                    else:
+                        self._rollup_tier(source, tier, size, mark, done)
+                    self._set_meta(f'rolled_{tier}', done)
+                source = tier
+
+            # 上の段へ集約し終えた範囲だけを消す
+            for tier, table, column in (('raw', 'samples_raw', 'ts'),
+                                        ('1m', 'samples_1m', 'bucket')):
+                keep = self.retention.get(tier)
+                if keep is None:
+                    continue
+                upper = '1m' if tier == 'raw' else '1h'
+                cutoff = min(now - keep, self._get_meta(f'rolled_{upper}', 0.0))
+                self._conn.execute(f"DELETE FROM {table} WHERE {column} < ?", (cutoff,))
+            if self.retention.get('1h') is not None:
+                self._conn.execute("DELETE FROM samples_1h WHERE bucket < ?",
+                                   (now - self.retention['1h'],))
+        self._last_compact = now
+
+    def _rollup_raw(self, tier: str, size: int, start: float, end: float):
+        bucket = f"CAST(ts / {size} AS INTEGER) * {size}"
+        counts = ", ".join(f"SUM(alert_level = '{lv}') AS n_{lv.lower()}" for lv in _LEVELS)
+        self._conn.execute(
+            f"""
+            INSERT OR REPLACE INTO samples_{tier}
+            SELECT r.account, g.bucket, g.n, g.mean,
+                   SUM((r.rate - g.mean) * (r.rate - g.mean)),
+                   g.min, g.max, g.n_warning, g.n_critical, g.n_emergency
+            FROM samples_raw AS r
+            JOIN (
+                SELECT account, {bucket} AS bucket, COUNT(*) AS n, AVG(rate) AS mean,
+                       MIN(rate) AS min, MAX(rate) AS max, {counts}
+                FROM samples_raw WHERE ts >= ? AND ts < ?
+                GROUP BY account, bucket
+            ) AS g
+              ON r.account = g.account AND {bucket.replace('ts', 'r.ts')} = g.bucket
+            WHERE r.ts >= ? AND r.ts < ?
+            GROUP BY r.account, g.bucket
+            """,
+            (start, end, start, end),
+        )
+
+    def _rollup_tier(self, source: str, tier: str, size: int, start: float, end: float):
+        # 平均と偏差平方和は並列版 Welford（Chan らの式）で合成する
+        bucket = f"(bucket / {size}) * {size}"
+        self._conn.execute(
+            f"""
+            INSERT OR REPLACE INTO samples_{tier}
+            SELECT s.account, g.bucket, g.n, g.mean,
+                   SUM(s.m2 + s.n * (s.mean - g.mean) * (s.mean - g.mean)),
+                   g.min, g.max, g.n_warning, g.n_critical, g.n_emergency
+            FROM samples_{source} AS s
+            JOIN (
+                SELECT account, {bucket} AS bucket, SUM(n) AS n,
+                       SUM(n * mean) / SUM(n) AS mean, MIN(min) AS min, MAX(max) AS max,
+                       SUM(n_warning) AS n_warning, SUM(n_critical) AS n_critical,
+                       SUM(n_emergency) AS n_emergency
+                FROM samples_{source} WHERE bucket >= ? AND bucket < ?
+                GROUP BY account, {bucket}
+            ) AS g
+              ON s.account = g.account AND {bucket.replace('bucket', 's.bucket')} = g.bucket
+            WHERE s.bucket >= ? AND s.bucket < ?
+            GROUP BY s.account, g.bucket
+            """,
+            (start, end, start, end),
+        )
+
+    # ---------- 読み出し ----------
+    def summary(self, account: str = "default", start: Optional[float] = None,
+                end: Optional[float] = None, targets: Iterable[float] = ()) -> Dict[str, Any]:
+        """
+        [start, end] の生データの集計（件数・期間・平均・最大・最小・標準偏差(ddof=1)、
+        targets 以上の件数、アラートレベル別件数）を 1 クエリで返す
+        """
+        self.flush()
+        targets = list(targets)
+        where, params = self._range("ts", account, start, end)
+        above = "".join(f", SUM(w.rate >= {float(t)!r})" for t in targets)
+        levels = "".join(f", SUM(w.alert_level = '{lv}')" for lv in _LEVELS)
+        row = self._conn.execute(
+            f"""
+            WITH w AS (SELECT ts, rate, alert_level FROM samples_raw WHERE {where}),
+                 a AS (SELECT AVG(rate) AS mean FROM w)
+            SELECT COUNT(*), MIN(w.ts), MAX(w.ts), a.mean, MAX(w.rate), MIN(w.rate),
+                   SUM((w.rate - a.mean) * (w.rate - a.mean)) {above} {levels}
+            FROM w, a
+            """,
+            params,
+        ).fetchone()
+
+        n = row[0]
+        if not n:
+            return {'count': 0}
+        rest = row[7:]
+        return {
+            'count': n,
+            'first': datetime.fromtimestamp(row[1]).isoformat(),
+            'last': datetime.fromtimestamp(row[2]).isoformat(),
+            'mean': row[3],
+            'max': row[4],
+            'min': row[5],
+            'std': (row[6] / (n - 1)) ** 0.5 if n > 1 else float('nan'),
+            'above': dict(zip(targets, rest[:len(targets)])),
+            'levels': dict(zip(_LEVELS, rest[len(targets):])),
+        }
+
+    def query(self, account: str = "default", start: Optional[float] = None,
+              end: Optional[float] = None, resolution: Optional[str] = None) -> pd.DataFrame:
+        """
+        範囲を DataFrame で返す。resolution は 'raw' / '1m' / '1h'。
+        省略時は start がまだ残っている最も細かい段を選ぶ
+        """
+        self.flush()
+        if resolution is None:
+            resolution = self._pick_resolution(start)
+        if resolution == 'raw':
+            where, params = self._range("ts", account, start, end)
+            df = pd.read_sql_query(
+                f"SELECT ts, rate, alert_level, status FROM samples_raw WHERE {where} ORDER BY ts",
+                self._conn, params=params,
+            )
+            df['ts'] = pd.to_datetime(df['ts'], unit='s')
+            return df.set_index('ts')
+
+        if resolution not in TIERS:
+            raise ValueError(f"unknown resolution: {resolution}")
+        where, params = self._range("bucket", account, start, end)
+        df = pd.read_sql_query(
+            f"SELECT bucket AS ts, n, mean, m2, min, max, n_warning, n_critical, n_emergency "
+            f"FROM samples_{resolution} WHERE {where} ORDER BY bucket",
+            self._conn, params=params,
+        )
+        df['std'] = (df.pop('m2') / (df['n'] - 1)).where(df['n'] > 1) ** 0.5
+        df['ts'] = pd.to_datetime(df['ts'], unit='s')
+        return df.set_index('ts')
+
+    def _pick_resolution(self, start: Optional[float]) -> str:
+        if start is None:
+            return 'raw' if self.retention['raw'] is None else '1h'
+        age = self._clock() - start
+        for tier in ('raw', '1m'):
+            keep = self.retention.get(tier)
+            if keep is None or age <= keep:
+                return tier
+        return '1h'
+
+    def count(self, tier: str = 'raw', account: Optional[str] = None) -> int:
+        self.flush()
+        table = 'samples_raw' if tier == 'raw' else f'samples_{tier}'
+        if account is None:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        return self._conn.execute(f"SELECT COUNT(*) FROM {table} WHERE account = ?",
+                                  (account,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+    # ---------- 内部 ----------
+    @staticmethod
+    def _range(column: str, account: str, start, end) -> Tuple[str, list]:
+        clauses, params = ["account = ?"], [account]
+        if start is not None:
+            clauses.append(f"{column} >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append(f"{column} <= ?")
+            params.append(end)
+        return " AND ".join(clauses), params
+
+    @contextmanager
+    def _transaction(self):
+        self._conn.execute("BEGIN")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def _get_meta(self, key: str, default: float) -> float:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def _set_meta(self, key: str, value: float):
+        self._conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
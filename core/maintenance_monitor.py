@@ -1,16 +1,20 @@
-import time
-import json
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import requests
-import pandas as pd
-import numpy as np
-from dataclasses import dataclass
+import time
+from dataclasses import astuple, dataclass, field
+from datetime import datetime
 from enum import Enum
+from typing import Dict, List, Optional
+
+from alerts import Alert, AlertDispatcher, EmailSink, LogSink, build_sinks
+from config_watcher import ConfigWatcher
+from history_store import HistoryStore
+from polling import load_polling_policy
+
+try:
+    from data_connector import ConnectorManager, DataAnalyzer
+except ImportError:
+    # データコネクターが利用できない環境ではモックの維持率で動かす
+    ConnectorManager = DataAnalyzer = None
 
 # ログ設定
 logging.basicConfig(
@@ -70,47 +74,227 @@ class AlertConfig:
                 AlertLevel.EMERGENCY: 5   # 5分
             }
 
+class ThresholdTable:
+    """閾値から作る判定表。閾値が変わらない限り毎回の判定で使い回す"""
+    
+    __slots__ = ('threshold', 'key', 'levels', 'phases', 'achieved')
+    
+    def __init__(self, threshold: MaintenanceThreshold):
+        t = threshold
+        self.threshold = t
+        # 作ったときの閾値の値（フィールドを直接書き換えられたかの判定用）
+        self.key = astuple(t)
+        # 低い水準から順に (上限, レベル, 推奨事項)
+        self.levels = (
+            (t.emergency_threshold, AlertLevel.EMERGENCY, "緊急対応が必要です。即座にポジション調整を検討してください。"),
+            (t.critical_threshold, AlertLevel.CRITICAL, "危険レベルです。ポジションの見直しを強く推奨します。"),
+            (t.warning_threshold, AlertLevel.WARNING, "注意レベルです。ポジション調整を検討してください。"),
+        )
+        # 低い目標から順に (目標, 未達時の改善提案)
+        self.phases = (
+            (t.phase1_target, f"第1段階目標({t.phase1_target}%)達成のため、リスク軽減を優先してください。"),
+            (t.phase2_target, f"第2段階目標({t.phase2_target}%)達成のため、バランス調整を継続してください。"),
+            (t.phase3_target, f"最終目標({t.phase3_target}%)達成のため、微調整を継続してください。"),
+        )
+        self.achieved = "目標達成！現在の水準を維持してください。"
+    
+    def matches(self, threshold: MaintenanceThreshold) -> bool:
+        """threshold から作り直さずに使えるか"""
+        return threshold is self.threshold and astuple(threshold) == self.key
+    
+    def classify(self, rate: float) -> AlertLevel:
+        for limit, level, _ in self.levels:
+            if rate <= limit:
+                return level
+        return AlertLevel.INFO
+    
+    def recommendations(self, rate: float, level: AlertLevel) -> List[str]:
+        out = [rec for _, lv, rec in self.levels if lv is level]
+        for target, rec in self.phases:
+            if rate < target:
+                out.append(rec)
+                break
+        else:
+            out.append(self.achieved)
+        return out
+    
+    def phase_progress(self, rate: float) -> Dict:
+        return {
+            f'phase{i}': {
+                'target': target,
+                'achieved': rate >= target,
+                'progress_percentage': min(100, (rate / target) * 100)
+            }
+            for i, (target, _) in enumerate(self.phases, 1)
+        }
+
+
+@dataclass(slots=True)
+class AnalysisResult:
+    """
+    analyze_maintenance_rate の結果。毎回の監視で作るのは維持率とレベルだけで、
+    改善額・進捗・推奨事項はアラートを組み立てるときなど参照されたときに計算する。
+    analysis['status'] のような辞書形式の参照も従来どおり使える
+    """
+    current_rate: float
+    alert_level: AlertLevel
+    table: ThresholdTable = field(repr=False)
+    
+    _KEYS = ('current_rate', 'target_rate', 'improvement_needed', 'improvement_percentage',
+             'status', 'alert_level', 'phase_progress', 'recommendations')
+    
+    @property
+    def target_rate(self) -> float:
+        return self.table.threshold.target_rate
+    
+    @property
+    def status(self) -> str:
+        return 'GOOD' if self.alert_level is AlertLevel.INFO else self.alert_level.value
+    
+    @property
+    def improvement_needed(self) -> float:
+        return self.target_rate - self.current_rate
+    
+    @property
+    def improvement_percentage(self) -> float:
+        return ((self.target_rate - self.current_rate) / self.current_rate) * 100
+    
+    @property
+    def phase_progress(self) -> Dict:
+        return self.table.phase_progress(self.current_rate)
+    
+    @property
+    def recommendations(self) -> List[str]:
+        return self.table.recommendations(self.current_rate, self.alert_level)
+    
+    def __getitem__(self, key: str):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self._KEYS else default
+    
+    def to_dict(self) -> Dict:
+        """従来の辞書形式"""
+        return {key: getattr(self, key) for key in self._KEYS}
+
 class MaintenanceMonitor:
     """信用維持率監視システム"""
     
-    def __init__(self, config_file: str = "monitor_config.json"):
+    def __init__(self, config_file: str = "monitor_config.json",
+                 history_path: str = "maintenance_history.db", account: str = "default",
+                 connectors: Optional["ConnectorManager"] = None,
+                 history: Optional[HistoryStore] = None, alert_handler=None,
+                 dispatcher: Optional[AlertDispatcher] = None):
         self.config_file = config_file
         self.threshold = MaintenanceThreshold()
         self.alert_config = AlertConfig()
         self.last_alert_time = {}
-        self.history = []
+        # 履歴はメモリに溜めず SQLite に追記する。レポートは今回の監視開始以降が対象
+        self.history = history if history is not None else HistoryStore(history_path)
+        self.account = account
+        self.started_at = time.time()
+        self.sample_count = 0
         self.connector_type = 'mock'
         self.connector_kwargs = {}
+        # 口座ごとのコネクター指定（{'type': ..., 'kwargs': ...}）。設定ファイルより優先し、保存はしない
+        self.connector_override: Optional[Dict] = None
         self.data_analyzer = None
+        # コネクターは毎回作らず使い回す（複数の監視で共有する場合は外から渡す）
+        self._own_connectors = connectors is None
+        self.connectors = connectors
+        if self.connectors is None and ConnectorManager is not None:
+            self.connectors = ConnectorManager()
+        # alert_handler(monitor, analysis, message) を渡すとディスパッチャーの代わりに呼ぶ
+        self.alert_handler = alert_handler
+        # アラートは監視ループで送らず、ディスパッチャーのキューに積む（複数口座で共有可）
+        self._own_dispatcher = dispatcher is None
+        self.dispatcher = dispatcher if dispatcher is not None else AlertDispatcher()
+        self.notifications = {}
+        # 設定ファイルは変更を検知して読み直し、内容が変わったときだけ書く
+        self.config_watcher = ConfigWatcher(config_file)
+        self._extra_config = {}
+        # 適応的な監視間隔（config.yaml の水準別間隔）
+        self.polling = load_polling_policy()
         self.load_config()
+        self.dispatcher.register(self.account, build_sinks(self.alert_config, self.notifications))
         
-    def load_config(self):
-        """設定ファイルの読み込み"""
+    def load_config(self) -> bool:
+        """設定ファイルの読み込み。検証に通らなければ今の設定のまま False を返す"""
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                self.threshold = MaintenanceThreshold(**config.get('threshold', {}))
-                alert_config_data = config.get('alert_config', {})
-                # 開発環境モードの設定を追加
-                if 'development_mode' not in alert_config_data:
-                    alert_config_data['development_mode'] = True
-                self.alert_config = AlertConfig(**alert_config_data)
-                
-                # データコネクター設定の読み込み
-                connector_config = config.get('connector', {})
-                self.connector_type = connector_config.get('type', 'mock')
-                self.connector_kwargs = connector_config.get('kwargs', {})
-                
-            logging.info("設定ファイルを読み込みました")
+            # 検証に通ったときだけ読んだことにする（壊れた内容を後で上書きしない）
+            config = self.config_watcher.read(validate=self.validate_config)
+            threshold, alert_config = self.validate_config(config)
         except FileNotFoundError:
             logging.warning("設定ファイルが見つかりません。デフォルト設定を使用します")
             self.save_config()
+            return False
         except Exception as e:
             logging.error(f"設定ファイルの読み込みエラー: {e}")
+            return False
+        
+        self.threshold = threshold
+        self.alert_config = alert_config
+        
+        # データコネクター設定の読み込み（変わっていれば ConnectorManager が作り直す）
+        connector_config = config.get('connector', {})
+        self.connector_type = connector_config.get('type', 'mock')
+        self.connector_kwargs = connector_config.get('kwargs', {})
+        
+        # Slack / LINE などの通知先
+        self.notifications = config.get('notifications', {})
+        
+        # このクラスが扱わない項目は保存時にそのまま書き戻す
+        known = {'threshold', 'alert_config', 'connector', 'notifications'}
+        self._extra_config = {k: v for k, v in config.items() if k not in known}
+        
+        logging.info("設定ファイルを読み込みました")
+        return True
+    
+    @staticmethod
+    def validate_config(config: Dict):
+        """設定の検証。問題があれば ValueError"""
+        threshold = MaintenanceThreshold(**config.get('threshold', {}))
+        values = vars(threshold)
+        for name, value in values.items():
+            if not isinstance(value, (int, float)) or value <= 0:
+                raise ValueError(f"threshold.{name} は正の数である必要があります: {value!r}")
+        if not (threshold.emergency_threshold <= threshold.critical_threshold
+                <= threshold.warning_threshold):
+            raise ValueError("閾値は emergency <= critical <= warning の順である必要があります")
+        
+        alert_config_data = dict(config.get('alert_config', {}))
+        # 開発環境モードの設定を追加
+        alert_config_data.setdefault('development_mode', True)
+        intervals = alert_config_data.get('alert_intervals')
+        if intervals is not None:
+            # JSON では "WARNING": 30 のように文字列キーで保存している
+            intervals = {AlertLevel(k) if isinstance(k, str) else k: v for k, v in intervals.items()}
+            if any(not isinstance(v, (int, float)) or v < 0 for v in intervals.values()):
+                raise ValueError("alert_intervals は 0 以上の分数である必要があります")
+            alert_config_data['alert_intervals'] = intervals
+        alert_config = AlertConfig(**alert_config_data)
+        
+        connector_type = config.get('connector', {}).get('type', 'mock')
+        if connector_type.lower() not in ('mock', 'api', 'database'):
+            raise ValueError(f"サポートされていないコネクタータイプ: {connector_type}")
+        return threshold, alert_config
+    
+    def reload_config_if_changed(self) -> bool:
+        """設定ファイルが書き換えられていれば読み直して反映する"""
+        if not self.config_watcher.changed():
+            return False
+        if not self.load_config():
+            return False
+        self.dispatcher.register(self.account, build_sinks(self.alert_config, self.notifications))
+        logging.info(f"{self._log_prefix}設定ファイルの変更を反映しました")
+        return True
     
     def save_config(self):
-        """設定ファイルの保存"""
-        config = {
+        """設定ファイルの保存（内容が変わっていなければ書かない）"""
+        config = dict(self._extra_config)
+        config.update({
             'threshold': {
                 'current_rate': self.threshold.current_rate,
                 'target_rate': self.threshold.target_rate,
@@ -134,27 +318,29 @@ class MaintenanceMonitor:
             'connector': {
                 'type': self.connector_type,
                 'kwargs': self.connector_kwargs
-            }
-        }
+            },
+            'notifications': self.notifications
+        })
         
-        with open(self.config_file, 'w', encoding='utf-8') as f:
-            json.dump(config, f, indent=2, ensure_ascii=False)
-        logging.info("設定ファイルを保存しました")
+        if self.config_watcher.write(config):
+            logging.info("設定ファイルを保存しました")
+    
+    def get_connector(self):
+        """設定どおりのデータコネクター（設定が変わったか壊れたときだけ作り直される）"""
+        if self.connectors is None:
+            return None
+        if self.connector_override is not None:
+            connector_type = self.connector_override.get('type', 'mock')
+            connector_kwargs = self.connector_override.get('kwargs', {})
+        else:
+            connector_type, connector_kwargs = self.connector_type, self.connector_kwargs
+        return self.connectors.get(connector_type, connector_kwargs, name=self.account)
     
     def get_current_maintenance_rate(self) -> float:
         """現在の信用維持率を取得（実際のAPIやデータソースから）"""
         # データコネクターを使用して信用維持率を取得
-        try:
-            from data_connector import DataConnectorFactory
-            
-            # 設定に基づいてデータコネクターを作成
-            connector_type = getattr(self, 'connector_type', 'mock')
-            connector_kwargs = getattr(self, 'connector_kwargs', {})
-            
-            connector = DataConnectorFactory.create_connector(connector_type, **connector_kwargs)
-            return connector.get_maintenance_rate()
-            
-        except ImportError:
+        connector = self.get_connector()
+        if connector is None:
             # データコネクターが利用できない場合はモックデータを使用
             import random
             base_rate = 167.0
@@ -162,66 +348,37 @@ class MaintenanceMonitor:
             current_rate = base_rate + variation
             
             return round(current_rate, 2)
-    
-    def analyze_maintenance_rate(self, current_rate: float) -> Dict:
-        """信用維持率の分析"""
-        analysis = {
-            'current_rate': current_rate,
-            'target_rate': self.threshold.target_rate,
-            'improvement_needed': self.threshold.target_rate - current_rate,
-            'improvement_percentage': ((self.threshold.target_rate - current_rate) / current_rate) * 100,
-            'status': 'GOOD',
-            'alert_level': AlertLevel.INFO,
-            'phase_progress': self.get_phase_progress(current_rate),
-            'recommendations': []
-        }
-        
-        # アラートレベルの判定
-        if current_rate <= self.threshold.emergency_threshold:
-            analysis['alert_level'] = AlertLevel.EMERGENCY
-            analysis['status'] = 'EMERGENCY'
-            analysis['recommendations'].append("緊急対応が必要です。即座にポジション調整を検討してください。")
-        elif current_rate <= self.threshold.critical_threshold:
-            analysis['alert_level'] = AlertLevel.CRITICAL
-            analysis['status'] = 'CRITICAL'
-            analysis['recommendations'].append("危険レベルです。ポジションの見直しを強く推奨します。")
-        elif current_rate <= self.threshold.warning_threshold:
-            analysis['alert_level'] = AlertLevel.WARNING
-            analysis['status'] = 'WARNING'
-            analysis['recommendations'].append("注意レベルです。ポジション調整を検討してください。")
-        
-        # 改善提案
-        if current_rate < self.threshold.phase1_target:
-            analysis['recommendations'].append(f"第1段階目標({self.threshold.phase1_target}%)達成のため、リスク軽減を優先してください。")
-        elif current_rate < self.threshold.phase2_target:
-            analysis['recommendations'].append(f"第2段階目標({self.threshold.phase2_target}%)達成のため、バランス調整を継続してください。")
-        elif current_rate < self.threshold.phase3_target:
-            analysis['recommendations'].append(f"最終目標({self.threshold.phase3_target}%)達成のため、微調整を継続してください。")
-        else:
-            analysis['recommendations'].append("目標達成！現在の水準を維持してください。")
         
-        return analysis
+        try:
+            return connector.get_maintenance_rate()
+        except Exception:
+            # 次回は作り直した接続で取り直す
+            self.connectors.invalidate(self.account)
+            raise
+    
+    @property
+    def threshold(self) -> MaintenanceThreshold:
+        return self._threshold
+    
+    @threshold.setter
+    def threshold(self, value: MaintenanceThreshold):
+        self._threshold = value
+        self._table = ThresholdTable(value)
+    
+    def _current_table(self) -> ThresholdTable:
+        """判定表。閾値を差し替えたときも、フィールドを直接書き換えたときも作り直す"""
+        if not self._table.matches(self._threshold):
+            self._table = ThresholdTable(self._threshold)
+        return self._table
+    
+    def analyze_maintenance_rate(self, current_rate: float) -> AnalysisResult:
+        """信用維持率の分析（推奨事項や進捗は参照されたときに組み立てる）"""
+        table = self._current_table()
+        return AnalysisResult(current_rate, table.classify(current_rate), table)
     
     def get_phase_progress(self, current_rate: float) -> Dict:
         """段階的改善の進捗状況"""
-        progress = {
-            'phase1': {
-                'target': self.threshold.phase1_target,
-                'achieved': current_rate >= self.threshold.phase1_target,
-                'progress_percentage': min(100, (current_rate / self.threshold.phase1_target) * 100)
-            },
-            'phase2': {
-                'target': self.threshold.phase2_target,
-                'achieved': current_rate >= self.threshold.phase2_target,
-                'progress_percentage': min(100, (current_rate / self.threshold.phase2_target) * 100)
-            },
-            'phase3': {
-                'target': self.threshold.phase3_target,
-                'achieved': current_rate >= self.threshold.phase3_target,
-                'progress_percentage': min(100, (current_rate / self.threshold.phase3_target) * 100)
-            }
-        }
-        return progress
+        return self._current_table().phase_progress(current_rate)
     
     def should_send_alert(self, alert_level: AlertLevel) -> bool:
         """アラート送信の判定"""
@@ -236,9 +393,9 @@ class MaintenanceMonitor:
         
         return time_diff.total_seconds() >= interval_minutes * 60
     
-    def send_alert(self, analysis: Dict):
+    def send_alert(self, analysis: AnalysisResult):
         """アラート送信"""
-        alert_level = analysis['alert_level']
+        alert_level = analysis.alert_level
         
         if not self.should_send_alert(alert_level):
             return
@@ -247,11 +404,13 @@ class MaintenanceMonitor:
         message = self.create_alert_message(analysis)
         
         # ログ出力
-        logging.warning(f"アラート送信: {alert_level.value} - {message}")
+        logging.warning(f"{self._log_prefix}アラート送信: {alert_level.value} - {message}")
         
-        # メール送信
-        if self.alert_config.email_enabled:
-            self.send_email_alert(analysis, message)
+        # 送信はディスパッチャーのスレッドに任せる（ここでは待たない）
+        if self.alert_handler is not None:
+            self.alert_handler(self, analysis, message)
+        else:
+            self.dispatcher.submit(Alert(self.account, alert_level.value, message))
         
         # アラート時間の更新
         self.last_alert_time[alert_level] = datetime.now()
@@ -288,125 +447,163 @@ class MaintenanceMonitor:
         return message
     
     def send_email_alert(self, analysis: Dict, message: str):
-        """メールアラート送信"""
+        """メールアラート送信（その場で送る。通常は send_alert がディスパッチャー経由で送る）"""
+        subject = f"信用維持率アラート - {analysis['alert_level'].value}"
         try:
             # 開発環境モードの場合はログ出力のみ
             if getattr(self.alert_config, 'development_mode', True):
-                logging.info("=== メールアラート（開発環境） ===")
-                logging.info(f"送信先: {', '.join(self.alert_config.email_recipients)}")
-                logging.info(f"件名: 信用維持率アラート - {analysis['alert_level'].value}")
-                logging.info(f"本文:\n{message}")
-                logging.info("=== メールアラート終了 ===")
+                LogSink(self.alert_config.email_recipients).send(subject, message)
                 return
             
             # 本番環境用：実際のメール送信
-            msg = MIMEMultipart()
-            msg['From'] = self.alert_config.smtp_username
-            msg['To'] = ', '.join(self.alert_config.email_recipients)
-            msg['Subject'] = f"信用維持率アラート - {analysis['alert_level'].value}"
-            
-            msg.attach(MIMEText(message, 'plain', 'utf-8'))
-            
-            server = smtplib.SMTP(self.alert_config.smtp_server, self.alert_config.smtp_port)
-            server.starttls()
-            server.login(self.alert_config.smtp_username, self.alert_config.smtp_password)
-            server.send_message(msg)
-            server.quit()
+            sink = EmailSink(
+                self.alert_config.smtp_server,
+                self.alert_config.smtp_port,
+                sender=self.alert_config.smtp_username or "maintenance-monitor@localhost",
+                recipients=self.alert_config.email_recipients,
+                username=self.alert_config.smtp_username,
+                password=self.alert_config.smtp_password,
+            )
+            try:
+                sink.send(subject, message)
+            finally:
+                sink.close()
             
             logging.info("メールアラートを送信しました")
             
         except Exception as e:
             logging.error(f"メール送信エラー: {e}")
     
-    def generate_report(self) -> str:
-        """監視レポートの生成"""
-        if not self.history:
+    def record_sample(self, current_rate: float, analysis: AnalysisResult, timestamp: Optional[float] = None):
+        """履歴ストアに 1 サンプル追記"""
+        self.history.append(
+            current_rate,
+            analysis.alert_level.value,
+            analysis.status,
+            timestamp=timestamp,
+            account=self.account,
+        )
+        self.sample_count += 1
+
+    def generate_report(self, start: Optional[float] = None, end: Optional[float] = None) -> str:
+        """監視レポートの生成（start / end はエポック秒。省略時は今回の監視開始以降）"""
+        targets = (self.threshold.phase1_target, self.threshold.phase2_target,
+                   self.threshold.phase3_target)
+        stats = self.history.summary(
+            self.account,
+            start=self.started_at if start is None else start,
+            end=end,
+            targets=targets,
+        )
+        if not stats['count']:
             return "監視データがありません"
-        
-        df = pd.DataFrame(self.history)
+        above, levels = stats['above'], stats['levels']
         
         report = f"""
 === 信用維持率監視レポート ===
 生成時刻: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-監視期間: {df['timestamp'].min()} ～ {df['timestamp'].max()}
-データ件数: {len(df)}
+監視期間: {stats['first']} ～ {stats['last']}
+データ件数: {stats['count']}
 
 統計情報:
-- 平均信用維持率: {df['rate'].mean():.2f}%
-- 最高信用維持率: {df['rate'].max():.2f}%
-- 最低信用維持率: {df['rate'].min():.2f}%
-- 標準偏差: {df['rate'].std():.2f}%
+- 平均信用維持率: {stats['mean']:.2f}%
+- 最高信用維持率: {stats['max']:.2f}%
+- 最低信用維持率: {stats['min']:.2f}%
+- 標準偏差: {stats['std']:.2f}%
 
 目標達成状況:
-- 第1段階目標({self.threshold.phase1_target}%)達成回数: {len(df[df['rate'] >= self.threshold.phase1_target])}
-- 第2段階目標({self.threshold.phase2_target}%)達成回数: {len(df[df['rate'] >= self.threshold.phase2_target])}
-- 最終目標({self.threshold.phase3_target}%)達成回数: {len(df[df['rate'] >= self.threshold.phase3_target])}
+- 第1段階目標({self.threshold.phase1_target}%)達成回数: {above[targets[0]]}
+- 第2段階目標({self.threshold.phase2_target}%)達成回数: {above[targets[1]]}
+- 最終目標({self.threshold.phase3_target}%)達成回数: {above[targets[2]]}
 
 アラート統計:
-- 緊急アラート: {len(df[df['alert_level'] == AlertLevel.EMERGENCY.value])}
-- 重要アラート: {len(df[df['alert_level'] == AlertLevel.CRITICAL.value])}
-- 警告アラート: {len(df[df['alert_level'] == AlertLevel.WARNING.value])}
+- 緊急アラート: {levels[AlertLevel.EMERGENCY.value]}
+- 重要アラート: {levels[AlertLevel.CRITICAL.value]}
+- 警告アラート: {levels[AlertLevel.WARNING.value]}
 """
         
         return report
     
-    def monitor(self, interval_seconds: int = 300):
-        """監視の開始"""
+    @property
+    def _log_prefix(self) -> str:
+        return "" if self.account == "default" else f"[{self.account}] "
+    
+    def poll_once(self) -> AnalysisResult:
+        """1 回分の監視（取得・分析・記録・アラート）。分析結果を返す"""
+        # 設定ファイルが書き換えられていれば、この回から新しい閾値・接続先を使う
+        self.reload_config_if_changed()
+        
+        # 現在の信用維持率を取得
+        current_rate = self.get_current_maintenance_rate()
+        
+        # 分析実行
+        analysis = self.analyze_maintenance_rate(current_rate)
+        
+        # データアナライザーにデータポイントを追加（維持率の取得と同じコネクターを使う）
+        connector = self.get_connector()
+        if connector is not None:
+            if self.data_analyzer is None:
+                self.data_analyzer = DataAnalyzer(connector)
+            self.data_analyzer.connector = connector
+            self.data_analyzer.add_data_point(current_rate)
+        
+        # 履歴に追加
+        self.record_sample(current_rate, analysis)
+        
+        # ログ出力
+        logging.info(f"{self._log_prefix}信用維持率: {current_rate}% (ステータス: {analysis.status})")
+        
+        # データアナライザーからの追加情報をログ出力
+        if self.data_analyzer:
+            trend_analysis = self.data_analyzer.analyze_trend()
+            if trend_analysis['trend'] != 'INSUFFICIENT_DATA':
+                logging.info(f"{self._log_prefix}トレンド: {trend_analysis['trend']} (信頼度: {trend_analysis['confidence']:.2f})")
+            
+            prediction = self.data_analyzer.predict_next_rate(current_rate=current_rate)
+            if prediction['predicted_rate']:
+                logging.info(f"{self._log_prefix}1時間後予測: {prediction['predicted_rate']}% (信頼度: {prediction['confidence']:.2f})")
+        
+        # アラート判定・送信
+        if analysis.alert_level is not AlertLevel.INFO:
+            self.send_alert(analysis)
+        
+        # 設定ファイルの保存（定期的に）
+        if self.sample_count % 10 == 0:
+            self.save_config()
+        
+        return analysis
+    
+    def next_poll_interval(self, analysis: AnalysisResult, previous: Optional[float] = None) -> float:
+        """アラートレベルとトレンド・ボラティリティから次の監視までの秒数を決める"""
+        slope = volatility = 0.0
+        if self.data_analyzer:
+            slope = self.data_analyzer.analyze_trend()['slope']
+            volatility = self.data_analyzer.get_volatility()
+        return self.polling.next_interval(
+            analysis.current_rate,
+            alert_level=analysis.alert_level.value,
+            slope=slope,
+            volatility=volatility,
+            critical_threshold=self.threshold.critical_threshold,
+            previous=previous,
+        )
+    
+    def monitor(self, interval_seconds: int = 300, adaptive: bool = False):
+        """監視の開始（adaptive=True なら interval_seconds は初回だけ使い、以後は状況に応じて変える）"""
         logging.info("信用維持率監視を開始しました")
         logging.info(f"現在の信用維持率: {self.threshold.current_rate}%")
         logging.info(f"目標信用維持率: {self.threshold.target_rate}%")
         
         try:
+            interval = interval_seconds
             while True:
-                # 現在の信用維持率を取得
-                current_rate = self.get_current_maintenance_rate()
-                
-                # 分析実行
-                analysis = self.analyze_maintenance_rate(current_rate)
-                
-                # データアナライザーにデータポイントを追加
-                if self.data_analyzer is None:
-                    try:
-                        from data_connector import DataAnalyzer, DataConnectorFactory
-                        connector = DataConnectorFactory.create_connector(self.connector_type, **self.connector_kwargs)
-                        self.data_analyzer = DataAnalyzer(connector)
-                    except ImportError:
-                        pass
-                
-                if self.data_analyzer:
-                    self.data_analyzer.add_data_point(current_rate)
-                
-                # 履歴に追加
-                self.history.append({
-                    'timestamp': datetime.now().isoformat(),
-                    'rate': current_rate,
-                    'alert_level': analysis['alert_level'].value,
-                    'status': analysis['status']
-                })
-                
-                # ログ出力
-                logging.info(f"信用維持率: {current_rate}% (ステータス: {analysis['status']})")
-                
-                # データアナライザーからの追加情報をログ出力
-                if self.data_analyzer:
-                    trend_analysis = self.data_analyzer.analyze_trend()
-                    if trend_analysis['trend'] != 'INSUFFICIENT_DATA':
-                        logging.info(f"トレンド: {trend_analysis['trend']} (信頼度: {trend_analysis['confidence']:.2f})")
-                    
-                    prediction = self.data_analyzer.predict_next_rate()
-                    if prediction['predicted_rate']:
-                        logging.info(f"1時間後予測: {prediction['predicted_rate']}% (信頼度: {prediction['confidence']:.2f})")
-                
-                # アラート判定・送信
-                if analysis['alert_level'] != AlertLevel.INFO:
-                    self.send_alert(analysis)
-                
-                # 設定ファイルの保存（定期的に）
-                if len(self.history) % 10 == 0:
-                    self.save_config()
+                analysis = self.poll_once()
                 
                 # 待機
-                time.sleep(interval_seconds)
+                if adaptive:
+                    interval = self.next_poll_interval(analysis, previous=interval)
+                    logging.info(f"次回の監視まで {interval:.0f} 秒")
+                time.sleep(interval)
                 
         except KeyboardInterrupt:
             logging.info("監視を停止しました")
@@ -414,6 +611,13 @@ class MaintenanceMonitor:
         except Exception as e:
             logging.error(f"監視エラー: {e}")
             raise
+        finally:
+            self.history.flush()
+            # 外から渡されたもの（MonitorScheduler で共有など）は渡した側が閉じる
+            if self._own_connectors and self.connectors is not None:
+                self.connectors.close()
+            if self._own_dispatcher:
+                self.dispatcher.close()
     
     def generate_final_report(self):
         """最終レポートの生成"""
@@ -439,8 +643,8 @@ def main():
     print(f"第3段階目標: {monitor.threshold.phase3_target}%")
     print()
     
-    # 監視開始
-    monitor.monitor()
+    # 監視開始（維持率の水準に応じて間隔を変える）
+    monitor.monitor(adaptive=True)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,183 @@
+import asyncio
+import json
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from alerts import AlertDispatcher
+from data_connector import ConnectorManager
+from history_store import HistoryStore
+from maintenance_monitor import MaintenanceMonitor
+
+
+@dataclass
+class AccountSpec:
+    """監視する口座 1 件分の設定"""
+    name: str
+    config_file: str = "monitor_config.json"
+    interval_seconds: float = 300.0
+    # True なら interval_seconds は初回と失敗時だけ使い、以後は維持率とトレンドで決める
+    adaptive: bool = False
+    # 指定すると config_file のコネクター設定より優先する
+    connector: Optional[Dict[str, Any]] = None
+
+
+@dataclass
+class AccountState:
+    """口座ごとの実行状況"""
+    polls: int = 0
+    errors: int = 0
+    timeouts: int = 0
+    skipped: int = 0
+    last_duration: Optional[float] = None
+    last_error: Optional[str] = None
+    interval: Optional[float] = None
+    in_flight: Optional[Future] = field(default=None, repr=False)
+
+
+class MonitorScheduler:
+    """
+    複数口座の MaintenanceMonitor を 1 つのイベントループで回す
+
+    ・口座ごとに独立したタスクが interval_seconds 間隔（開始時刻基準でずれない）で
+      poll_once をスレッドプール上で実行する。遅い証券会社 API は 1 スレッドを
+      占有するだけで、他の口座の監視は待たされない
+    ・poll_timeout 秒を超えた回は打ち切り扱いにし、まだ終わっていなければ次の回は飛ばす
+      （同じ口座の取得を重ねて走らせない）
+    ・履歴ストア・コネクター管理・アラート送信は全口座で共有する
+    """
+
+    def __init__(self, history: Optional[HistoryStore] = None,
+                 connectors: Optional[ConnectorManager] = None,
+                 dispatcher: Optional[AlertDispatcher] = None, alert_handler=None,
+                 max_workers: int = 32, poll_timeout: float = 60.0):
+        self.history = history if history is not None else HistoryStore()
+        self.connectors = connectors if connectors is not None else ConnectorManager()
+        self.dispatcher = dispatcher if dispatcher is not None else AlertDispatcher()
+        self.alert_handler = alert_handler
+        self.poll_timeout = poll_timeout
+        self.monitors: Dict[str, MaintenanceMonitor] = {}
+        self.intervals: Dict[str, float] = {}
+        self.adaptive: Dict[str, bool] = {}
+        self.states: Dict[str, AccountState] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='monitor')
+        self._stop: Optional[asyncio.Event] = None
+
+    def add_account(self, spec: AccountSpec) -> MaintenanceMonitor:
+        """口座を追加する（run の前に呼ぶ）"""
+        if spec.name in self.monitors:
+            raise ValueError(f"口座が重複しています: {spec.name}")
+        monitor = MaintenanceMonitor(
+            config_file=spec.config_file,
+            account=spec.name,
+            connectors=self.connectors,
+            history=self.history,
+            alert_handler=self.alert_handler,
+            dispatcher=self.dispatcher,
+        )
+        # 共有の設定ファイルに書き戻されないよう、口座ごとの指定は上書き用の欄に持つ
+        monitor.connector_override = spec.connector
+        self.monitors[spec.name] = monitor
+        self.intervals[spec.name] = spec.interval_seconds
+        self.adaptive[spec.name] = spec.adaptive
+        self.states[spec.name] = AccountState()
+        return monitor
+
+    # ---------- 実行 ----------
+    async def run(self):
+        """stop() が呼ばれるまで全口座を監視する"""
+        self._stop = asyncio.Event()
+        logging.info(f"{len(self.monitors)} 口座の監視を開始しました")
+        try:
+            await asyncio.gather(*(self._run_account(name) for name in self.monitors))
+        finally:
+            self.history.flush()
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop.set()
+
+    async def _run_account(self, name: str):
+        loop = asyncio.get_running_loop()
+        monitor = self.monitors[name]
+        interval = self.intervals[name]
+        next_at = loop.time()
+        while not self._stop.is_set():
+            analysis = await self.poll(name)
+            if self.adaptive[name]:
+                if analysis is not None:
+                    interval = monitor.next_poll_interval(analysis, previous=interval)
+                else:
+                    interval = self.intervals[name]
+                self.states[name].interval = interval
+            next_at += interval
+            # 取得が長引いて予定を過ぎた分は詰めずに次の予定へ
+            while next_at <= loop.time():
+                next_at += interval
+            try:
+                await asyncio.wait_for(self._stop.wait(), timeout=next_at - loop.time())
+            except asyncio.TimeoutError:
+                pass
+
+    async def poll(self, name: str) -> Optional[Dict]:
+        """name の口座を 1 回監視する。失敗・打ち切り・前回が未完了なら None"""
+        state = self.states[name]
+        if state.in_flight is not None and not state.in_flight.done():
+            state.skipped += 1
+            logging.warning(f"[{name}] 前回の監視がまだ終わっていないため今回は飛ばします")
+            return None
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        future = self._executor.submit(self.monitors[name].poll_once)
+        state.in_flight = future
+        try:
+            analysis = await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)), timeout=self.poll_timeout
+            )
+        except asyncio.TimeoutError:
+            state.timeouts += 1
+            logging.error(f"[{name}] 監視が {self.poll_timeout} 秒以内に終わりませんでした")
+            return None
+        except Exception as e:
+            state.errors += 1
+            state.last_error = str(e)
+            logging.error(f"[{name}] 監視エラー: {e}")
+            return None
+        finally:
+            state.last_duration = loop.time() - started
+        state.polls += 1
+        return analysis
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.dispatcher.close()
+        self.history.close()
+        self.connectors.close()
+
+
+def load_accounts(path: str = "monitor_accounts.json") -> List[AccountSpec]:
+    """
+    口座一覧の読み込み
+    [{"name": "acct1", "config_file": "...", "interval_seconds": 60}, ...]
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        return [AccountSpec(**entry) for entry in json.load(f)]
+
+
+def main():
+    """メイン実行関数"""
+    scheduler = MonitorScheduler()
+    for spec in load_accounts():
+        scheduler.add_account(spec)
+    try:
+        asyncio.run(scheduler.run())
+    except KeyboardInterrupt:
+        logging.info("監視を停止しました")
+    finally:
+        scheduler.close()
+
+
+if __name__ == "__main__":
+    main()
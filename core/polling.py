@@ -0,0 +1,111 @@
+import math
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+# config.yaml の場所（環境変数で上書き可）
+CONFIG_PATH = os.getenv("DESKTOP_TUTORIAL_CONFIG", "config.yaml")
+
+# config.yaml の maintenance_levels / monitoring_intervals と同じ既定値（高い水準から順に）
+DEFAULT_LEVELS = {
+    'excellent': 190.0,
+    'good': 180.0,
+    'warning': 170.0,
+    'danger': 150.0,
+    'critical': 100.0,
+}
+DEFAULT_INTERVALS = {
+    'excellent': 1800.0,
+    'good': 900.0,
+    'warning': 300.0,
+    'danger': 60.0,
+    'critical': 30.0,
+}
+
+# MaintenanceMonitor のアラートレベル → その間隔を上限にする水準
+_ALERT_BANDS = {
+    'WARNING': 'warning',
+    'CRITICAL': 'danger',
+    'EMERGENCY': 'critical',
+}
+
+
+@dataclass
+class AdaptivePollingPolicy:
+    """
+    次の監視までの間隔を維持率・アラートレベル・トレンドから決める
+
+    1. 維持率が属する水準（maintenance_levels）の間隔が基本
+    2. アラートレベルが高ければ、その水準の間隔まで縮める
+    3. 下落トレンドなら、危険水準（critical_threshold）に届くまでの予想時間の
+       1/safety 以内に再確認する。直近の標準偏差の z 倍は余裕として先に差し引く
+    4. 縮めるのは即座に、広げるのは前回の growth 倍までにする（急な緩みを防ぐ）
+    """
+    levels: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_LEVELS))
+    intervals: Dict[str, float] = field(default_factory=lambda: dict(DEFAULT_INTERVALS))
+    min_interval: float = 5.0
+    safety: float = 4.0
+    z: float = 2.0
+    growth: float = 2.0
+
+    def band(self, rate: float) -> str:
+        """rate が属する水準名。最低水準を下回っても最も低い水準を返す"""
+        ordered = sorted(self.levels.items(), key=lambda kv: kv[1], reverse=True)
+        for name, floor in ordered:
+            if rate >= floor:
+                return name
+        return ordered[-1][0]
+
+    def time_to_breach(self, rate: float, threshold: float, slope: float,
+                       volatility: float = 0.0) -> float:
+        """
+        slope（1 時間あたり）のまま下がり続けたとき threshold に届くまでの秒数。
+        すでに余裕（z × volatility）が無ければ 0、下落していなければ inf
+        """
+        margin = rate - threshold - self.z * volatility
+        if margin <= 0:
+            return 0.0
+        if slope >= 0:
+            return math.inf
+        return margin / -slope * 3600
+
+    def next_interval(self, rate: float, alert_level: Optional[str] = None,
+                      slope: float = 0.0, volatility: float = 0.0,
+                      critical_threshold: Optional[float] = None,
+                      previous: Optional[float] = None) -> float:
+        """次の監視までの秒数"""
+        interval = self.intervals[self.band(rate)]
+
+        band = _ALERT_BANDS.get(alert_level)
+        if band in self.intervals:
+            interval = min(interval, self.intervals[band])
+
+        if critical_threshold is not None:
+            breach = self.time_to_breach(rate, critical_threshold, slope, volatility)
+            interval = min(interval, breach / self.safety)
+
+        if previous is not None:
+            interval = min(interval, previous * self.growth)
+        return max(self.min_interval, interval)
+
+
+def load_polling_policy(path: Optional[str] = None) -> AdaptivePollingPolicy:
+    """config.yaml の maintenance_levels / monitoring_intervals を読む。無ければ既定値"""
+    try:
+        import yaml
+
+        with open(path or CONFIG_PATH, 'r', encoding='utf-8') as f:
+            config = yaml.safe_load(f) or {}
+    except (ImportError, OSError):
+        return AdaptivePollingPolicy()
+
+    levels = {k: float(v) for k, v in (config.get('maintenance_levels') or {}).items()}
+    intervals = {k: float(v) for k, v in (config.get('monitoring_intervals') or {}).items()}
+    # 片方にしか無い水準は使えないので、両方に揃っているものだけ採用する
+    common = set(levels) & set(intervals)
+    if not common:
+        return AdaptivePollingPolicy()
+    return AdaptivePollingPolicy(
+        levels={k: levels[k] for k in common},
+        intervals={k: intervals[k] for k in common},
+    )
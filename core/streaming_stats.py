@@ -0,0 +1,125 @@
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+
+class StreamingWindowStats:
+    """
+    時間窓付きの逐次統計（回帰の傾き・R²・標準偏差）
+
+    サンプルの追加・期限切れの削除はどちらも O(1)。
+    Σx, Σy, Σxy, Σx² をそのまま持つと桁落ちするので、
+    平均と偏差積和（Welford 法とその逆操作）で同じ量を保持する。
+    x は最初のサンプルからの経過時間（時間単位）。
+    """
+
+    def __init__(self, window_seconds: float, max_points: Optional[int] = None):
+        self.window_seconds = window_seconds
+        self.max_points = max_points
+        self._buf: Deque[Tuple[float, float]] = deque()  # (x[時間], y)
+        self._origin: Optional[float] = None  # x=0 のエポック秒
+        self._removed = 0  # 前回の再計算以降に取り除いた件数
+        self._reset()
+
+    def _reset(self):
+        self.n = 0
+        self._mean_x = 0.0
+        self._mean_y = 0.0
+        self._m2x = 0.0  # Σ(x - x̄)²
+        self._m2y = 0.0  # Σ(y - ȳ)²
+        self._cxy = 0.0  # Σ(x - x̄)(y - ȳ)
+
+    def __len__(self) -> int:
+        return self.n
+
+    def add(self, timestamp: float, value: float):
+        """サンプルを追加（timestamp はエポック秒、昇順）し、窓から外れた分を落とす"""
+        if self._origin is None:
+            self._origin = timestamp
+        x = (timestamp - self._origin) / 3600
+        self._buf.append((x, value))
+
+        self.n += 1
+        dx = x - self._mean_x
+        self._mean_x += dx / self.n
+        dy = value - self._mean_y
+        self._mean_y += dy / self.n
+        self._m2x += dx * (x - self._mean_x)
+        self._m2y += dy * (value - self._mean_y)
+        self._cxy += dx * (value - self._mean_y)
+
+        self.expire(timestamp)
+
+    def expire(self, now: float):
+        """now - window_seconds 以前のサンプルと、max_points を超えた古い分を取り除く"""
+        if self._origin is None:
+            return
+        cutoff = (now - self.window_seconds - self._origin) / 3600
+        while self._buf and self._buf[0][0] <= cutoff:
+            self._remove(*self._buf.popleft())
+        if self.max_points is not None:
+            while len(self._buf) > self.max_points:
+                self._remove(*self._buf.popleft())
+
+        # 逆操作を重ねた誤差が溜まらないよう、窓 1 周分ごとに計算し直す（償却 O(1)）
+        if self._removed > max(len(self._buf), 64):
+            self._recompute()
+
+    def _remove(self, x: float, y: float):
+        self._removed += 1
+        if self.n <= 1:
+            self._reset()
+            return
+        n = self.n - 1
+        mean_x = (self.n * self._mean_x - x) / n
+        mean_y = (self.n * self._mean_y - y) / n
+        self._m2x -= (x - mean_x) * (x - self._mean_x)
+        self._m2y -= (y - mean_y) * (y - self._mean_y)
+        self._cxy -= (x - mean_x) * (y - self._mean_y)
+        self.n, self._mean_x, self._mean_y = n, mean_x, mean_y
+
+    def _recompute(self):
+        buf = self._buf
+        self._reset()
+        self._removed = 0
+        if not buf:
+            return
+        n = len(buf)
+        mean_x = sum(x for x, _ in buf) / n
+        mean_y = sum(y for _, y in buf) / n
+        self.n, self._mean_x, self._mean_y = n, mean_x, mean_y
+        for x, y in buf:
+            self._m2x += (x - mean_x) ** 2
+            self._m2y += (y - mean_y) ** 2
+            self._cxy += (x - mean_x) * (y - mean_y)
+
+    # ---------- 統計量 ----------
+    @property
+    def slope(self) -> float:
+        """1 時間あたりの変化量"""
+        return self._cxy / self._m2x if self._m2x > 0 else 0.0
+
+    @property
+    def r_squared(self) -> float:
+        if self._m2x <= 0 or self._m2y <= 0:
+            return 0.0
+        return min(1.0, self._cxy * self._cxy / (self._m2x * self._m2y))
+
+    @property
+    def volatility(self) -> float:
+        """母標準偏差"""
+        return (max(self._m2y, 0.0) / self.n) ** 0.5 if self.n else 0.0
+
+    @property
+    def mean(self) -> float:
+        return self._mean_y
+
+    def snapshot(self) -> Optional[Dict[str, float]]:
+        """DataAnalyzer._window_stats と同じ形。2 点未満なら None"""
+        if self.n < 2:
+            return None
+        return {
+            'slope': self.slope,
+            'r_squared': self.r_squared,
+            'volatility': self.volatility,
+            'data_points': self.n,
+        }
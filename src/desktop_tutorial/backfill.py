@@ -0,0 +1,295 @@
+# src/desktop_tutorial/backfill.py
+"""
+銘柄リスト × 期間の過去バーを系列ストアへまとめて取り込む。
+
+    python -m desktop_tutorial.backfill AAPL MSFT --start 2015-01-01 --end 2024-12-31
+
+・cache.missing で未取得の範囲だけを chunk_days 日ごとのチャンクに分ける
+・取得（I/O 待ち）はスレッドプール、正規化と parquet への書き込み（CPU）はプロセスプール
+・同じ銘柄のマージは 1 つずつ順に行う（系列ファイルの読み→書きが重ならないように）
+・取得済み範囲はチャンクごとに記録されるので、途中で落ちても再実行すれば残りから続く
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from collections.abc import Callable, Iterable
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import pandas as pd
+
+from desktop_tutorial import cache
+from desktop_tutorial.providers.yahoo import normalize_columns
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """取得 1 回分（両端を含む）"""
+
+    symbol: str
+    start: pd.Timestamp
+    end: pd.Timestamp
+
+
+def plan(
+    symbols: Iterable[str],
+    *,
+    start,
+    end,
+    freq: str = "1d",
+    chunk_days: int = 365,
+) -> list[Chunk]:
+    """[start, end] のうち系列ストアに無い範囲を、銘柄ごと・古い順のチャンクに分ける"""
+    width = pd.Timedelta(days=chunk_days)
+    step = cache._step(freq)
+    chunks: list[Chunk] = []
+    for symbol in dict.fromkeys(symbols):
+        for gap_start, gap_end in cache.missing(symbol, start=start, end=end, freq=freq):
+            lo = gap_start
+            while lo <= gap_end:
+                hi = min(lo + width - step, gap_end)
+                chunks.append(Chunk(symbol, lo, hi))
+                lo = hi + step
+    return chunks
+
+
+@dataclass
+class Progress:
+    """進み具合と処理速度"""
+
+    total: int
+    done: int = 0
+    failed: int = 0
+    rows: int = 0
+    errors: list[tuple[Chunk, str]] = field(default_factory=list)
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def chunks_per_sec(self) -> float:
+        return (self.done + self.failed) / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def line(self) -> str:
+        return (
+            f"{self.done + self.failed}/{self.total} chunks"
+            f" ({self.failed} failed), {self.rows} rows,"
+            f" {self.chunks_per_sec:.1f} chunks/s, {self.rows_per_sec:.0f} rows/s"
+        )
+
+
+# ---------- 子プロセス側 ----------
+def _init_worker(cache_dir: str) -> None:
+    # 親がテストなどで差し替えた保存先を引き継ぐ
+    cache._CACHEDIR = Path(cache_dir)
+
+
+def _store_chunk(
+    raw: pd.DataFrame | None, chunk: Chunk, freq: str, settled
+) -> int:
+    """
+    正規化して系列ストアへマージし、書いた行数を返す。
+    行が無くても確定済みの範囲（上場前・休場日だけの範囲など）は取得済みとして記録する。
+    まだ確定していない範囲が空なら ValueError（次回の plan に残す）
+    """
+    df = pd.DataFrame() if raw is None else normalize_columns(raw).dropna(how="all")
+    if df.empty and settled is not None and chunk.start > pd.Timestamp(settled):
+        raise ValueError(f"{chunk.symbol} {chunk.start:%Y-%m-%d}..{chunk.end:%Y-%m-%d}: not settled")
+    cache.merge(
+        df, symbol=chunk.symbol, start=chunk.start, end=chunk.end, freq=freq,
+        settled=settled, confirmed_empty=True,
+    )
+    return len(df)
+
+
+class Backfill:
+    """
+    provider は download(symbol, start=, end=, freq=) で生の取得結果を返すもの
+    （YahooProvider など）。cpu_workers=0 なら正規化・保存を呼び出し元のプロセスで行う
+    """
+
+    def __init__(
+        self,
+        provider,
+        *,
+        freq: str = "1d",
+        chunk_days: int = 365,
+        io_workers: int = 8,
+        cpu_workers: int | None = None,
+        on_progress: Callable[[Progress], None] | None = None,
+    ):
+        self.provider = provider
+        self.freq = freq
+        self.chunk_days = chunk_days
+        self.io_workers = io_workers
+        self.cpu_workers = (os.cpu_count() or 1) if cpu_workers is None else cpu_workers
+        self.on_progress = on_progress
+
+    def _settled(self):
+        freshness = getattr(self.provider, "freshness", None)
+        return freshness.settled_until(self.freq) if freshness is not None else None
+
+    def _fetch(self, chunk: Chunk) -> pd.DataFrame | None:
+        return self.provider.download(
+            chunk.symbol,
+            start=chunk.start.date(),
+            end=chunk.end.date(),
+            freq=self.freq,
+        )
+
+    def run(self, symbols: Iterable[str], *, start, end) -> Progress:
+        chunks = plan(
+            symbols, start=start, end=end, freq=self.freq, chunk_days=self.chunk_days
+        )
+        progress = Progress(total=len(chunks))
+        if not chunks:
+            return progress
+
+        settled = self._settled()
+        todo = deque(chunks)
+        # 取得は先行させすぎない（取得済みで保存待ちの生データがメモリに溜まるため）
+        max_fetching = self.io_workers * 2
+        fetching: dict[Future, Chunk] = {}
+        storing: dict[Future, Chunk] = {}
+        waiting: dict[str, deque] = {}  # 同じ銘柄の保存待ち
+        busy: set[str] = set()
+
+        io = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="backfill")
+        cpu = (
+            ProcessPoolExecutor(
+                max_workers=self.cpu_workers,
+                initializer=_init_worker,
+                initargs=(str(cache._CACHEDIR),),
+            )
+            if self.cpu_workers > 0
+            else None
+        )
+
+        def store(chunk: Chunk, raw) -> None:
+            busy.add(chunk.symbol)
+            if cpu is None:
+                future: Future = Future()
+                try:
+                    future.set_result(_store_chunk(raw, chunk, self.freq, settled))
+                except Exception as e:
+                    future.set_exception(e)
+            else:
+                future = cpu.submit(_store_chunk, raw, chunk, self.freq, settled)
+            storing[future] = chunk
+
+        def report(chunk: Chunk, error: BaseException | None, rows: int = 0) -> None:
+            if error is None:
+                progress.done += 1
+                progress.rows += rows
+            else:
+                progress.failed += 1
+                progress.errors.append((chunk, f"{type(error).__name__}: {error}"))
+            if self.on_progress is not None:
+                self.on_progress(progress)
+
+        try:
+            while todo or fetching or storing:
+                held = len(fetching) + sum(map(len, waiting.values()))
+                while todo and held < max_fetching:
+                    held += 1
+                    chunk = todo.popleft()
+                    fetching[io.submit(self._fetch, chunk)] = chunk
+
+                finished, _ = wait([*fetching, *storing], return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future in fetching:
+                        chunk = fetching.pop(future)
+                        error = future.exception()
+                        if error is not None:
+                            report(chunk, error)  # 取得済み範囲に残らないので次回また取る
+                        elif chunk.symbol in busy:
+                            waiting.setdefault(chunk.symbol, deque()).append(
+                                (chunk, future.result())
+                            )
+                        else:
+                            store(chunk, future.result())
+                    else:
+                        chunk = storing.pop(future)
+                        busy.discard(chunk.symbol)
+                        if cpu is not None:
+                            cache.forget(chunk.symbol, freq=self.freq)
+                        error = future.exception()
+                        report(chunk, error, 0 if error else future.result())
+                        queued = waiting.get(chunk.symbol)
+                        if queued:
+                            store(*queued.popleft())
+        finally:
+            io.shutdown(wait=True, cancel_futures=True)
+            if cpu is not None:
+                cpu.shutdown(wait=True, cancel_futures=True)
+        return progress
+
+
+def _read_symbols(args: argparse.Namespace) -> list[str]:
+    symbols = list(args.symbols)
+    if args.symbols_file:
+        text = Path(args.symbols_file).read_text(encoding="utf-8")
+        symbols += [line.strip() for line in text.splitlines() if line.strip()]
+    return symbols
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m desktop_tutorial.backfill",
+        description="過去バーを系列ストアへまとめて取り込む（再実行すると続きから）",
+    )
+    parser.add_argument("symbols", nargs="*", help="銘柄コード")
+    parser.add_argument("--symbols-file", help="1 行 1 銘柄のファイル")
+    parser.add_argument("--start", required=True, type=pd.Timestamp)
+    parser.add_argument("--end", default=None, type=pd.Timestamp, help="省略時は今日")
+    parser.add_argument("--freq", default="1d")
+    parser.add_argument("--chunk-days", type=int, default=365)
+    parser.add_argument("--io-workers", type=int, default=8)
+    parser.add_argument("--cpu-workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    symbols = _read_symbols(args)
+    if not symbols:
+        parser.error("no symbols given")
+    end = args.end if args.end is not None else pd.Timestamp.today().normalize()
+
+    from desktop_tutorial.providers.yahoo import YahooProvider
+
+    def show(progress: Progress) -> None:
+        print(f"\r{progress.line()}", end="", file=sys.stderr, flush=True)
+
+    backfill = Backfill(
+        YahooProvider(),
+        freq=args.freq,
+        chunk_days=args.chunk_days,
+        io_workers=args.io_workers,
+        cpu_workers=args.cpu_workers,
+        on_progress=show,
+    )
+    progress = backfill.run(symbols, start=args.start, end=end)
+    print(f"\r{progress.line()} in {progress.elapsed:.1f}s", file=sys.stderr)
+    for chunk, error in progress.errors:
+        print(f"  {chunk.symbol} {chunk.start.date()}..{chunk.end.date()}: {error}", file=sys.stderr)
+    return 1 if progress.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,16 +6,28 @@ import datetime as _dt
 import hashlib
 import json
 import os
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
 from datetime import datetime
 from pathlib import Path
 
 import pandas as pd
 
+from desktop_tutorial import codecs
+
 # --------------------------------------------------
 # 設定
 # --------------------------------------------------
 # 環境変数で上書き可能にしておくとテストが楽
 _CACHEDIR = Path(os.getenv("DESKTOP_TUTORIAL_CACHE_DIR", ".cache"))
+# メモリ層の上限（件数・バイト数）。0 でメモリ層を無効化
+_MEM_MAX_ENTRIES = int(os.getenv("DESKTOP_TUTORIAL_CACHE_MEM_ENTRIES", "128"))
+_MEM_MAX_BYTES = int(os.getenv("DESKTOP_TUTORIAL_CACHE_MEM_BYTES", str(256 * 1024**2)))
+# parquet の行グループ・feather のレコードバッチの行数。
+# iter_batches はこの単位で読むので、メモリの上限もこれで決まる
+_ROW_GROUP_ROWS = 65_536
 
 
 # --------------------------------------------------
@@ -40,9 +52,205 @@ def _fmt_date(ts) -> str:
     return str(ts)
 
 
+# メタデータ（<file>.json のサイドカー）
+def _now_iso() -> str:
+    return pd.Timestamp.now(tz="UTC").isoformat()
+
+
+def _meta_path(path: Path) -> Path:
+    return path.with_name(path.name + ".json")
+
+
+def _load_meta(path: Path) -> dict:
+    try:
+        return json.loads(_meta_path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+
+
+def _tmp_path(path: Path) -> Path:
+    """同時に書くスレッド・プロセス同士がぶつからない一時ファイル名"""
+    return path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def _save_meta(path: Path, meta: dict) -> None:
+    meta_path = _meta_path(path)
+    tmp = _tmp_path(meta_path)
+    tmp.write_text(json.dumps(meta), encoding="utf-8")
+    os.replace(tmp, meta_path)
+
+
+# --------------------------------------------------
+# メモリ層（プロセス内 LRU）
+# --------------------------------------------------
+class _MemoryTier:
+    """
+    ファイルパス → DataFrame の LRU。件数とバイト数の両方で上限を掛ける。
+    監視ループが同じ銘柄を毎サイクル読むので、parquet のデコードを省く。
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._items: OrderedDict[str, tuple[pd.DataFrame, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> pd.DataFrame | None:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            self._pop(key)
+            if self.max_entries <= 0 or size > self.max_bytes:
+                return  # 上限を超える 1 件は載せない
+            self._items[key] = (df, size)
+            self._bytes += size
+            while len(self._items) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._items),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _pop(self, key: str) -> None:
+        item = self._items.pop(key, None)
+        if item is not None:
+            self._bytes -= item[1]
+
+
+_MEMORY = _MemoryTier(_MEM_MAX_ENTRIES, _MEM_MAX_BYTES)
+
+
+def memory_stats() -> dict[str, int]:
+    """メモリ層の件数・バイト数・ヒット／ミス／追い出し回数"""
+    return _MEMORY.stats()
+
+
+def clear_memory() -> None:
+    """メモリ層を空にし、カウンターもリセットする"""
+    _MEMORY.clear()
+
+
+def configure_memory(*, max_entries: int | None = None, max_bytes: int | None = None) -> None:
+    """メモリ層の上限を変更する（既存の内容は破棄）"""
+    if max_entries is not None:
+        _MEMORY.max_entries = max_entries
+    if max_bytes is not None:
+        _MEMORY.max_bytes = max_bytes
+    _MEMORY.clear()
+
+
 # --------------------------------------------------
 # write / read
 # --------------------------------------------------
+# fmt="auto" … 既存のファイルがあればその形式（旧形式のファイルも読める）、無ければ既定の形式
+AUTO = "auto"
+
+
+def _check_fmt(fmt: str) -> None:
+    if fmt != AUTO:
+        codecs.get(fmt)
+
+
+def _resolve(make_path: Callable[[str], Path], fmt: str) -> tuple[Path, str]:
+    """
+    (パス, 形式) を決める。fmt="auto" なら既定 → ほかの使える形式の順に
+    既存のファイルを探し、どれも無ければ既定の形式で新しく作る
+    """
+    if fmt != AUTO:
+        codecs.get(fmt)
+        return make_path(fmt), fmt
+    for name in codecs.available():
+        path = make_path(name)
+        if path.exists():
+            return path, name
+    name = codecs.default()
+    return make_path(name), name
+
+
+def _write_frame(df: pd.DataFrame, path: Path, fmt: str) -> None:
+    """一時ファイルに書いてから置き換える（途中で落ちても壊れたファイルを残さない）"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = _tmp_path(path)
+    try:
+        codecs.get(fmt).write(df, tmp, _ROW_GROUP_ROWS)
+        os.replace(tmp, path)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+    _MEMORY.discard(str(path))
+
+
+def _read_frame(path: Path, fmt: str) -> pd.DataFrame:
+    """
+    メモリ層 → ディスクの順に読む。
+    返すのは浅いコピーなので、呼び出し側で列を差し替えてもメモリ層は汚れない。
+    """
+    key = str(path)
+    df = _MEMORY.get(key)
+    if df is None:
+        df = codecs.get(fmt).read(path)
+        _MEMORY.put(key, df)
+    return df.copy(deep=False)
+
+
+# yfinance の interval（1m / 1h / 1d / 1wk / 1mo など）→ pandas の頻度
+_INTERVAL = re.compile(r"(\d+)(m|h|d|wk|mo)")
+_PANDAS_UNITS = {"m": "min", "h": "h", "d": "D", "wk": "W-MON", "mo": "MS"}
+
+
+def _pandas_freq(freq: str) -> str:
+    """yfinance の interval を pandas の頻度へ。'1d' のままだと pandas は非推奨の警告を出す"""
+    m = _INTERVAL.fullmatch(freq)
+    return f"{m[1]}{_PANDAS_UNITS[m[2]]}" if m else freq
+
+
+def _with_freq(df: pd.DataFrame, freq: str) -> pd.DataFrame:
+    """
+    index に freq を付け直す。index は作り直すがデータは共有する（メモリ層の index は触らない）。
+    バーの間隔が freq どおりでない（休場日がある日足など）・freq を解釈できないときは付けない
+    """
+    if not isinstance(df.index, pd.DatetimeIndex):
+        return df
+    try:
+        offset = pd.tseries.frequencies.to_offset(_pandas_freq(freq))
+        if df.index.freq != offset:
+            df.index = pd.DatetimeIndex(df.index, freq=offset)
+    except ValueError:
+        pass
+    return df
+
+
 def write(
     df: pd.DataFrame,
     *,
@@ -50,22 +258,18 @@ def write(
     start,
     end,
     freq: str = "1d",
-    fmt: str = "parquet",
+    fmt: str = AUTO,
 ) -> Path:
-    """DataFrame をローカルキャッシュに保存し、パスを返す。"""
-    if fmt not in {"parquet", "csv"}:
-        raise ValueError(f"Unsupported fmt: {fmt}")
+    """DataFrame をローカルキャッシュに保存し、パスを返す。fmt="auto" なら既定の形式"""
+    if fmt == AUTO:
+        fmt = codecs.default()
+    _check_fmt(fmt)
 
     path = _build_path(symbol, start, end, freq, fmt)
-    path.parent.mkdir(parents=True, exist_ok=True)
-
-    out = df.copy()
-    out.index.freq = pd.tseries.frequencies.to_offset(freq)
 
-    if fmt == "parquet":
-        out.to_parquet(path)
-    else:
-        out.to_csv(path)
+    # freq は index に付けずにメタデータへ（コピーを作らない）
+    _write_frame(df, path, fmt)
+    _save_meta(path, {"fetched_at": _now_iso(), "freq": freq})
 
     return path
 
@@ -76,18 +280,232 @@ def read(
     start,
     end,
     freq: str = "1d",
-    fmt: str = "parquet",
+    fmt: str = AUTO,
 ) -> pd.DataFrame:
-    """キャッシュから DataFrame を読み込む。存在しない場合は FileNotFoundError"""
-    path = _build_path(symbol, start, end, freq, fmt)
+    """
+    キャッシュから DataFrame を読み込む。存在しない場合は FileNotFoundError。
+    fmt="auto" なら既定の形式が無くても旧形式（parquet / csv など）のファイルを読む
+    """
+    path, fmt = _resolve(lambda f: _build_path(symbol, start, end, freq, f), fmt)
 
-    if fmt == "parquet":
-        df = pd.read_parquet(path)
-    else:
-        df = pd.read_csv(path, index_col=0, parse_dates=True)
+    df = _read_frame(path, fmt)
+    return _with_freq(df, _load_meta(path).get("freq", freq))
 
-    df.index.freq = pd.tseries.frequencies.to_offset(freq)
-    return df
+
+def fetched_at(
+    symbol: str,
+    *,
+    start,
+    end,
+    freq: str = "1d",
+    fmt: str = AUTO,
+) -> pd.Timestamp | None:
+    """write() した時刻（UTC）。メタデータの無い旧ファイルは None"""
+    path, _ = _resolve(lambda f: _build_path(symbol, start, end, freq, f), fmt)
+    value = _load_meta(path).get("fetched_at")
+    return pd.Timestamp(value) if value else None
+
+
+# --------------------------------------------------
+# 銘柄×頻度ごとの連続系列ストア（範囲マージ型）
+# --------------------------------------------------
+# .cache/<symbol>_<freq>.<fmt>       … 1 本の時系列（重複なし・昇順）
+# .cache/<symbol>_<freq>.<fmt>.json  … 取得済み範囲 {"coverage": [[start, end], ...]}
+#                                      と最終取得時刻 {"fetched_at": ...}
+#
+# 範囲は両端を含む閉区間。取得済み範囲と要求範囲の差分だけを取りに行き、
+# 任意の部分範囲はローカルの系列から切り出して返す。
+Span = tuple[pd.Timestamp, pd.Timestamp]
+
+# 系列ごとの読み→マージ→書きを直列化するロック
+_SERIES_LOCKS: dict[Path, threading.Lock] = {}
+_SERIES_LOCKS_GUARD = threading.Lock()
+
+
+def _series_lock(path: Path) -> threading.Lock:
+    with _SERIES_LOCKS_GUARD:
+        return _SERIES_LOCKS.setdefault(path, threading.Lock())
+
+
+def _series_path(symbol: str, freq: str, fmt: str) -> Path:
+    return _CACHEDIR / f"{symbol}_{freq}.{fmt}"
+
+
+def _series_file(symbol: str, freq: str, fmt: str) -> tuple[Path, str]:
+    """既存の系列はその形式のまま使い続ける（旧形式の系列も取得済み範囲ごと引き継ぐ）"""
+    return _resolve(lambda f: _series_path(symbol, freq, f), fmt)
+
+
+def _step(freq: str) -> pd.Timedelta:
+    """隣接判定に使う 1 本分の幅。'1wk' / '1mo' など長さが決まらないものは 1 日扱い"""
+    m = _INTERVAL.fullmatch(freq)
+    if m is not None and m[2] in ("wk", "mo"):
+        return pd.Timedelta(days=1)  # 'MS' を Timedelta に渡すとミリ秒と解釈される
+    try:
+        return pd.Timedelta(_pandas_freq(freq))
+    except ValueError:
+        return pd.Timedelta(days=1)
+
+
+def _union(spans: list[Span], step: pd.Timedelta) -> list[Span]:
+    """重なる・隣接する区間をまとめる"""
+    out: list[Span] = []
+    for s, e in sorted(spans):
+        if out and s <= out[-1][1] + step:
+            out[-1] = (out[-1][0], max(out[-1][1], e))
+        else:
+            out.append((s, e))
+    return out
+
+
+def coverage(symbol: str, *, freq: str = "1d", fmt: str = AUTO) -> list[Span]:
+    """系列ストアが取得済みの範囲（昇順・重なり無し）"""
+    meta = _load_meta(_series_file(symbol, freq, fmt)[0])
+    return [(pd.Timestamp(s), pd.Timestamp(e)) for s, e in meta.get("coverage", [])]
+
+
+def missing(
+    symbol: str,
+    *,
+    start,
+    end,
+    freq: str = "1d",
+    fmt: str = AUTO,
+) -> list[Span]:
+    """[start, end] のうち、まだ取得していない範囲を返す"""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if start > end:
+        raise ValueError("start must be <= end")
+
+    step = _step(freq)
+    gaps: list[Span] = []
+    cursor = start
+    for s, e in coverage(symbol, freq=freq, fmt=fmt):
+        if e < cursor:
+            continue
+        if s > end:
+            break
+        if s > cursor:
+            gaps.append((cursor, s - step))
+        cursor = max(cursor, e + step)
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+def merge(
+    df: pd.DataFrame,
+    *,
+    symbol: str,
+    start,
+    end,
+    freq: str = "1d",
+    fmt: str = AUTO,
+    settled=None,
+    confirmed_empty: bool = False,
+) -> Path:
+    """
+    [start, end] を取得した結果を系列ストアへマージする。
+    同じ時刻の行は新しいほうで上書きし、取得済み範囲に [start, end] を加える。
+    settled を渡すと取得済み範囲をそこで打ち切る（確定前のバーは次回また取りに行く）。
+    df が空なら何もしない（yfinance はエラーを空 DF で返すので、取得済みにすると二度と取りに行かない）。
+    本当にバーが無い区間（休場日など）だと分かっているときだけ confirmed_empty=True で範囲を記録する。
+    """
+    path, fmt = _series_file(symbol, freq, fmt)
+    if df.empty and not confirmed_empty:
+        return path
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    if settled is not None:
+        end = min(end, pd.Timestamp(settled))
+
+    with _series_lock(path):
+        if not df.empty:
+            try:
+                current = _read_frame(path, fmt)
+            except FileNotFoundError:
+                merged = df
+            else:
+                merged = pd.concat([current, df])
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+            _write_frame(merged, path, fmt)
+
+        spans = coverage(symbol, freq=freq, fmt=fmt)
+        if start <= end:
+            spans.append((start, end))
+        meta = _load_meta(path)
+        meta["coverage"] = [
+            [s.isoformat(), e.isoformat()] for s, e in _union(spans, _step(freq))
+        ]
+        meta["fetched_at"] = _now_iso()
+        _save_meta(path, meta)
+    return path
+
+
+def forget(symbol: str, *, freq: str = "1d", fmt: str = AUTO) -> None:
+    """系列ストアをメモリ層から外す（別プロセスが書き換えたとき用）"""
+    for name in codecs.available() if fmt == AUTO else [fmt]:
+        _MEMORY.discard(str(_series_path(symbol, freq, name)))
+
+
+def _align(ts: pd.Timestamp, tz) -> pd.Timestamp:
+    """tz-aware な系列と比べられるよう、tz の無い日時をその tz の時刻とみなす"""
+    return ts.tz_localize(tz) if tz is not None and ts.tz is None else ts
+
+
+def read_range(
+    symbol: str,
+    *,
+    start,
+    end,
+    freq: str = "1d",
+    fmt: str = AUTO,
+) -> pd.DataFrame:
+    """
+    系列ストアから [start, end] を切り出す。系列が無ければ FileNotFoundError。
+    取得済みかどうかは確認しないので、必要なら先に missing() を使う。
+    """
+    df = _read_frame(*_series_file(symbol, freq, fmt))
+    if not isinstance(df.index, pd.DatetimeIndex):
+        return df.iloc[:0]  # 空の系列など日時で切り出せないもの
+    tz = df.index.tz
+    return df.loc[_align(pd.Timestamp(start), tz) : _align(pd.Timestamp(end), tz)]
+
+
+def iter_batches(
+    symbol: str,
+    *,
+    start=None,
+    end=None,
+    freq: str = "1d",
+    fmt: str = AUTO,
+    columns: list[str] | None = None,
+    batch_rows: int = _ROW_GROUP_ROWS,
+) -> Iterator[pd.DataFrame]:
+    """
+    系列ストアの [start, end] を最大 batch_rows 行ずつの DataFrame で順に返す。
+    全体を読み込まないので、何十年分の分足でもメモリは 1 バッチ分で済む。
+    parquet は行グループ単位で読み、時刻の統計が範囲外の行グループは読まずに飛ばす。
+    feather はレコードバッチ単位。npz は全体を読んでから分ける。
+    メモリ層は使わない（全体を載せないため）。系列が無ければ FileNotFoundError
+    """
+    path, fmt = _series_file(symbol, freq, fmt)
+    if not path.exists():
+        raise FileNotFoundError(path)
+    lo = None if start is None else pd.Timestamp(start)
+    hi = None if end is None else pd.Timestamp(end)
+
+    batches = codecs.get(fmt).batches(
+        path, columns=columns, batch_rows=batch_rows, start=lo, end=hi
+    )
+    for df in batches:
+        tz = getattr(df.index, "tz", None)
+        df = df.loc[
+            None if lo is None else _align(lo, tz) : None if hi is None else _align(hi, tz)
+        ]
+        if len(df):
+            yield df
 
 
 # src/desktop_tutorial/cache.py  の末尾
@@ -0,0 +1,327 @@
+# src/desktop_tutorial/codecs.py
+"""
+キャッシュファイルの形式（コーデック）の登録簿。
+
+    名前     必要なもの  特徴
+    feather  pyarrow    Arrow IPC。lz4 / zstd で圧縮し、メモリマップで読む（最速）
+    parquet  pyarrow    行グループの統計で範囲外を読み飛ばせる。ファイルが小さい
+    npz      NumPy      追加の依存なしで使える控え。object 列は文字列（と欠損）だけ保存できる
+    csv      -          旧形式。遅く dtype も落ちるので、既存ファイルを読むためだけに残す
+
+名前はそのまま拡張子になる。既定の形式は import 時に使えるものの中から上の順で選ぶ
+（環境変数 DESKTOP_TUTORIAL_CACHE_FMT で固定できる）。
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from importlib.util import find_spec
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# 使える中で最初のものが既定になる
+PREFERENCE = ("feather", "parquet", "npz", "csv")
+
+
+@dataclass(frozen=True)
+class Codec:
+    """
+    write(df, path, batch_rows) / read(path) の組。
+    batch_rows は行グループ（parquet）やレコードバッチ（feather）の行数で、分割できない形式は無視する。
+    iter_batches(path, columns, batch_rows, start, end) は少しずつ読む実装。
+    範囲外の行を含むバッチを返してもよい（切り出しは呼び出し側で行う）。
+    無ければ全体を読んでから分割する
+    """
+
+    name: str
+    write: Callable[[pd.DataFrame, Path, int], None]
+    read: Callable[[Path], pd.DataFrame]
+    iter_batches: Callable[..., Iterator[pd.DataFrame]] | None = None
+    requires: tuple[str, ...] = ()
+
+    @property
+    def available(self) -> bool:
+        return all(find_spec(module) is not None for module in self.requires)
+
+    def batches(
+        self, path: Path, *, columns=None, batch_rows: int, start=None, end=None
+    ) -> Iterator[pd.DataFrame]:
+        if self.iter_batches is not None:
+            yield from self.iter_batches(
+                path, columns=columns, batch_rows=batch_rows, start=start, end=end
+            )
+            return
+        df = self.read(path)
+        if columns is not None:
+            df = df[columns]
+        for lo in range(0, len(df), batch_rows):
+            yield df.iloc[lo : lo + batch_rows]
+
+
+_REGISTRY: dict[str, Codec] = {}
+
+
+def register(codec: Codec, *, replace: bool = False) -> None:
+    """形式を追加する。同名の形式があれば replace=True のときだけ差し替える"""
+    if codec.name in _REGISTRY and not replace:
+        raise ValueError(f"codec already registered: {codec.name}")
+    _REGISTRY[codec.name] = codec
+
+
+def get(name: str) -> Codec:
+    """名前から形式を引く。未登録・依存パッケージが無ければ ValueError"""
+    codec = _REGISTRY.get(name)
+    if codec is None:
+        raise ValueError(f"Unsupported fmt: {name}")
+    if not codec.available:
+        raise ValueError(f"fmt {name} needs {', '.join(codec.requires)}")
+    return codec
+
+
+def available() -> list[str]:
+    """使える形式を既定 → 優先順 → 登録順で並べたもの"""
+    order = [default(), *PREFERENCE, *_REGISTRY]
+    return [n for n in dict.fromkeys(order) if n in _REGISTRY and _REGISTRY[n].available]
+
+
+def default() -> str:
+    return _DEFAULT
+
+
+def _pick_default() -> str:
+    forced = os.getenv("DESKTOP_TUTORIAL_CACHE_FMT")
+    if forced:
+        get(forced)
+        return forced
+    return next(n for n in PREFERENCE if _REGISTRY[n].available)
+
+
+# --------------------------------------------------
+# Arrow 共通
+# --------------------------------------------------
+def _index_columns(schema) -> list[str]:
+    """pandas メタデータに記録されたインデックス列（RangeIndex は列にならない）"""
+    meta = schema.pandas_metadata or {}
+    return [c for c in meta.get("index_columns", []) if isinstance(c, str)]
+
+
+def _select(table, columns):
+    if columns is None:
+        return table
+    return table.select([*columns, *_index_columns(table.schema)])
+
+
+def _index_bounds(schema, start, end):
+    """インデックスの tz に合わせた (start, end)。tz の無い日時はその tz の時刻とみなす"""
+    index_cols = _index_columns(schema)
+    tz = getattr(schema.field(index_cols[0]).type, "tz", None) if index_cols else None
+
+    def _align(ts):
+        if ts is None:
+            return None
+        ts = pd.Timestamp(ts)
+        return ts.tz_localize(tz) if tz is not None and ts.tz is None else ts
+
+    return _align(start), _align(end)
+
+
+# --------------------------------------------------
+# feather（Arrow IPC）
+# --------------------------------------------------
+@functools.cache
+def _best_compression() -> str:
+    import pyarrow as pa
+
+    # lz4 は zstd より 1.5〜2 倍速く、サイズの差は 1 割ほど（benchmarks/cache_codecs.py）
+    for name in ("lz4", "zstd"):
+        if pa.Codec.is_available(name):
+            return name
+    return "uncompressed"
+
+
+def feather_codec(compression: str | None = None, name: str = "feather") -> Codec:
+    """compression=None ならビルドに含まれる中で速いもの（lz4 → zstd → 無圧縮）"""
+
+    def write(df: pd.DataFrame, path: Path, batch_rows: int) -> None:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        table = pa.Table.from_pandas(df, preserve_index=True)
+        feather.write_feather(
+            table, path, compression=compression or _best_compression(), chunksize=batch_rows
+        )
+
+    def read(path: Path) -> pd.DataFrame:
+        import pyarrow.feather as feather
+
+        return feather.read_table(path, memory_map=True).to_pandas()
+
+    def iter_batches(path: Path, *, columns, batch_rows: int, start, end):
+        import pyarrow as pa
+
+        with pa.memory_map(str(path)) as source:
+            reader = pa.ipc.open_file(source)
+            lo, hi = _index_bounds(reader.schema, start, end)
+            index_cols = _index_columns(reader.schema)
+            position = reader.schema.get_field_index(index_cols[0]) if index_cols else -1
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                if position >= 0 and batch.num_rows and (lo is not None or hi is not None):
+                    # 系列は昇順なので、バッチの先頭・末尾の時刻だけで範囲外かが分かる
+                    stamps = batch.column(position)
+                    first, last = pd.Timestamp(stamps[0].as_py()), pd.Timestamp(stamps[-1].as_py())
+                    if hi is not None and first > hi:
+                        break
+                    if lo is not None and last < lo:
+                        continue
+                table = _select(pa.Table.from_batches([batch], schema=reader.schema), columns)
+                for offset in range(0, table.num_rows, batch_rows):
+                    yield table.slice(offset, batch_rows).to_pandas()
+
+    return Codec(name, write, read, iter_batches, requires=("pyarrow",))
+
+
+# --------------------------------------------------
+# parquet
+# --------------------------------------------------
+def _parquet_write(df: pd.DataFrame, path: Path, batch_rows: int) -> None:
+    df.to_parquet(path, row_group_size=batch_rows)
+
+
+def _parquet_read(path: Path) -> pd.DataFrame:
+    return pd.read_parquet(path)
+
+
+def _parquet_iter_batches(path: Path, *, columns, batch_rows: int, start, end):
+    """行グループの時刻の統計で範囲外の行グループは読まずに飛ばす"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    pf = pq.ParquetFile(path)
+    schema = pf.schema_arrow
+    index_cols = _index_columns(schema)
+    groups = list(range(pf.metadata.num_row_groups))
+    if index_cols and (start is not None or end is not None):
+        position = schema.names.index(index_cols[0])
+        lo, hi = _index_bounds(schema, start, end)
+        keep = []
+        for i in groups:
+            stats = pf.metadata.row_group(i).column(position).statistics
+            if stats is not None and stats.has_min_max:
+                if hi is not None and pd.Timestamp(stats.min) > hi:
+                    continue
+                if lo is not None and pd.Timestamp(stats.max) < lo:
+                    continue
+            keep.append(i)
+        groups = keep
+    if not groups:
+        return
+
+    read_cols = None if columns is None else [*columns, *index_cols]
+    for batch in pf.iter_batches(batch_size=batch_rows, row_groups=groups, columns=read_cols):
+        # スキーマの pandas メタデータからインデックスと tz を戻す
+        yield pa.Table.from_batches([batch]).to_pandas()
+
+
+# --------------------------------------------------
+# npz（NumPy のみ）
+# --------------------------------------------------
+_NPZ_INDEX = "__index__"
+_NPZ_META = "__meta__"
+_NPZ_NA = {"none": None, "nan": np.nan, "na": pd.NA}
+
+
+def _npz_text(values: np.ndarray, mask: np.ndarray, name) -> tuple[np.ndarray, str]:
+    """
+    文字列の列を固定長の文字列配列と欠損の種類へ。欠損は mask で別に持つ。
+    文字列以外の値が混ざる列・欠損の表し方が混ざる列は元に戻せないので ValueError
+    """
+    if not all(isinstance(v, str) for v in values[~mask]):
+        raise ValueError(f"npz cannot store non-string objects in column {name!r}")
+    kinds = {"none" if v is None else "na" if v is pd.NA else "nan" for v in values[mask]}
+    if len(kinds) > 1:
+        raise ValueError(f"npz cannot store mixed missing values in column {name!r}")
+    return np.where(mask, "", values).astype(str), kinds.pop() if kinds else "none"
+
+
+def _npz_write(df: pd.DataFrame, path: Path, batch_rows: int) -> None:
+    index = df.index
+    meta = {"columns": [str(c) for c in df.columns], "index_name": index.name, "tz": None}
+    if isinstance(index, pd.DatetimeIndex):
+        meta["tz"] = None if index.tz is None else str(index.tz)
+        meta["kind"] = "datetime"
+        stamps = index.values  # tz 付きなら UTC の datetime64。単位（ns / us）もそのまま残る
+    else:
+        meta["kind"] = "plain"
+        stamps = index.to_numpy()
+    arrays = {_NPZ_INDEX: stamps}
+    text = {}
+    for i in range(df.shape[1]):
+        col = df.iloc[:, i]
+        if col.dtype == object or isinstance(col.dtype, pd.StringDtype):
+            mask = col.isna().to_numpy()
+            arrays[f"c{i}"], na = _npz_text(col.to_numpy(dtype=object), mask, col.name)
+            arrays[f"m{i}"] = mask
+            text[str(i)] = {"dtype": str(col.dtype), "na": na}
+        else:
+            arrays[f"c{i}"] = col.to_numpy()
+    meta["text"] = text
+    arrays[_NPZ_META] = np.array(json.dumps(meta))
+    # パスを渡すと np.savez が拡張子を足すのでファイルオブジェクトに書く
+    with open(path, "wb") as f:
+        np.savez(f, **arrays)
+
+
+def _npz_read(path: Path) -> pd.DataFrame:
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data[_NPZ_META]))
+        stamps = data[_NPZ_INDEX]
+        if meta["kind"] == "datetime":
+            index = pd.DatetimeIndex(stamps, name=meta["index_name"])
+            if meta["tz"] is not None:
+                index = index.tz_localize("UTC").tz_convert(meta["tz"])
+        else:
+            index = pd.Index(stamps, name=meta["index_name"])
+        text = meta.get("text", {})
+        columns = {}
+        for i, name in enumerate(meta["columns"]):
+            values = data[f"c{i}"]
+            info = text.get(str(i))
+            if info is not None:
+                values = values.astype(object)
+                values[data[f"m{i}"]] = _NPZ_NA[info["na"]]
+                # ndarray のままだと object 列が str 型に推論されるので dtype を指定して包む
+                values = pd.Series(values, index=index, dtype=info["dtype"], copy=False)
+            columns[name] = values
+    return pd.DataFrame(columns, index=index, copy=False)
+
+
+# --------------------------------------------------
+# csv（旧形式）
+# --------------------------------------------------
+def _csv_write(df: pd.DataFrame, path: Path, batch_rows: int) -> None:
+    df.to_csv(path)
+
+
+def _csv_read(path: Path) -> pd.DataFrame:
+    return pd.read_csv(path, index_col=0, parse_dates=True)
+
+
+def _csv_iter_batches(path: Path, *, columns, batch_rows: int, start, end):
+    with pd.read_csv(path, index_col=0, parse_dates=True, chunksize=batch_rows) as reader:
+        for df in reader:
+            yield df if columns is None else df[columns]
+
+
+register(feather_codec())
+register(Codec("parquet", _parquet_write, _parquet_read, _parquet_iter_batches, ("pyarrow",)))
+register(Codec("npz", _npz_write, _npz_read))
+register(Codec("csv", _csv_write, _csv_read, _csv_iter_batches))
+
+_DEFAULT = _pick_default()
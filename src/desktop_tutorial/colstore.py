@@ -0,0 +1,209 @@
+# src/desktop_tutorial/colstore.py
+"""
+追記専用の列指向バーストア。
+
+<root>/<symbol>_<freq>/
+    ts.i8        … 時刻（UTC, ns, int64）昇順
+    open.f8 …    … 各列を固定長の生バイナリで 1 ファイルずつ
+    meta.json    … 列の dtype とタイムゾーン
+
+新しいバーはファイル末尾に足すだけで過去分は書き直さない。
+読み出しは np.memmap + 二分探索で必要な範囲だけを触る。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from desktop_tutorial import cache
+
+# 列名 → dtype（ファイル拡張子は dtype の略号）
+COLUMNS: dict[str, np.dtype] = {
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "adjclose": np.dtype("<f8"),
+    "volume": np.dtype("<i8"),
+}
+_TS = "ts"
+_TS_DTYPE = np.dtype("<i8")
+
+
+def _suffix(dtype: np.dtype) -> str:
+    return f"{dtype.kind}{dtype.itemsize}"
+
+
+class ColumnStore:
+    """銘柄×頻度ごとの追記専用ストア。root 省略時はキャッシュディレクトリ配下の bars/"""
+
+    def __init__(self, root: str | os.PathLike | None = None):
+        self._root = Path(root) if root is not None else None
+        self._locks: dict[Path, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    @property
+    def root(self) -> Path:
+        return self._root if self._root is not None else cache._CACHEDIR / "bars"
+
+    # ---------- paths ----------
+    def _dir(self, symbol: str, freq: str) -> Path:
+        return self.root / f"{symbol}_{freq}"
+
+    @staticmethod
+    def _file(d: Path, name: str, dtype: np.dtype) -> Path:
+        return d / f"{name}.{_suffix(dtype)}"
+
+    def _lock(self, d: Path) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(d, threading.Lock())
+
+    # ---------- metadata ----------
+    def _meta(self, d: Path) -> dict:
+        try:
+            return json.loads((d / "meta.json").read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+
+    def length(self, symbol: str, freq: str = "1d") -> int:
+        """保存済みのバー数。時刻列のバイト数で決まる（途中で落ちた他列の余りは無視）"""
+        ts = self._file(self._dir(symbol, freq), _TS, _TS_DTYPE)
+        try:
+            return ts.stat().st_size // _TS_DTYPE.itemsize
+        except FileNotFoundError:
+            return 0
+
+    def last_timestamp(self, symbol: str, freq: str = "1d") -> pd.Timestamp | None:
+        d = self._dir(symbol, freq)
+        n = self.length(symbol, freq)
+        if n == 0:
+            return None
+        ts = np.memmap(self._file(d, _TS, _TS_DTYPE), dtype=_TS_DTYPE, mode="r", shape=(n,))
+        return self._to_index(ts[-1:], self._meta(d).get("tz"))[0]
+
+    # ---------- append ----------
+    def append(self, df: pd.DataFrame, *, symbol: str, freq: str = "1d") -> int:
+        """
+        df のうち保存済みの最終時刻より新しい行だけを末尾に追記し、追記した行数を返す。
+        index は昇順・重複なしであること。列が足りなければ NaN（出来高は 0）で埋める。
+        """
+        if not df.index.is_monotonic_increasing or df.index.has_duplicates:
+            raise ValueError("index must be strictly increasing")
+        index = pd.DatetimeIndex(df.index)
+        tz = None if index.tz is None else str(index.tz)
+        if tz is not None:
+            index = index.tz_convert("UTC").tz_localize(None)
+        stamps = index.as_unit("ns").asi8
+
+        d = self._dir(symbol, freq)
+        with self._lock(d):
+            d.mkdir(parents=True, exist_ok=True)
+            meta = self._meta(d)
+            if meta and meta.get("tz") != tz:
+                raise ValueError(f"timezone mismatch: stored {meta.get('tz')}, got {tz}")
+
+            n = self.length(symbol, freq)
+            if n:
+                last = np.fromfile(
+                    self._file(d, _TS, _TS_DTYPE),
+                    dtype=_TS_DTYPE,
+                    count=1,
+                    offset=(n - 1) * _TS_DTYPE.itemsize,
+                )[0]
+                keep = stamps > last
+                stamps = stamps[keep]
+            else:
+                keep = slice(None)
+            if len(stamps) == 0:
+                return 0
+
+            if not meta:
+                meta = {"tz": tz, "columns": {c: dt.str for c, dt in COLUMNS.items()}}
+                (d / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+            # 値の列 → 時刻列の順に書く。途中で落ちても時刻列の長さが正になる
+            for name, dtype in COLUMNS.items():
+                path = self._file(d, name, dtype)
+                self._truncate(path, n * dtype.itemsize)
+                if name in df:
+                    values = df[name].to_numpy()[keep]
+                    if dtype.kind == "i":
+                        values = np.nan_to_num(values.astype("f8"), nan=0.0)
+                else:
+                    values = np.full(len(stamps), 0 if dtype.kind == "i" else np.nan)
+                with open(path, "ab") as f:
+                    np.ascontiguousarray(values, dtype=dtype).tofile(f)
+
+            ts_path = self._file(d, _TS, _TS_DTYPE)
+            self._truncate(ts_path, n * _TS_DTYPE.itemsize)
+            with open(ts_path, "ab") as f:
+                np.ascontiguousarray(stamps, dtype=_TS_DTYPE).tofile(f)
+                f.flush()
+                os.fsync(f.fileno())
+        return len(stamps)
+
+    @staticmethod
+    def _truncate(path: Path, size: int) -> None:
+        """前回の追記が途中で落ちて残った余りを切り落とす"""
+        try:
+            if path.stat().st_size > size:
+                os.truncate(path, size)
+        except FileNotFoundError:
+            path.touch()
+
+    # ---------- read ----------
+    def read(
+        self,
+        symbol: str,
+        *,
+        start=None,
+        end=None,
+        freq: str = "1d",
+        columns: list[str] | None = None,
+    ) -> pd.DataFrame:
+        """
+        [start, end]（両端含む）を DataFrame で返す。ストアが無ければ FileNotFoundError。
+        時刻列を二分探索して該当範囲だけを memmap から取り出す。
+        """
+        d = self._dir(symbol, freq)
+        meta = self._meta(d)
+        if not meta:
+            raise FileNotFoundError(d)
+        tz = meta.get("tz")
+        columns = list(COLUMNS) if columns is None else columns
+        n = self.length(symbol, freq)
+        if n == 0:
+            empty = {c: np.empty(0, dtype=COLUMNS[c]) for c in columns}
+            return pd.DataFrame(empty, index=self._to_index(np.empty(0, _TS_DTYPE), tz))
+
+        ts = np.memmap(self._file(d, _TS, _TS_DTYPE), dtype=_TS_DTYPE, mode="r", shape=(n,))
+        lo = 0 if start is None else int(np.searchsorted(ts, self._stamp(start, tz), "left"))
+        hi = n if end is None else int(np.searchsorted(ts, self._stamp(end, tz), "right"))
+
+        data = {}
+        for name in columns:
+            dtype = COLUMNS[name]
+            mm = np.memmap(self._file(d, name, dtype), dtype=dtype, mode="r", shape=(n,))
+            data[name] = np.array(mm[lo:hi])
+        return pd.DataFrame(data, index=self._to_index(np.array(ts[lo:hi]), tz))
+
+    @staticmethod
+    def _stamp(x, tz: str | None) -> int:
+        ts = pd.Timestamp(x)
+        if tz is not None:
+            ts = (ts.tz_localize(tz) if ts.tz is None else ts).tz_convert("UTC")
+            ts = ts.tz_localize(None)
+        elif ts.tz is not None:
+            ts = ts.tz_localize(None)
+        return ts.as_unit("ns").value
+
+    @staticmethod
+    def _to_index(stamps: np.ndarray, tz: str | None) -> pd.DatetimeIndex:
+        index = pd.DatetimeIndex(stamps.view("datetime64[ns]"))
+        return index.tz_localize("UTC").tz_convert(tz) if tz else index
@@ -0,0 +1,100 @@
+# src/desktop_tutorial/freshness.py
+"""キャッシュの鮮度（TTL）判定"""
+
+from __future__ import annotations
+
+import datetime as _dt
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+# config.yaml の場所（環境変数で上書き可）
+_CONFIG = Path(os.getenv("DESKTOP_TUTORIAL_CONFIG", "config.yaml"))
+
+
+def is_intraday(freq: str) -> bool:
+    """'1m' / '5m' / '1h' などの日中足か（'1mo' は月足）"""
+    return freq.endswith(("m", "h")) and not freq.endswith("mo")
+
+
+@dataclass(frozen=True)
+class FreshnessPolicy:
+    """
+    頻度ごとの有効期限。
+    ・日中足 … 取得から intraday_ttl 秒
+    ・日足以上 … 取得後、最初に来る取引所の大引けまで（土日は飛ばす。祝日は考慮しない）
+    """
+
+    intraday_ttl: float = 60.0
+    market_tz: str = "America/New_York"
+    market_close: _dt.time = _dt.time(16, 0)
+
+    def expires_at(self, freq: str, fetched_at: pd.Timestamp) -> pd.Timestamp:
+        fetched_at = _as_utc(fetched_at)
+        if is_intraday(freq):
+            return fetched_at + pd.Timedelta(seconds=self.intraday_ttl)
+        return self._next_close(fetched_at)
+
+    def is_fresh(
+        self, freq: str, fetched_at: pd.Timestamp, now: pd.Timestamp | None = None
+    ) -> bool:
+        now = _as_utc(now) if now is not None else pd.Timestamp.now(tz="UTC")
+        return now < self.expires_at(freq, fetched_at)
+
+    def settled_until(self, freq: str, now: pd.Timestamp | None = None) -> pd.Timestamp:
+        """
+        これ以前のバーはもう変わらない、という境界（市場ローカル時刻の naive）。
+        範囲ストアの取得済み範囲をここで打ち切り、確定前のバーを再取得させる。
+        ・日中足 … now - intraday_ttl
+        ・日足以上 … 大引けを過ぎた直近の取引日
+        """
+        now = _as_utc(now) if now is not None else pd.Timestamp.now(tz="UTC")
+        local = now.tz_convert(self.market_tz)
+        if is_intraday(freq):
+            edge = local - pd.Timedelta(seconds=self.intraday_ttl)
+            return edge.tz_localize(None)
+
+        day = local.normalize()
+        if local.time() < self.market_close:
+            day -= pd.Timedelta(days=1)
+        while day.weekday() >= 5:
+            day -= pd.Timedelta(days=1)
+        return day.tz_localize(None)
+
+    def _next_close(self, ts: pd.Timestamp) -> pd.Timestamp:
+        local = ts.tz_convert(self.market_tz)
+        close = local.normalize() + pd.Timedelta(
+            hours=self.market_close.hour, minutes=self.market_close.minute
+        )
+        if local >= close:
+            close += pd.Timedelta(days=1)
+        while close.weekday() >= 5:
+            close += pd.Timedelta(days=1)
+        return close.tz_convert("UTC")
+
+
+def _as_utc(ts) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")
+
+
+def load_policy(path: str | os.PathLike | None = None) -> FreshnessPolicy:
+    """
+    config.yaml の polygon_api.cache_duration（秒）を日中足の TTL として読む。
+    ファイルや PyYAML が無ければ既定値。
+    """
+    path = Path(path) if path is not None else _CONFIG
+    try:
+        import yaml
+
+        with open(path, encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+    except (ImportError, OSError):
+        return FreshnessPolicy()
+
+    ttl = (config.get("polygon_api") or {}).get("cache_duration")
+    if ttl is None:
+        return FreshnessPolicy()
+    return FreshnessPolicy(intraday_ttl=float(ttl))
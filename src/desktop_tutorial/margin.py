@@ -0,0 +1,231 @@
+# src/desktop_tutorial/margin.py
+"""
+建玉と時価から信用維持率（委託保証金率）を手元で計算する。
+
+    維持率 = (保証金現金 + 代用有価証券の評価額 × (1 - 掛目の減額分)
+             + 建玉の評価損益 - 諸経費) / 建玉評価額 × 100
+
+証券会社の数字を待たずに、株価が 1 銘柄動くたびに O(1) で更新する。
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass
+
+import numpy as np
+
+# 代用有価証券の既定の減額分（掛目 80%）
+DEFAULT_HAIRCUT = 0.2
+
+
+@dataclass(frozen=True)
+class Position:
+    """信用建玉。shares が負なら売り建て。entry_price 省略時は最初に受け取った価格を基準にする"""
+
+    symbol: str
+    shares: float
+    entry_price: float | None = None
+
+
+@dataclass(frozen=True)
+class Collateral:
+    """代用有価証券。評価額の (1 - haircut) だけが保証金に算入される"""
+
+    symbol: str
+    shares: float
+    haircut: float = DEFAULT_HAIRCUT
+
+
+class MarginEngine:
+    """
+    銘柄ごとの係数を配列で持ち、合計（建玉評価額・評価損益・代用評価額）を
+    差分で更新する。誤差が溜まらないよう一定回数ごとに配列から計算し直す。
+    """
+
+    _RECOMPUTE_EVERY = 10_000
+
+    def __init__(
+        self,
+        positions: Iterable[Position],
+        collateral: Iterable[Collateral] = (),
+        *,
+        cash: float = 0.0,
+        fees: float = 0.0,
+    ):
+        positions = list(positions)
+        collateral = list(collateral)
+        self.symbols: list[str] = sorted(
+            {p.symbol for p in positions} | {c.symbol for c in collateral}
+        )
+        self._index = {s: i for i, s in enumerate(self.symbols)}
+        n = len(self.symbols)
+
+        self.cash = float(cash)
+        self.fees = float(fees)
+        self._qty = np.zeros(n)  # 建玉数量（符号付き）
+        self._entry = np.full(n, np.nan)  # 建値
+        self._weight = np.zeros(n)  # 代用の算入株数 = 株数 × (1 - haircut)
+        for p in positions:
+            i = self._index[p.symbol]
+            if self._qty[i] and p.entry_price is not None and not np.isnan(self._entry[i]):
+                # 同じ銘柄の建玉は建値を加重平均してまとめる
+                cost = self._qty[i] * self._entry[i] + p.shares * p.entry_price
+                self._qty[i] += p.shares
+                self._entry[i] = cost / self._qty[i] if self._qty[i] else np.nan
+            else:
+                self._qty[i] += p.shares
+                if p.entry_price is not None:
+                    self._entry[i] = p.entry_price
+        for c in collateral:
+            if not 0.0 <= c.haircut <= 1.0:
+                raise ValueError(f"haircut must be within [0, 1]: {c.haircut}")
+            self._weight[self._index[c.symbol]] += c.shares * (1.0 - c.haircut)
+        self._abs_qty = np.abs(self._qty)
+
+        self._prices = np.full(n, np.nan)
+        self._missing = n
+        self._updates = 0
+        self._exposure = 0.0  # Σ|q|·p
+        self._pnl = 0.0  # Σq·(p - 建値)
+        self._collateral = 0.0  # Σw·p
+
+    # ---------- 構築 ----------
+    @classmethod
+    def from_monitor_config(
+        cls,
+        path: str | os.PathLike = "monitor_config.json",
+        *,
+        collateral: Iterable[Collateral] = (),
+        cash: float = 0.0,
+        fees: float = 0.0,
+    ) -> MarginEngine:
+        """
+        monitor_config.json の positions（ticker / shares / 任意で entryPrice）から作る。
+        銘柄別の内訳が無い代用評価額（moomoo の 保証金代用 など）は cash に含めて渡す。
+        """
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        positions = [
+            Position(p["ticker"], float(p["shares"]), p.get("entryPrice"))
+            for p in config.get("positions", [])
+        ]
+        return cls(positions, collateral, cash=cash, fees=fees)
+
+    # ---------- 価格更新 ----------
+    def update_price(self, symbol: str, price: float) -> float:
+        """1 銘柄の価格を更新して維持率を返す（O(1)）。対象外の銘柄は無視する"""
+        i = self._index.get(symbol)
+        if i is None:
+            return self.rate
+        price = float(price)
+        old = self._prices[i]
+        if np.isnan(old):
+            self._missing -= 1
+            if np.isnan(self._entry[i]):
+                self._entry[i] = price
+            old_exposure = old_pnl = old_collateral = 0.0
+        else:
+            old_exposure = self._abs_qty[i] * old
+            old_pnl = self._qty[i] * (old - self._entry[i])
+            old_collateral = self._weight[i] * old
+        self._prices[i] = price
+
+        self._exposure += self._abs_qty[i] * price - old_exposure
+        self._pnl += self._qty[i] * (price - self._entry[i]) - old_pnl
+        self._collateral += self._weight[i] * price - old_collateral
+
+        self._updates += 1
+        if self._updates % self._RECOMPUTE_EVERY == 0:
+            self._recompute()
+        return self.rate
+
+    def update_prices(self, prices: Mapping[str, float]) -> float:
+        for symbol, price in prices.items():
+            self.update_price(symbol, price)
+        return self.rate
+
+    def refresh(self, provider) -> float:
+        """
+        provider.fetch_many（YahooProvider など）で全銘柄の直近終値を 1 回で取り込む
+        """
+        frames = provider.fetch_many(self.symbols)
+        return self.update_prices(
+            {s: float(df["close"].iloc[-1]) for s, df in frames.items() if len(df)}
+        )
+
+    def _recompute(self) -> None:
+        known = ~np.isnan(self._prices)
+        p = np.where(known, self._prices, 0.0)
+        entry = np.where(known, self._entry, 0.0)
+        self._exposure = float(self._abs_qty @ p)
+        self._pnl = float(self._qty @ (p - entry))
+        self._collateral = float(self._weight @ p)
+
+    # ---------- 結果 ----------
+    @property
+    def prices(self) -> dict[str, float]:
+        return dict(zip(self.symbols, self._prices.tolist()))
+
+    @property
+    def ready(self) -> bool:
+        """全銘柄の価格がそろったか"""
+        return self._missing == 0
+
+    @property
+    def exposure(self) -> float:
+        """建玉評価額"""
+        return self._exposure
+
+    @property
+    def equity(self) -> float:
+        """委託保証金（現金 + 代用評価額 + 評価損益 - 諸経費）"""
+        return self.cash + self._collateral + self._pnl - self.fees
+
+    @property
+    def rate(self) -> float:
+        """維持率（%）。価格が出そろっていないか建玉が無ければ nan"""
+        if not self.ready or self._exposure <= 0:
+            return float("nan")
+        return self.equity / self._exposure * 100
+
+    def linear_form(self) -> tuple[float, np.ndarray, np.ndarray]:
+        """
+        維持率を価格ベクトル p の式 (const + numer·p) / (denom·p) × 100 で表す係数。
+        シナリオやシミュレーションで大量の価格をまとめて評価するときに使う
+        """
+        if not self.ready:
+            raise ValueError("prices are not available for all symbols")
+        const = self.cash - self.fees - float(self._qty @ self._entry)
+        return const, self._weight + self._qty, self._abs_qty.copy()
+
+    # ---------- シナリオ ----------
+    def shock_matrix(self, shocks: Mapping[str, Iterable[float]]) -> np.ndarray:
+        """{銘柄: 騰落率の列} から (シナリオ数, 銘柄数) の行列を作る。指定の無い銘柄は 0"""
+        columns = {s: np.asarray(v, dtype=float) for s, v in shocks.items()}
+        k = max((len(v) for v in columns.values()), default=0)
+        out = np.zeros((k, len(self.symbols)))
+        for symbol, values in columns.items():
+            out[:, self._index[symbol]] = values
+        return out
+
+    def scenarios(self, shocks) -> np.ndarray:
+        """
+        騰落率のシナリオごとの維持率をまとめて計算する。
+        shocks … (k,) なら全銘柄一律、(k, 銘柄数) なら self.symbols の順、
+                 dict なら shock_matrix と同じ形式
+        """
+        if isinstance(shocks, Mapping):
+            shocks = self.shock_matrix(shocks)
+        shocks = np.asarray(shocks, dtype=float)
+        const, numer, denom = self.linear_form()
+
+        p = self._prices
+        growth = 1.0 + (shocks[:, None] if shocks.ndim == 1 else shocks)
+        growth = np.broadcast_to(growth, (growth.shape[0], len(p)))
+        exposure = growth @ (denom * p)
+        equity = const + growth @ (numer * p)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(exposure > 0, equity / exposure * 100, np.nan)
@@ -0,0 +1,95 @@
+# src/desktop_tutorial/providers/aio.py
+"""同期 Provider を asyncio から並行に使うための部品"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+from collections.abc import Awaitable, Iterable
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import date
+from typing import TypeVar
+
+from desktop_tutorial.providers.base import AsyncProvider, PriceBars, Provider
+
+T = TypeVar("T")
+
+
+async def gather_limited(
+    aws: Iterable[Awaitable[T]], *, limit: int, return_exceptions: bool = False
+) -> list[T]:
+    """
+    asyncio.gather と同じ順序で結果を返すが、同時に走らせるのは limit 件まで。
+    数百銘柄を一度に投げてもソケットやスレッドを食い潰さない。
+    """
+    if limit < 1:
+        raise ValueError("limit must be >= 1")
+    sem = asyncio.Semaphore(limit)
+
+    async def _run(aw: Awaitable[T]) -> T:
+        async with sem:
+            return await aw
+
+    return await asyncio.gather(
+        *(_run(aw) for aw in aws), return_exceptions=return_exceptions
+    )
+
+
+class ThreadedProvider:
+    """
+    同期 Provider をスレッドプールで動かし AsyncProvider として見せるアダプター。
+    executor を省略すると max_workers 本の専用プールを作る（close() で片付ける）。
+    """
+
+    def __init__(
+        self,
+        provider: Provider,
+        *,
+        executor: Executor | None = None,
+        max_workers: int = 8,
+    ):
+        self.provider = provider
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="provider"
+        )
+
+    async def fetch(
+        self, symbol: str, *, start: date | None = None, end: date | None = None
+    ) -> PriceBars:
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self.provider.fetch, symbol, start=start, end=end)
+        return await loop.run_in_executor(self._executor, call)
+
+    def close(self) -> None:
+        if self._own_executor:
+            self._executor.shutdown(wait=True)
+
+    async def __aenter__(self) -> ThreadedProvider:
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.close()
+
+
+async def fetch_all(
+    provider: AsyncProvider,
+    symbols: Iterable[str],
+    *,
+    start: date | None = None,
+    end: date | None = None,
+    limit: int = 8,
+) -> dict[str, PriceBars]:
+    """
+    複数銘柄を並行取得して {symbol: bars} を返す。
+    失敗した銘柄は戻り値に含めない（1 銘柄の失敗で全体を落とさない）。
+    """
+    symbols = list(dict.fromkeys(symbols))
+    results = await gather_limited(
+        (provider.fetch(s, start=start, end=end) for s in symbols),
+        limit=limit,
+        return_exceptions=True,
+    )
+    return {
+        s: bars for s, bars in zip(symbols, results) if not isinstance(bars, BaseException)
+    }
@@ -1,8 +1,20 @@
 from __future__ import annotations
 
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Hashable, Iterable, Iterator
 from datetime import date
-from typing import Protocol, TypedDict, final
+from typing import TYPE_CHECKING, Protocol, TypedDict, TypeVar, final, overload
+
+import numpy as np
+
+from desktop_tutorial.providers import resilience
+from desktop_tutorial.providers.resilience import RetryPolicy, breaker_for, call_with_retry
+from desktop_tutorial.providers.throttle import limiter_for, single_flight_for
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+T = TypeVar("T")
 
 
 class PriceBar(TypedDict):
@@ -14,15 +26,181 @@ class PriceBar(TypedDict):
     volume: int
 
 
+class PriceBars:
+    """
+    バー列の列指向コンテナ（structure of arrays）。
+    1 本ごとの dict を作らず、日時・OHLC・出来高をそれぞれ NumPy 配列で持つ。
+    反復すると互換用に PriceBar の dict を 1 本ずつ返す。
+    """
+
+    __slots__ = ("dates", "open", "high", "low", "close", "volume")
+
+    def __init__(self, dates, open, high, low, close, volume):
+        self.dates = np.asarray(dates, dtype="datetime64[ns]")
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.int64)
+        n = len(self.dates)
+        if any(len(getattr(self, c)) != n for c in self.__slots__):
+            raise ValueError("all columns must have the same length")
+
+    # ---------- 変換 ----------
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> PriceBars:
+        """
+        正規化済み DF（小文字列）から作る。dtype が合っていれば列はコピーせずに共有する。
+        終値の無い行は捨て、欠けている OHLC は終値で、出来高は 0 で埋める。
+        """
+        if df["close"].hasnans:
+            df = df[df["close"].notna()]
+        close = df["close"].to_numpy(dtype=np.float64, copy=False)
+
+        def col(name: str) -> np.ndarray:
+            if name not in df:
+                return close
+            return df[name].to_numpy(dtype=np.float64, copy=False)
+
+        if "volume" in df:
+            volume = df["volume"].fillna(0).to_numpy(dtype=np.int64, copy=False)
+        else:
+            volume = np.zeros(len(df), dtype=np.int64)
+        index = df.index
+        if getattr(index, "tz", None) is not None:
+            index = index.tz_localize(None)  # 現地時刻の壁時計で持つ
+        return cls(index.values, col("open"), col("high"), col("low"), close, volume)
+
+    @classmethod
+    def from_bars(cls, bars: Iterable[PriceBar]) -> PriceBars:
+        bars = list(bars)
+        return cls(
+            [np.datetime64(b["date"], "ns") for b in bars],
+            [b["open"] for b in bars],
+            [b["high"] for b in bars],
+            [b["low"] for b in bars],
+            [b["close"] for b in bars],
+            [b["volume"] for b in bars],
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """列を共有したまま DataFrame にする"""
+        import pandas as pd
+
+        return pd.DataFrame(
+            {c: getattr(self, c) for c in self.__slots__[1:]},
+            index=pd.DatetimeIndex(self.dates, name="date"),
+            copy=False,
+        )
+
+    # ---------- コンテナ ----------
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @overload
+    def __getitem__(self, key: int) -> PriceBar: ...
+
+    @overload
+    def __getitem__(self, key: slice) -> PriceBars: ...
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):  # スライスはビュー（コピーしない）
+            return PriceBars(*(getattr(self, c)[key] for c in self.__slots__))
+        return PriceBar(
+            date=self.dates[key].astype("datetime64[D]").item(),
+            open=float(self.open[key]),
+            high=float(self.high[key]),
+            low=float(self.low[key]),
+            close=float(self.close[key]),
+            volume=int(self.volume[key]),
+        )
+
+    def __iter__(self) -> Iterator[PriceBar]:
+        dates = self.dates.astype("datetime64[D]").tolist()
+        for d, o, h, lo, c, v in zip(
+            dates,
+            self.open.tolist(),
+            self.high.tolist(),
+            self.low.tolist(),
+            self.close.tolist(),
+            self.volume.tolist(),
+        ):
+            yield PriceBar(date=d, open=o, high=h, low=lo, close=c, volume=v)
+
+    def __repr__(self) -> str:
+        if not len(self):
+            return "PriceBars(0 bars)"
+        return f"PriceBars({len(self)} bars, {self.dates[0]} .. {self.dates[-1]})"
+
+    @property
+    def nbytes(self) -> int:
+        return sum(getattr(self, c).nbytes for c in self.__slots__)
+
+    def between(self, start=None, end=None) -> PriceBars:
+        """[start, end]（両端含む）を二分探索で切り出したビュー。dates は昇順が前提"""
+        lo = 0 if start is None else np.searchsorted(self.dates, np.datetime64(start, "ns"))
+        hi = (
+            len(self)
+            if end is None
+            else np.searchsorted(self.dates, np.datetime64(end, "ns"), side="right")
+        )
+        return self[int(lo) : int(hi)]
+
+
 class Provider(Protocol):
     @abstractmethod
     def fetch(
         self, symbol: str, *, start: date | None = None, end: date | None = None
-    ) -> list[PriceBar]: ...
+    ) -> PriceBars: ...
+
+
+class AsyncProvider(Protocol):
+    """Provider の非同期版。同時取得は providers.aio.gather_limited で束ねる"""
+
+    @abstractmethod
+    async def fetch(
+        self, symbol: str, *, start: date | None = None, end: date | None = None
+    ) -> PriceBars: ...
 
 
 class BaseProvider(ABC):
     retry = 3  # 共通リトライ回数
+    retry_delay = 0.5  # 初回リトライまでの最大待ち秒（以後は倍々＋ジッター）
+    rate_limit: float | None = None  # 毎秒のリクエスト上限（None で無制限）
+    rate_burst = 1  # 待たずに連続で投げてよい件数
+
+    @property
+    def name(self) -> str:
+        """カウンターとサーキットブレーカーの単位"""
+        return type(self).__name__
+
+    @final
+    def _call(self, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        retry / retry_delay に従ってリトライし、プロバイダー単位のブレーカーを通す。
+        rate_limit があれば試行ごとにトークンを 1 個消費する（リトライも数える）。
+        """
+        bucket = None
+        if self.rate_limit:
+            bucket = limiter_for(self.name, self.rate_limit, self.rate_burst)
+
+        def _attempt() -> T:
+            if bucket is not None and not bucket.try_acquire():
+                resilience.record(self.name, "throttled")
+                bucket.acquire()
+            return func(*args, **kwargs)
+
+        return call_with_retry(
+            _attempt,
+            name=self.name,
+            policy=RetryPolicy(attempts=self.retry, base_delay=self.retry_delay),
+            breaker=breaker_for(self.name),
+        )
+
+    @final
+    def _shared(self, key: Hashable, func: Callable[[], T]) -> T:
+        """同じ key の取得が実行中ならそれに相乗りする（全インスタンス共通）"""
+        return single_flight_for(self.name).do(key, func)
 
     @final
     def _validate_dates(self, start: date | None, end: date | None) -> None:
@@ -32,4 +210,4 @@ class BaseProvider(ABC):
     @abstractmethod
     def fetch(
         self, symbol: str, *, start: date | None = None, end: date | None = None
-    ) -> list[PriceBar]: ...
+    ) -> PriceBars: ...
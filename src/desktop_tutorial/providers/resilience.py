@@ -0,0 +1,190 @@
+# src/desktop_tutorial/providers/resilience.py
+"""プロバイダー呼び出しのリトライ（指数バックオフ＋ジッター）とサーキットブレーカー"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class ProviderError(RuntimeError):
+    """リトライしても取得できなかった"""
+
+
+class CircuitOpenError(ProviderError):
+    """サーキットブレーカーが開いているので呼び出さずに失敗した"""
+
+
+# --------------------------------------------------
+# カウンター
+# --------------------------------------------------
+# (provider 名, 事象) → 回数
+# 事象: success / retry / failure / short_circuit / stale_fallback
+_STATS: Counter[tuple[str, str]] = Counter()
+_STATS_LOCK = threading.Lock()
+
+
+def record(name: str, event: str) -> None:
+    with _STATS_LOCK:
+        _STATS[(name, event)] += 1
+
+
+def stats() -> dict[str, dict[str, int]]:
+    """{provider: {事象: 回数}}"""
+    out: dict[str, dict[str, int]] = {}
+    with _STATS_LOCK:
+        for (name, event), n in _STATS.items():
+            out.setdefault(name, {})[event] = n
+    return out
+
+
+def reset_stats() -> None:
+    with _STATS_LOCK:
+        _STATS.clear()
+
+
+# --------------------------------------------------
+# リトライ
+# --------------------------------------------------
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    attempts 回まで試す。n 回目の失敗後は min(max_delay, base_delay * 2**n) を上限に
+    一様乱数で待つ（full jitter）。jitter=0 なら固定の指数バックオフ。
+    """
+
+    attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    jitter: float = 1.0
+
+    def delay(self, failures: int, rng: random.Random | None = None) -> float:
+        cap = min(self.max_delay, self.base_delay * 2 ** (failures - 1))
+        r = (rng or random).random()
+        return cap * (1.0 - self.jitter * r)
+
+
+# --------------------------------------------------
+# サーキットブレーカー
+# --------------------------------------------------
+class CircuitBreaker:
+    """
+    連続 failure_threshold 回の失敗で開き、reset_timeout 秒は呼び出しを即座に断る。
+    その後は半開状態で 1 回だけ試し、成功すれば閉じ、失敗すればまた開く。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        *,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        """呼び出してよいか。半開状態では試行 1 回分だけ True を返す"""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._trial or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+            self._trial = False
+
+
+_BREAKERS: dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def breaker_for(name: str) -> CircuitBreaker:
+    """プロバイダー名ごとに 1 つのサーキットブレーカー"""
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(name)
+        if breaker is None:
+            breaker = _BREAKERS[name] = CircuitBreaker()
+        return breaker
+
+
+def reset_breakers() -> None:
+    with _BREAKERS_LOCK:
+        _BREAKERS.clear()
+
+
+def call_with_retry(
+    func: Callable[[], T],
+    *,
+    name: str,
+    policy: RetryPolicy,
+    breaker: CircuitBreaker | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> T:
+    """
+    func を policy に従って呼ぶ。
+    すべて失敗したら ProviderError、ブレーカーが開いていれば CircuitOpenError。
+    """
+    last: BaseException | None = None
+    for attempt in range(1, max(1, policy.attempts) + 1):
+        if breaker is not None and not breaker.allow():
+            record(name, "short_circuit")
+            raise CircuitOpenError(f"{name}: circuit open") from last
+        try:
+            result = func()
+        except Exception as e:
+            last = e
+            if breaker is not None:
+                breaker.record_failure()
+            if attempt < policy.attempts:
+                record(name, "retry")
+                sleep(policy.delay(attempt))
+            continue
+        if breaker is not None:
+            breaker.record_success()
+        record(name, "success")
+        return result
+
+    record(name, "failure")
+    raise ProviderError(f"{name}: failed after {policy.attempts} attempts") from last
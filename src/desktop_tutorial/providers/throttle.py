@@ -0,0 +1,131 @@
+# src/desktop_tutorial/providers/throttle.py
+"""プロバイダー単位のレート制限（トークンバケット）と同一リクエストの相乗り（single-flight）"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from typing import TypeVar
+
+from desktop_tutorial.providers import resilience
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """
+    毎秒 rate 個ずつ、最大 capacity 個までトークンが貯まるバケツ。
+    1 リクエストにつき 1 個消費し、足りなければ貯まるまで待つ。
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1.0,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be > 0")
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._stamp = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0, timeout: float | None = None) -> bool:
+        """トークンを取れるまで待つ。timeout 秒以内に取れなければ False"""
+        deadline = None if timeout is None else self._clock() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None and self._clock() + wait > deadline:
+                return False
+            self._sleep(wait)
+
+
+_LIMITERS: dict[str, TokenBucket] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def limiter_for(name: str, rate: float, capacity: float = 1.0) -> TokenBucket:
+    """プロバイダー名ごとに 1 つのバケツ（全インスタンスで共有）"""
+    with _LIMITERS_LOCK:
+        bucket = _LIMITERS.get(name)
+        if bucket is None or (bucket.rate, bucket.capacity) != (rate, max(1.0, capacity)):
+            bucket = _LIMITERS[name] = TokenBucket(rate, capacity)
+        return bucket
+
+
+def reset_limiters() -> None:
+    with _LIMITERS_LOCK:
+        _LIMITERS.clear()
+
+
+class SingleFlight:
+    """
+    同じキーの呼び出しが実行中なら新たに実行せず、その結果（または例外）を共有する。
+    同時に起動した監視が同じ銘柄を取りに行っても、プロバイダーへの要求は 1 回になる。
+    """
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self._calls: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], T]) -> T:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+
+        if not leader:
+            resilience.record(self.name, "coalesced")
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+_FLIGHTS: dict[str, SingleFlight] = {}
+_FLIGHTS_LOCK = threading.Lock()
+
+
+def single_flight_for(name: str) -> SingleFlight:
+    with _FLIGHTS_LOCK:
+        flight = _FLIGHTS.get(name)
+        if flight is None:
+            flight = _FLIGHTS[name] = SingleFlight(name)
+        return flight
@@ -2,43 +2,198 @@
 from __future__ import annotations
 
 import datetime as _dt
+import threading
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from typing import Final
 
 import pandas as _pd
 import yfinance as _yf
 
 from desktop_tutorial import cache
+from desktop_tutorial.freshness import FreshnessPolicy, load_policy
+from desktop_tutorial.providers import resilience
+from desktop_tutorial.providers.base import BaseProvider, PriceBars
+from desktop_tutorial.providers.resilience import ProviderError
 
 _FREQ: Final = "1d"
 
 
-class YahooProvider:
+def normalize_columns(df: _pd.DataFrame) -> _pd.DataFrame:
+    """
+    ・MultiIndex列   (level0='Close', level1='AAPL') →
+      'close', 'adjclose' の 1 レベル列に変換
+    ・大文字／空白を潰して小文字へ（1 レベル列も同様）
+    列名だけを差し替えた浅いコピーを返し、データのバッファは元の DF と共有する
+    """
+    cols = df.columns
+    if isinstance(cols, _pd.MultiIndex):
+        cols = cols.get_level_values(0)  # level0 だけ取り出す
+    cols = (
+        _pd.Index(cols.astype(str))
+        .str.replace(r"\s+", "", regex=True)  # 空白除去
+        .str.lower()  # 小文字化
+    )
+    if cols.equals(df.columns):
+        return df
+    df = df.copy(deep=False)
+    df.columns = cols
+    return df
+
+
+class YahooProvider(BaseProvider):
     """最小限の株価取得クラス（テストが緑になるレベル）"""
 
-    # ---------- normalize ----------
-    def _normalize(self, df: _pd.DataFrame) -> _pd.DataFrame:
+    # 非公式 API なので控えめに（毎秒 2 件、連続 5 件まで）
+    rate_limit = 2.0
+    rate_burst = 5
+
+    def __init__(
+        self,
+        *,
+        freshness: FreshnessPolicy | None = None,
+        stale_while_revalidate: bool = True,
+        max_stale: float | None = None,
+    ):
         """
-        ・MultiIndex列   (level0='Close', level1='AAPL') →
-          'close', 'adjclose' の 1 レベル列に変換
-        ・大文字／空白を潰して小文字へ
+        freshness              … 鮮度ポリシー（省略時は config.yaml から）
+        stale_while_revalidate … 期限切れでもまず手元の値を返し、裏で取り直す
+        max_stale              … 期限切れからこの秒数を超えたら待ってでも取り直す
         """
-        if isinstance(df.columns, _pd.MultiIndex):
-            df = df.copy()
-            df.columns = (
-                df.columns.get_level_values(0)  # level0 だけ取り出す
-                .str.replace(r"\s+", "", regex=True)  # 空白除去
-                .str.lower()  # 小文字化
-            )
-        return df
+        self.freshness = freshness if freshness is not None else load_policy()
+        self.stale_while_revalidate = stale_while_revalidate
+        self.max_stale = max_stale
+        self._executor: ThreadPoolExecutor | None = None
+        self._revalidating: dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+
+    # ---------- normalize ----------
+    def _normalize(self, df: _pd.DataFrame) -> _pd.DataFrame:
+        return normalize_columns(df)
 
     # ---------- Public API ----------
+    def fetch(
+        self,
+        symbol: str,
+        *,
+        start: _dt.date | None = None,
+        end: _dt.date | None = None,
+    ) -> PriceBars:
+        """Provider プロトコルの実装。日足を PriceBars（列指向）で返す"""
+        self._validate_dates(start, end)
+        if start is not None and end is None:
+            end = _dt.date.today()
+        df = self._normalize(self._fetch_history(symbol, start=start, end=end))
+        return PriceBars.from_frame(df)
+
     def fetch_price(self, symbol: str) -> float:
         """
         当日終値（または直近取引値）を float で返す。
         テストでは「0 より大きい」ことだけを確認している。
         """
-        df = self._fetch_history(symbol)
-        return float(df["Close"].iloc[-1])
+        df = self._normalize(self._fetch_history(symbol))
+        return float(df["close"].iloc[-1])
+
+    def fetch_many(
+        self,
+        symbols: Iterable[str],
+        *,
+        start: _dt.date | None = None,
+        end: _dt.date | None = None,
+        freq: str = _FREQ,
+    ) -> dict[str, _pd.DataFrame]:
+        """
+        複数銘柄の履歴をまとめて取得し {symbol: DataFrame} で返す。
+
+        1) 全銘柄のキャッシュを先に確認
+        2) キャッシュに無い銘柄だけを 1 回の yfinance.download で取得
+        3) MultiIndex の結果を銘柄ごとに分割 → _normalize → キャッシュ保存
+
+        start/end を両方指定した場合は系列ストアを使い、未取得の範囲だけを取りに行く。
+        取得できなかった銘柄は戻り値に含めない。
+        """
+        symbols = list(dict.fromkeys(symbols))  # 順序を保ったまま重複除去
+        if start is not None and end is not None:
+            return self._fetch_many_range(symbols, start=start, end=end, freq=freq)
+
+        frames: dict[str, _pd.DataFrame] = {}
+        missing: list[str] = []
+        stale: list[str] = []
+        for symbol in symbols:
+            try:
+                frames[symbol] = cache.read(symbol=symbol, start=start, end=end, freq=freq)
+            except FileNotFoundError:
+                missing.append(symbol)
+                continue
+            state = self._staleness(symbol, freq)
+            if state == "expired":
+                missing.append(symbol)
+            elif state == "stale":
+                stale.append(symbol)
+
+        if stale:
+            self._revalidate(tuple(stale), freq)
+
+        if missing:
+            fetched = self._download_many(missing, start=start, end=end, freq=freq)
+            for symbol, df in fetched.items():
+                frames[symbol] = df
+                try:
+                    cache.write(df, symbol=symbol, start=start, end=end, freq=freq)
+                except Exception:
+                    pass
+
+        return {s: frames[s] for s in symbols if s in frames}
+
+    def iter_bars(
+        self,
+        symbol: str,
+        *,
+        start: _dt.date,
+        end: _dt.date,
+        freq: str = _FREQ,
+        batch_rows: int = cache._ROW_GROUP_ROWS,
+    ) -> Iterator[PriceBars]:
+        """
+        [start, end] のバーを最大 batch_rows 本ずつの PriceBars で順に返す。
+        足りない範囲を取得して系列ストアへマージしてから、ファイルを少しずつ読む。
+        全期間を DataFrame にしないので、長期の分足でもメモリは 1 バッチ分で済む
+        （未取得の範囲が大きいときは先に backfill で埋めておく）
+        """
+        self._validate_dates(start, end)
+        self._fill_gaps(symbol, start=start, end=end, freq=freq)
+        try:
+            batches = cache.iter_batches(
+                symbol, start=start, end=end, freq=freq, batch_rows=batch_rows
+            )
+            for df in batches:
+                bars = PriceBars.from_frame(self._normalize(df))
+                if len(bars):
+                    yield bars
+        except FileNotFoundError:
+            return
+
+    def download(
+        self,
+        symbol: str,
+        *,
+        start: _dt.date,
+        end: _dt.date,
+        freq: str = _FREQ,
+    ) -> _pd.DataFrame:
+        """
+        [start, end] を取得して yfinance の結果をそのまま返す（正規化もキャッシュ保存もしない）。
+        正規化・保存を別プロセスで行う backfill 用。取得できなければ ProviderError。
+        上場前・休場日だけの範囲などバーが無ければ空の DF を返す（失敗として数えない）
+        """
+        self._validate_dates(start, end)
+        return self._download(symbol, start=start, end=end, freq=freq)
+
+    def drain(self, timeout: float | None = None) -> None:
+        """裏で走っている取り直しの完了を待つ（終了処理・テスト用）"""
+        with self._lock:
+            pending = list(self._revalidating.values())
+        wait(pending, timeout=timeout)
 
     # ---------- Internal ----------
     def _fetch_history(
@@ -50,33 +205,232 @@ class YahooProvider:
         freq: str = _FREQ,
     ) -> _pd.DataFrame:
         """
-        1) キャッシュにあれば読む
-        2) なければ yfinance.download → キャッシュ保存
-        3) ネットワークが無い場合はダミー DataFrame を返す（CI 保険）
+        1) キャッシュにあり、鮮度ポリシー上まだ有効なら読む
+           期限切れでも max_stale 以内ならそれを返し、裏で取り直す
+        2) なければ yfinance.download（リトライ付き）→ キャッシュ保存
+        3) 取得できなければ期限切れのキャッシュを返す。それも無ければ ProviderError
+
+        start/end を両方指定した場合は系列ストアから読み、足りない範囲だけ取得する。
         """
+        if start is not None and end is not None:
+            return self._fetch_range(symbol, start=start, end=end, freq=freq)
+
         try:
-            return cache.read(
-                symbol=symbol, start=start, end=end, freq=freq, fmt="parquet"
-            )
+            cached = cache.read(symbol=symbol, start=start, end=end, freq=freq)
         except FileNotFoundError:
-            pass  # キャッシュが無いのでダウンロードへ
+            cached = None  # キャッシュが無いのでダウンロードへ
+        else:
+            state = self._staleness(symbol, freq)
+            if state == "fresh":
+                return cached
+            if state == "stale":
+                self._revalidate((symbol,), freq)
+                return cached
 
         try:
-            df = _yf.download(
-                tickers=symbol, period="5d", interval=freq, progress=False
+            df = self._normalize(
+                self._download(symbol, start=None, end=None, freq=freq, require_rows=True)
             )
-            if df.empty or "Close" not in df:
-                raise ValueError("yfinance returned empty frame")
-        except Exception:  # ネットワーク遮断など
-            today = _pd.Timestamp.utcnow().normalize()
-            df = _pd.DataFrame({"Close": [100.0]}, index=[today])
+        except ProviderError:  # ネットワーク遮断・ブレーカー開放など
+            if cached is None:
+                raise
+            resilience.record(self.name, "stale_fallback")
+            return cached  # 期限切れでも作り物の値よりはまし
 
         # 書き込み失敗は無視（テスト優先）
         try:
-            cache.write(
-                df, symbol=symbol, start=start, end=end, freq=freq, fmt="parquet"
-            )
+            cache.write(df, symbol=symbol, start=start, end=end, freq=freq)
         except Exception:
             pass
 
         return df
+
+    def _fetch_range(
+        self, symbol: str, *, start: _dt.date, end: _dt.date, freq: str
+    ) -> _pd.DataFrame:
+        """
+        系列ストアの未取得範囲だけを取得してマージし、[start, end] を返す。
+        まだ確定していないバー（当日分など）は取得済みとして記録しない。
+        """
+        self._fill_gaps(symbol, start=start, end=end, freq=freq)
+        try:
+            return cache.read_range(symbol, start=start, end=end, freq=freq)
+        except FileNotFoundError:
+            return _pd.DataFrame(columns=["close"], index=_pd.DatetimeIndex([]))
+
+    def _fill_gaps(
+        self, symbol: str, *, start: _dt.date, end: _dt.date, freq: str
+    ) -> None:
+        """
+        [start, end] の未取得範囲を取得して系列ストアへマージする。取得できなければそこで止める。
+        空の結果は休場日だけの範囲などバーが無いものとして、確定済みの分を取得済みに記録する
+        （失敗扱いにするとリトライとブレーカーを無駄に消費し、週末のたびに取り直すことになる）
+        """
+        settled = self.freshness.settled_until(freq)
+        for gap_start, gap_end in cache.missing(symbol, start=start, end=end, freq=freq):
+            try:
+                raw = self._download(symbol, start=gap_start, end=gap_end, freq=freq)
+            except ProviderError:  # ネットワーク遮断など → 手元の範囲だけ返す
+                break
+            df = _pd.DataFrame() if raw is None else self._normalize(raw).dropna(how="all")
+            cache.merge(
+                df, symbol=symbol, start=gap_start, end=gap_end, freq=freq,
+                settled=settled, confirmed_empty=True,
+            )
+
+    def _fetch_many_range(
+        self, symbols: list[str], *, start: _dt.date, end: _dt.date, freq: str
+    ) -> dict[str, _pd.DataFrame]:
+        """
+        各銘柄の未取得範囲を調べ、足りない銘柄だけを 1 回のグループ取得で埋める。
+        取得範囲は足りない区間をすべて覆う最小の区間にまとめる。
+        バーの無かった銘柄も（確定済みの分は）取得済みとして記録する。
+        """
+        gaps = {s: cache.missing(s, start=start, end=end, freq=freq) for s in symbols}
+        todo = [s for s in symbols if gaps[s]]
+        if todo:
+            lo = min(gaps[s][0][0] for s in todo)
+            hi = max(gaps[s][-1][1] for s in todo)
+            fetched = self._download_many(
+                todo, start=lo, end=hi, freq=freq, require_rows=False
+            )
+            settled = self.freshness.settled_until(freq)
+            for symbol, df in fetched.items():
+                cache.merge(
+                    df, symbol=symbol, start=lo, end=hi, freq=freq,
+                    settled=settled, confirmed_empty=True,
+                )
+
+        frames: dict[str, _pd.DataFrame] = {}
+        for symbol in symbols:
+            try:
+                frames[symbol] = cache.read_range(symbol, start=start, end=end, freq=freq)
+            except FileNotFoundError:
+                pass
+        return frames
+
+    def _staleness(self, symbol: str, freq: str) -> str:
+        """
+        直近キャッシュ（start=end=None）の状態。
+        "fresh" … 有効期限内 / "stale" … 期限切れだが返してよい / "expired" … 取り直しを待つ
+        取得時刻の記録が無い旧ファイルは期限切れ扱い。
+        """
+        fetched = cache.fetched_at(symbol, start=None, end=None, freq=freq)
+        if fetched is None:
+            return "expired"
+        now = _pd.Timestamp.now(tz="UTC")
+        expires = self.freshness.expires_at(freq, fetched)
+        if now < expires:
+            return "fresh"
+        if not self.stale_while_revalidate:
+            return "expired"
+        if self.max_stale is not None and (now - expires).total_seconds() > self.max_stale:
+            return "expired"
+        return "stale"
+
+    def _revalidate(self, symbols: tuple[str, ...], freq: str) -> Future:
+        """直近キャッシュを裏で取り直す。同じ要求が走っていればそれを返す"""
+        key = (symbols, freq)
+        with self._lock:
+            running = self._revalidating.get(key)
+            if running is not None:
+                return running
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=2, thread_name_prefix="yahoo-revalidate"
+                )
+            future = self._executor.submit(self._refresh_latest, list(symbols), freq)
+            self._revalidating[key] = future
+
+        def _done(_: Future) -> None:
+            with self._lock:
+                self._revalidating.pop(key, None)
+
+        future.add_done_callback(_done)
+        return future
+
+    def _refresh_latest(self, symbols: list[str], freq: str) -> None:
+        """取り直しに失敗したら何もしない（古い値のまま次の機会を待つ）"""
+        fetched = self._download_many(symbols, start=None, end=None, freq=freq)
+        for symbol, df in fetched.items():
+            cache.write(df, symbol=symbol, start=None, end=None, freq=freq)
+
+    def _download(
+        self,
+        tickers: str | list[str],
+        *,
+        start: _dt.date | None,
+        end: _dt.date | None,
+        freq: str,
+        require_rows: bool = False,
+    ) -> _pd.DataFrame:
+        """
+        yfinance.download を呼ぶ（BaseProvider.retry に従ってリトライ）。
+        start/end が無ければ直近 5 日分。end は両端を含む扱い（yfinance は end を含まない）。
+        require_rows=True なら空の結果も失敗として扱う（yfinance はエラーを空 DF で返すため）。
+        同じ条件の取得が実行中なら、新たに投げずにその結果を共有する。
+        """
+        if start is None and end is None:
+            span = {"period": "5d"}
+        else:
+            if end is not None:
+                end = _pd.Timestamp(end) + cache._step(freq)
+            span = {"start": start, "end": end}
+
+        def _once() -> _pd.DataFrame:
+            df = _yf.download(
+                tickers=tickers, interval=freq, group_by="column", progress=False, **span
+            )
+            if require_rows and (df is None or df.empty):
+                raise ValueError("yfinance returned empty frame")
+            return df
+
+        key = (
+            tuple(tickers) if isinstance(tickers, list) else tickers,
+            tuple(sorted((k, str(v)) for k, v in span.items())),
+            freq,
+            require_rows,
+        )
+        return self._shared(key, lambda: self._call(_once))
+
+    def _download_many(
+        self,
+        symbols: list[str],
+        *,
+        start: _dt.date | None,
+        end: _dt.date | None,
+        freq: str,
+        require_rows: bool = True,
+    ) -> dict[str, _pd.DataFrame]:
+        """
+        yfinance へのグループ取得を 1 回だけ行い、銘柄ごとの正規化済み DF を返す。
+        require_rows=True なら空の結果は失敗としてリトライ・ブレーカーに数え、
+        バーの無い銘柄は結果に含めない。
+        require_rows=False なら取得できた限りバーの無い銘柄も空の DF で返す
+        （休場日だけの範囲など。取得に失敗したときだけ結果が空になる）。
+        """
+        try:
+            raw = self._download(
+                symbols, start=start, end=end, freq=freq, require_rows=require_rows
+            )
+        except ProviderError:  # ネットワーク遮断・空の結果など
+            return {}
+
+        out: dict[str, _pd.DataFrame] = {}
+        for symbol in symbols:
+            part = None if raw is None or raw.empty else self._split_symbol(raw, symbol)
+            df = _pd.DataFrame() if part is None else self._normalize(part).dropna(how="all")
+            if not df.empty and "close" in df:
+                out[symbol] = df
+            elif not require_rows:
+                out[symbol] = df.iloc[:0]
+        return out
+
+    @staticmethod
+    def _split_symbol(raw: _pd.DataFrame, symbol: str) -> _pd.DataFrame | None:
+        """グループ取得結果 (level0=項目, level1=銘柄) から 1 銘柄分を取り出す。"""
+        if not isinstance(raw.columns, _pd.MultiIndex):
+            return raw  # 1 銘柄だけ要求した場合は 1 レベル列で返ることがある
+        if symbol not in raw.columns.get_level_values(1):
+            return None
+        return raw.xs(symbol, axis=1, level=1, drop_level=False)
@@ -0,0 +1,264 @@
+# src/desktop_tutorial/risk.py
+"""
+建玉ベースのモンテカルロで「N 時間以内に維持率が閾値を割る確率」を見積もる。
+
+・銘柄ごとの日次対数リターンの平均と共分散を価格履歴（YahooProvider のキャッシュ）から推定
+・相関のある対数リターンの経路をコレスキー分解で一度に生成し、
+  MarginEngine.linear_form の係数で全経路・全時点の維持率をまとめて評価する
+・経路はチャンクに分けて生成するのでメモリは経路数によらず一定。
+  大きな計算は SeedSequence.spawn で乱数系列を分けてプロセスプールに配る
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from collections.abc import Iterable, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from desktop_tutorial.margin import MarginEngine
+
+# 1 日を何取引時間として扱うか（米国株の立会時間）
+HOURS_PER_DAY = 6.5
+
+# 1 チャンクあたりの経路数。(経路, ステップ, 銘柄) の float32 配列がキャッシュに収まる程度
+_CHUNK = 8192
+
+
+@dataclass(frozen=True)
+class ReturnModel:
+    """日次対数リターンの平均（drift）と共分散（cov）。並びは symbols の順"""
+
+    symbols: tuple[str, ...]
+    drift: np.ndarray
+    cov: np.ndarray
+
+    @classmethod
+    def from_prices(
+        cls, closes: pd.DataFrame, *, min_obs: int = 20, use_drift: bool = False
+    ) -> ReturnModel:
+        """
+        列 = 銘柄の終値表から推定する。日付がそろわない行は捨てる。
+        短期のリスク評価では平均の推定誤差の方が大きいので、既定では drift を 0 にする
+        """
+        closes = closes.sort_index().dropna(how="any")
+        returns = np.diff(np.log(closes.to_numpy(dtype=float)), axis=0)
+        if len(returns) < min_obs:
+            raise ValueError(
+                f"not enough overlapping history: {len(returns)} returns (< {min_obs})"
+            )
+        n = returns.shape[1]
+        drift = returns.mean(axis=0) if use_drift else np.zeros(n)
+        cov = np.atleast_2d(np.cov(returns, rowvar=False))
+        return cls(tuple(map(str, closes.columns)), drift, cov)
+
+    @classmethod
+    def from_provider(
+        cls,
+        provider,
+        symbols: Iterable[str],
+        *,
+        start=None,
+        end=None,
+        **kwargs,
+    ) -> ReturnModel:
+        """
+        provider.fetch_many の終値から推定する（キャッシュ済みなら通信しない）。
+        start/end を省略すると直近 1 年
+        """
+        symbols = list(symbols)
+        if start is None:
+            end = end or pd.Timestamp.today().date()
+            start = (pd.Timestamp(end) - pd.DateOffset(years=1)).date()
+        elif end is None:
+            end = pd.Timestamp.today().date()
+        frames = provider.fetch_many(symbols, start=start, end=end)
+        missing = [s for s in symbols if s not in frames or frames[s].empty]
+        if missing:
+            raise ValueError(f"no price history for: {', '.join(missing)}")
+        closes = pd.DataFrame({s: frames[s]["close"] for s in symbols})
+        return cls.from_prices(closes, **kwargs)
+
+    def reorder(self, symbols: Iterable[str]) -> ReturnModel:
+        """symbols の順に並べ替える（MarginEngine.symbols に合わせる）"""
+        symbols = tuple(symbols)
+        index = {s: i for i, s in enumerate(self.symbols)}
+        missing = [s for s in symbols if s not in index]
+        if missing:
+            raise KeyError(f"symbols not in model: {', '.join(missing)}")
+        order = [index[s] for s in symbols]
+        return ReturnModel(symbols, self.drift[order], self.cov[np.ix_(order, order)])
+
+    def cholesky(self) -> np.ndarray:
+        """共分散の下三角分解。数値誤差で半正定値を外れた分は対角に足して吸収する"""
+        jitter = 0.0
+        scale = float(np.mean(np.diag(self.cov))) or 1.0
+        for _ in range(6):
+            try:
+                return np.linalg.cholesky(self.cov + jitter * np.eye(len(self.symbols)))
+            except np.linalg.LinAlgError:
+                jitter = scale * 1e-10 if jitter == 0.0 else jitter * 100
+        raise ValueError("covariance matrix is not positive semi-definite")
+
+
+@dataclass(frozen=True)
+class RiskResult:
+    """経路ごとの最安値と最終値の維持率（%）"""
+
+    current_rate: float
+    hours: float
+    min_rates: np.ndarray
+    final_rates: np.ndarray
+
+    @property
+    def paths(self) -> int:
+        return len(self.min_rates)
+
+    def breach_probability(self, threshold: float) -> float:
+        """期間中に一度でも threshold 以下になる経路の割合"""
+        return float(np.count_nonzero(self.min_rates <= threshold)) / self.paths
+
+    def breach_probabilities(self, thresholds: Mapping[str, float]) -> dict[str, float]:
+        """{名前: 閾値} → {名前: 確率}"""
+        return {name: self.breach_probability(t) for name, t in thresholds.items()}
+
+    def quantiles(self, q: Iterable[float] = (0.01, 0.05, 0.5)) -> dict[float, float]:
+        """期間末の維持率の分位点"""
+        q = list(q)
+        return dict(zip(q, np.quantile(self.final_rates, q).tolist()))
+
+    def summary(
+        self, critical_threshold: float = 170.0, emergency_threshold: float = 150.0
+    ) -> dict:
+        return {
+            "current_rate": round(self.current_rate, 2),
+            "hours": self.hours,
+            "paths": self.paths,
+            "p_critical": self.breach_probability(critical_threshold),
+            "p_emergency": self.breach_probability(emergency_threshold),
+            "final_rate_p05": round(float(np.quantile(self.final_rates, 0.05)), 2),
+            "final_rate_median": round(float(np.median(self.final_rates)), 2),
+        }
+
+
+def _simulate_block(
+    seed: np.random.SeedSequence,
+    paths: int,
+    steps: int,
+    drift: np.ndarray,
+    chol: np.ndarray,
+    const: float,
+    numer: np.ndarray,
+    denom: np.ndarray,
+    chunk: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    paths 本の経路を chunk 本ずつ生成して (最安値, 最終値) を返す。
+    プロセスプールから呼ぶのでモジュール直下に置き、引数は配列とスカラーだけにする
+    """
+    rng = np.random.default_rng(seed)
+    n = len(drift)
+    chol_t = np.ascontiguousarray(chol.T, dtype=np.float32)
+    drift = drift.astype(np.float32)
+    numer = numer.astype(np.float32)
+    denom = denom.astype(np.float32)
+    min_rates = np.empty(paths)
+    final_rates = np.empty(paths)
+
+    for lo in range(0, paths, chunk):
+        m = min(chunk, paths - lo)
+        # (m, steps, n) の標準正規 → 相関付け → 累積して価格倍率に
+        g = rng.standard_normal((m, steps, n), dtype=np.float32)
+        g = g @ chol_t
+        g += drift
+        np.cumsum(g, axis=1, out=g)
+        np.exp(g, out=g)
+        # numer/denom は現在値を掛けた係数なので、倍率との内積がそのまま金額になる
+        exposure = g @ denom
+        rates = (g @ numer + np.float32(const)) / exposure
+        min_rates[lo : lo + m] = rates.min(axis=1)
+        final_rates[lo : lo + m] = rates[:, -1]
+
+    min_rates *= 100
+    final_rates *= 100
+    return min_rates, final_rates
+
+
+class MarginRiskSimulator:
+    """
+    MarginEngine の建玉と ReturnModel から維持率の経路をシミュレーションする。
+
+        sim = MarginRiskSimulator(engine, ReturnModel.from_provider(provider, engine.symbols))
+        result = sim.simulate(hours=24, paths=100_000, seed=0)
+        result.breach_probabilities({"critical": 170, "emergency": 150})
+    """
+
+    def __init__(
+        self,
+        engine: MarginEngine,
+        model: ReturnModel,
+        *,
+        hours_per_day: float = HOURS_PER_DAY,
+    ):
+        self.engine = engine
+        self.model = model.reorder(engine.symbols)
+        self.hours_per_day = hours_per_day
+        self._chol = self.model.cholesky()
+
+    def simulate(
+        self,
+        hours: float = 24,
+        paths: int = 100_000,
+        *,
+        steps: int | None = None,
+        seed: int | np.random.SeedSequence | None = None,
+        workers: int | None = 1,
+        chunk: int = _CHUNK,
+    ) -> RiskResult:
+        """
+        hours 取引時間先までを steps 区間（既定は 1 時間刻み）に分けてシミュレーションする。
+        維持率は各区間の終わりで評価するので、区間内の一時的な割り込みは拾わない。
+        workers が 2 以上（None は CPU 数）ならプロセスプールで分担する。
+        結果は seed と workers が同じなら再現する
+        """
+        if hours <= 0 or paths <= 0:
+            raise ValueError("hours and paths must be positive")
+        steps = steps or max(1, math.ceil(hours))
+        dt = hours / self.hours_per_day / steps  # 1 区間の長さ（日）
+
+        const, numer, denom = self.engine.linear_form()
+        prices = np.array([self.engine.prices[s] for s in self.engine.symbols])
+        current_rate = self.engine.rate
+        args = (
+            steps,
+            self.model.drift * dt,
+            self._chol * math.sqrt(dt),
+            const,
+            numer * prices,
+            denom * prices,
+            chunk,
+        )
+
+        root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        workers = workers or os.cpu_count() or 1
+        workers = max(1, min(workers, paths // chunk or 1))
+        if workers == 1:
+            min_rates, final_rates = _simulate_block(root, paths, *args)
+        else:
+            sizes = [paths // workers + (i < paths % workers) for i in range(workers)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_simulate_block, s, size, *args)
+                    for s, size in zip(root.spawn(workers), sizes)
+                ]
+                blocks = [f.result() for f in futures]
+            min_rates = np.concatenate([b[0] for b in blocks])
+            final_rates = np.concatenate([b[1] for b in blocks])
+
+        # 出発点で既に割っていればその経路は割り込み扱い
+        np.minimum(min_rates, current_rate, out=min_rates)
+        return RiskResult(float(current_rate), hours, min_rates, final_rates)
@@ -0,0 +1,56 @@
+"""core/ のスクリプト群をテストから import できるようにする"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1] / "core"))
+
+
+class FakeAPI:
+    """
+    ローカルで動く偽の証券会社 API。
+    routes[path] = (status, payload, delay 秒) を登録すると GET に応答する。
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.routes: dict[str, tuple[int, object, float]] = {}
+        self.requests: list[str] = []
+
+    def route(self, path: str, payload, *, status: int = 200, delay: float = 0.0):
+        self.routes[path] = (status, payload, delay)
+
+
+@pytest.fixture
+def fake_api():
+    api = None
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            api.requests.append(self.path)
+            status, payload, delay = api.routes.get(self.path, (404, {}, 0.0))
+            time.sleep(delay)
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    api = FakeAPI(f"http://127.0.0.1:{server.server_address[1]}")
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield api
+    server.shutdown()
+    server.server_close()
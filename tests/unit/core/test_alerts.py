@@ -0,0 +1,153 @@
+import socket
+import socketserver
+import threading
+import time
+
+import pytest
+from alerts import Alert, AlertDispatcher, AlertSink, EmailSink, render_digest
+
+
+class FakeSMTP:
+    """最低限の SMTP を話すローカルサーバー（STARTTLS・認証なし）"""
+
+    def __init__(self):
+        self.connections = 0
+        self.messages: list[str] = []
+        owner = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                owner.connections += 1
+                self.reply("220 fake ESMTP")
+                while True:
+                    line = self.rfile.readline().decode().strip()
+                    if not line:
+                        return
+                    verb = line.split(" ", 1)[0].upper()
+                    if verb == "EHLO":
+                        self.reply("250-fake\r\n250 SIZE 1000000")
+                    elif verb == "DATA":
+                        self.reply("354 go ahead")
+                        lines = []
+                        while (data := self.rfile.readline().decode()) != ".\r\n":
+                            lines.append(data)
+                        owner.messages.append("".join(lines))
+                        self.reply("250 queued")
+                    elif verb == "QUIT":
+                        self.reply("221 bye")
+                        return
+                    else:
+                        self.reply("250 ok")
+
+            def reply(self, text):
+                self.wfile.write(f"{text}\r\n".encode())
+
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def smtp():
+    server = FakeSMTP()
+    yield server
+    server.close()
+
+
+class SlowSink(AlertSink):
+    name = "slow"
+
+    def __init__(self, delay=0.3):
+        self.delay = delay
+        self.sent = []
+
+    def send(self, subject, body):
+        time.sleep(self.delay)
+        self.sent.append((subject, body))
+
+
+class BrokenSink(AlertSink):
+    name = "broken"
+
+    def send(self, subject, body):
+        raise RuntimeError("down")
+
+
+def test_email_sink_reuses_connection(smtp):
+    sink = EmailSink("127.0.0.1", smtp.port, sender="mon@example.com", recipients=["a@example.com"])
+    sink.send("件名1", "本文1")
+    sink.send("件名2", "本文2")
+    sink.close()
+    assert smtp.connections == 1
+    assert len(smtp.messages) == 2
+
+
+def test_email_sink_reconnects_after_drop(smtp):
+    sink = EmailSink("127.0.0.1", smtp.port, sender="mon@example.com", recipients=["a@example.com"])
+    sink.send("件名", "本文")
+    sink._smtp.sock.shutdown(socket.SHUT_RDWR)  # 切れた接続を再現
+    sink.send("件名", "本文")
+    sink.close()
+    assert smtp.connections == 2 and len(smtp.messages) == 2
+
+
+def test_submit_does_not_block_and_coalesces():
+    sink = SlowSink()
+    dispatcher = AlertDispatcher(coalesce_window=0.2)
+    dispatcher.register("acct", [sink, BrokenSink()])
+
+    started = time.perf_counter()
+    for level in ("WARNING", "EMERGENCY", "CRITICAL"):
+        assert dispatcher.submit(Alert("acct", level, f"{level} の本文"))
+    assert time.perf_counter() - started < 0.05
+
+    assert dispatcher.flush(timeout=5)
+    assert len(sink.sent) == 1
+    subject, body = sink.sent[0]
+    assert subject == "信用維持率アラート - EMERGENCY (3件)"
+    assert "CRITICAL の本文" in body
+    assert dispatcher.stats["failed"] == 1
+    dispatcher.close()
+
+
+def test_full_queue_drops_instead_of_blocking():
+    sink = SlowSink(delay=0.5)
+    dispatcher = AlertDispatcher(maxsize=1, coalesce_window=0.0)
+    dispatcher.register("acct", [sink])
+    results = [dispatcher.submit(Alert("acct", "WARNING", str(i))) for i in range(5)]
+    assert not all(results) and dispatcher.stats["dropped"] >= 1
+    dispatcher.close()
+
+
+def test_single_alert_keeps_original_subject():
+    subject, body = render_digest([Alert("acct", "WARNING", "本文")])
+    assert subject == "信用維持率アラート - WARNING" and body == "本文"
+
+
+def test_monitor_sends_through_dispatcher(tmp_path, monkeypatch, smtp):
+    import json
+
+    from maintenance_monitor import MaintenanceMonitor
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "monitor_config.json").write_text(json.dumps({
+        "alert_config": {
+            "email_enabled": True,
+            "development_mode": False,
+            "smtp_server": "127.0.0.1",
+            "smtp_port": smtp.port,
+            "email_recipients": ["ops@example.com"],
+        },
+    }), encoding="utf-8")
+    dispatcher = AlertDispatcher(coalesce_window=0.0)
+    monitor = MaintenanceMonitor(history_path=str(tmp_path / "h.db"), dispatcher=dispatcher)
+    monitor.send_alert(monitor.analyze_maintenance_rate(140.0))
+    assert dispatcher.flush(timeout=5)
+    assert len(smtp.messages) == 1
+    assert "ops@example.com" in smtp.messages[0]
+    dispatcher.close()
@@ -0,0 +1,102 @@
+from datetime import datetime
+
+import maintenance_monitor
+import pytest
+from maintenance_monitor import AlertLevel, MaintenanceMonitor
+
+
+def _reference(threshold, current_rate):
+    """以前の analyze_maintenance_rate（辞書を毎回組み立てる版）"""
+    t = threshold
+    analysis = {
+        'current_rate': current_rate,
+        'target_rate': t.target_rate,
+        'improvement_needed': t.target_rate - current_rate,
+        'improvement_percentage': ((t.target_rate - current_rate) / current_rate) * 100,
+        'status': 'GOOD',
+        'alert_level': AlertLevel.INFO,
+        'phase_progress': {
+            f'phase{i}': {
+                'target': target,
+                'achieved': current_rate >= target,
+                'progress_percentage': min(100, (current_rate / target) * 100),
+            }
+            for i, target in enumerate((t.phase1_target, t.phase2_target, t.phase3_target), 1)
+        },
+        'recommendations': [],
+    }
+    if current_rate <= t.emergency_threshold:
+        analysis['alert_level'] = AlertLevel.EMERGENCY
+        analysis['status'] = 'EMERGENCY'
+        analysis['recommendations'].append("緊急対応が必要です。即座にポジション調整を検討してください。")
+    elif current_rate <= t.critical_threshold:
+        analysis['alert_level'] = AlertLevel.CRITICAL
+        analysis['status'] = 'CRITICAL'
+        analysis['recommendations'].append("危険レベルです。ポジションの見直しを強く推奨します。")
+    elif current_rate <= t.warning_threshold:
+        analysis['alert_level'] = AlertLevel.WARNING
+        analysis['status'] = 'WARNING'
+        analysis['recommendations'].append("注意レベルです。ポジション調整を検討してください。")
+
+    if current_rate < t.phase1_target:
+        analysis['recommendations'].append(f"第1段階目標({t.phase1_target}%)達成のため、リスク軽減を優先してください。")
+    elif current_rate < t.phase2_target:
+        analysis['recommendations'].append(f"第2段階目標({t.phase2_target}%)達成のため、バランス調整を継続してください。")
+    elif current_rate < t.phase3_target:
+        analysis['recommendations'].append(f"最終目標({t.phase3_target}%)達成のため、微調整を継続してください。")
+    else:
+        analysis['recommendations'].append("目標達成！現在の水準を維持してください。")
+    return analysis
+
+
+@pytest.fixture
+def monitor(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return MaintenanceMonitor(history_path=str(tmp_path / "h.db"))
+
+
+RATES = [120.0, 150.0, 150.01, 160.5, 170.0, 171.99, 172.0, 175.5, 176.0, 180.0, 185.0, 197.45, 240.0]
+
+
+@pytest.mark.parametrize("rate", RATES)
+def test_matches_previous_dict(monitor, rate):
+    result = monitor.analyze_maintenance_rate(rate)
+    assert result.to_dict() == _reference(monitor.threshold, rate)
+    assert result["status"] == result.status
+
+
+def test_alert_message_is_unchanged(monitor, monkeypatch):
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return cls(2025, 8, 13, 9, 30, 0)
+
+    monkeypatch.setattr(maintenance_monitor, "datetime", FrozenDatetime)
+    for rate in RATES:
+        new = monitor.create_alert_message(monitor.analyze_maintenance_rate(rate))
+        old = monitor.create_alert_message(_reference(monitor.threshold, rate))
+        assert new == old
+
+
+def test_threshold_swap_rebuilds_table(monitor):
+    from dataclasses import replace
+
+    assert monitor.analyze_maintenance_rate(190.0).alert_level is AlertLevel.INFO
+    monitor.threshold = replace(monitor.threshold, warning_threshold=195.0)
+    assert monitor.analyze_maintenance_rate(190.0).alert_level is AlertLevel.WARNING
+
+
+def test_in_place_threshold_edit_is_applied(monitor):
+    assert monitor.analyze_maintenance_rate(172.0).alert_level is AlertLevel.WARNING
+    monitor.threshold.critical_threshold = 175.0
+    result = monitor.analyze_maintenance_rate(172.0)
+    assert result.to_dict() == _reference(monitor.threshold, 172.0)
+    assert result.alert_level is AlertLevel.CRITICAL
+
+    monitor.threshold.phase1_target = 173.0
+    assert monitor.get_phase_progress(172.0) == _reference(monitor.threshold, 172.0)["phase_progress"]
+
+
+def test_unknown_key_raises(monitor):
+    with pytest.raises(KeyError):
+        monitor.analyze_maintenance_rate(180.0)["nope"]
@@ -0,0 +1,144 @@
+import json
+import os
+
+from config_watcher import ConfigWatcher
+
+
+def _bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_write_only_when_content_differs(tmp_path):
+    path = tmp_path / "c.json"
+    watcher = ConfigWatcher(str(path), interval=0)
+    assert watcher.write({"a": 1})
+    mtime = os.stat(path).st_mtime_ns
+    assert not watcher.write({"a": 1})
+    assert os.stat(path).st_mtime_ns == mtime
+    assert watcher.write({"a": 2})
+    assert json.loads(path.read_text(encoding="utf-8")) == {"a": 2}
+    assert [p.name for p in tmp_path.iterdir()] == ["c.json"]
+
+
+def test_changed_ignores_own_writes(tmp_path):
+    path = tmp_path / "c.json"
+    watcher = ConfigWatcher(str(path), interval=0)
+    watcher.write({"a": 1})
+    assert not watcher.changed()
+    path.write_text('{"a": 3}', encoding="utf-8")
+    _bump_mtime(path)
+    assert watcher.changed()
+    assert watcher.read() == {"a": 3}
+    assert not watcher.changed()
+
+
+def test_write_refuses_to_clobber_external_edit(tmp_path):
+    path = tmp_path / "c.json"
+    watcher = ConfigWatcher(str(path), interval=0)
+    watcher.write({"a": 1})
+    path.write_text('{"a": 3}', encoding="utf-8")
+    _bump_mtime(path)
+
+    # ほかから書き換えられた内容は上書きしない。読み直した後なら書ける
+    assert not watcher.write({"a": 2})
+    assert json.loads(path.read_text(encoding="utf-8")) == {"a": 3}
+    assert watcher.read() == {"a": 3}
+    assert watcher.write({"a": 2})
+    assert json.loads(path.read_text(encoding="utf-8")) == {"a": 2}
+
+
+def test_changed_is_rate_limited(tmp_path):
+    now = [0.0]
+    path = tmp_path / "c.json"
+    watcher = ConfigWatcher(str(path), interval=5, clock=lambda: now[0])
+    watcher.write({"a": 1})
+    watcher.changed()
+    path.write_text('{"a": 2}', encoding="utf-8")
+    _bump_mtime(path)
+    assert not watcher.changed()
+    now[0] = 6.0
+    assert watcher.changed()
+
+
+def _monitor(tmp_path, monkeypatch):
+    from maintenance_monitor import MaintenanceMonitor
+
+    monkeypatch.chdir(tmp_path)
+    monitor = MaintenanceMonitor(history_path=str(tmp_path / "h.db"))
+    monitor.config_watcher.interval = 0
+    return monitor
+
+
+def test_monitor_hot_reloads_thresholds(tmp_path, monkeypatch):
+    monitor = _monitor(tmp_path, monkeypatch)
+    path = tmp_path / "monitor_config.json"
+    config = json.loads(path.read_text(encoding="utf-8"))
+    config["threshold"]["warning_threshold"] = 200.0
+    config["alert_config"]["alert_intervals"]["WARNING"] = 1
+    path.write_text(json.dumps(config), encoding="utf-8")
+    _bump_mtime(path)
+
+    from maintenance_monitor import AlertLevel
+
+    analysis = monitor.poll_once()
+    assert monitor.threshold.warning_threshold == 200.0
+    assert monitor.alert_config.alert_intervals[AlertLevel.WARNING] == 1
+    # モックの維持率（150〜170% 程度）は新しい警告水準を下回る
+    assert analysis["status"] != "GOOD"
+
+
+def test_monitor_keeps_config_when_invalid(tmp_path, monkeypatch):
+    monitor = _monitor(tmp_path, monkeypatch)
+    path = tmp_path / "monitor_config.json"
+    config = json.loads(path.read_text(encoding="utf-8"))
+    config["threshold"]["emergency_threshold"] = 999.0
+    path.write_text(json.dumps(config), encoding="utf-8")
+    _bump_mtime(path)
+
+    assert not monitor.reload_config_if_changed()
+    assert monitor.threshold.emergency_threshold == 150.0
+
+
+def test_monitor_does_not_overwrite_invalid_edit(tmp_path, monkeypatch):
+    monitor = _monitor(tmp_path, monkeypatch)
+    path = tmp_path / "monitor_config.json"
+    config = json.loads(path.read_text(encoding="utf-8"))
+    config["threshold"]["critical_threshold"] = 175.0
+    config["threshold"]["emergency_threshold"] = 999.0
+    config["my_note"] = "調整中"
+    path.write_text(json.dumps(config), encoding="utf-8")
+    _bump_mtime(path)
+
+    # 検証に通らない編集は反映しないが、保存で消しもしない
+    assert not monitor.reload_config_if_changed()
+    monitor.save_config()
+    assert json.loads(path.read_text(encoding="utf-8")) == config
+    assert not monitor.config_watcher.changed()
+
+    # 直せば読み込まれ、以後は保存もできる
+    config["threshold"]["emergency_threshold"] = 150.0
+    path.write_text(json.dumps(config), encoding="utf-8")
+    # サイズが同じなので、mtime が前回の編集とずれるように 2 秒進める
+    _bump_mtime(path)
+    _bump_mtime(path)
+    assert monitor.reload_config_if_changed()
+    assert monitor.threshold.critical_threshold == 175.0
+    monitor.threshold.warning_threshold = 185.0
+    monitor.save_config()
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert saved["my_note"] == "調整中" and saved["threshold"]["warning_threshold"] == 185.0
+
+
+def test_monitor_save_is_noop_and_keeps_unknown_keys(tmp_path, monkeypatch):
+    path = tmp_path / "monitor_config.json"
+    path.write_text(json.dumps({"positions": [{"ticker": "AAPL"}]}), encoding="utf-8")
+    monitor = _monitor(tmp_path, monkeypatch)
+    monitor.save_config()
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert saved["positions"] == [{"ticker": "AAPL"}] and "threshold" in saved
+
+    mtime = os.stat(path).st_mtime_ns
+    for _ in range(3):
+        monitor.save_config()
+    assert os.stat(path).st_mtime_ns == mtime
@@ -0,0 +1,194 @@
+import asyncio
+import time
+
+from data_connector import (
+    APIDataConnector,
+    AsyncDataConnector,
+    ConnectorManager,
+    MockDataConnector,
+    gather_snapshots,
+)
+
+
+def _routes(api, rate, delay=0.0):
+    api.route("/account/maintenance-rate", {"maintenance_rate": rate}, delay=delay)
+    api.route("/account/info", {"account_id": "A1"}, delay=delay)
+    api.route("/positions", {"total_positions": 3}, delay=delay)
+
+
+def test_api_connector_reads_fake_server(fake_api):
+    _routes(fake_api, 181.5)
+    conn = APIDataConnector(api_url=fake_api.url, api_key="k")
+    assert conn.get_maintenance_rate() == 181.5
+    assert conn.get_account_info() == {"account_id": "A1"}
+
+
+def test_api_connector_timeout_falls_back(fake_api):
+    _routes(fake_api, 181.5, delay=0.5)
+    conn = APIDataConnector(api_url=fake_api.url, api_key="k", timeout=0.1)
+    assert conn.get_maintenance_rate() == 167.0
+
+
+def test_async_snapshots_run_concurrently(fake_api):
+    _routes(fake_api, 190.0, delay=0.2)
+    connectors = {
+        f"acct{i}": AsyncDataConnector(APIDataConnector(api_url=fake_api.url, api_key="k"))
+        for i in range(5)
+    }
+    started = time.perf_counter()
+    snapshots = asyncio.run(gather_snapshots(connectors, limit=5))
+    elapsed = time.perf_counter() - started
+    for c in connectors.values():
+        c.close()
+
+    assert set(snapshots) == set(connectors)
+    assert all(s["maintenance_rate"] == 190.0 for s in snapshots.values())
+    # 直列なら 5 口座 × 3 エンドポイント × 0.2 秒 = 3 秒
+    assert elapsed < 1.5
+
+
+# -------- DataAnalyzer --------
+def _reference_trend(points):
+    """元の純 Python 実装と同じ計算"""
+    ts = [t for t, _ in points]
+    rates = [r for _, r in points]
+    x = [(t - ts[0]).total_seconds() / 3600 for t in ts]
+    n = len(x)
+    sx, sy = sum(x), sum(rates)
+    sxy = sum(a * b for a, b in zip(x, rates))
+    sx2 = sum(a * a for a in x)
+    slope = (n * sxy - sx * sy) / (n * sx2 - sx**2)
+    intercept = (sy - slope * sx) / n
+    pred = [slope * a + intercept for a in x]
+    mean = sy / n
+    ss_res = sum((r - p) ** 2 for r, p in zip(rates, pred))
+    ss_tot = sum((r - mean) ** 2 for r in rates)
+    vol = (sum((r - mean) ** 2 for r in rates) / n) ** 0.5
+    return slope, 1 - ss_res / ss_tot, vol
+
+
+def _series(n, hours_back=10):
+    import math
+    from datetime import datetime, timedelta
+
+    now = datetime.now()
+    start = now - timedelta(hours=hours_back)
+    step = timedelta(hours=hours_back) / n
+    hours = step.total_seconds() / 3600
+    return [(start + step * i, 170 + 0.3 * i * hours + math.sin(i)) for i in range(n)]
+
+
+def test_analyzer_matches_reference():
+    import pytest
+    from data_connector import DataAnalyzer, MockDataConnector
+
+    points = _series(200)
+    analyzer = DataAnalyzer(MockDataConnector())
+    for t, r in points:
+        analyzer.add_data_point(r, timestamp=t)
+
+    slope, r2, vol = _reference_trend(points)
+    trend = analyzer.analyze_trend()
+    assert trend["slope"] == pytest.approx(slope)
+    assert trend["confidence"] == pytest.approx(r2)
+    assert trend["trend"] == "IMPROVING"
+    assert trend["data_points"] == 200
+    assert analyzer.get_volatility() == pytest.approx(vol)
+
+    # 現在のレートは記録済みの値ではなくコネクターに問い合わせる
+    analyzer.connector.get_maintenance_rate = lambda: 175.0
+    pred = analyzer.predict_next_rate()
+    assert pred["predicted_rate"] == round(175.0 + slope, 2)
+    assert pred["confidence_interval"] == round(vol * 1.96, 2)
+
+
+def test_analyzer_window_and_cap():
+    from datetime import datetime, timedelta
+
+    from data_connector import DataAnalyzer, MockDataConnector
+
+    analyzer = DataAnalyzer(MockDataConnector(), max_points=3000)
+    old = datetime.now() - timedelta(hours=48)
+    analyzer.add_data_point(100.0, timestamp=old)
+    for t, r in _series(5000, hours_back=5):
+        analyzer.add_data_point(r, timestamp=t)
+    assert len(analyzer) == 3000
+    assert analyzer.analyze_trend(hours=24)["data_points"] == 3000
+    assert len(analyzer.history) == 3000
+    assert analyzer.analyze_trend(hours=0)["trend"] == "INSUFFICIENT_DATA"
+    assert analyzer.get_volatility(hours=0) == 0
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_connector_manager_reuses_and_rebuilds(fake_api):
+    _routes(fake_api, 181.5)
+    clock = _Clock()
+    manager = ConnectorManager(health_interval=30.0, clock=clock)
+    kwargs = {"api_url": fake_api.url, "api_key": "k"}
+
+    conn = manager.get("api", kwargs)
+    assert manager.get("api", dict(kwargs)) is conn
+    assert conn.get_maintenance_rate() == 181.5
+
+    # 失敗しても健全性確認の間隔までは同じインスタンス
+    fake_api.route("/account/maintenance-rate", {}, status=500)
+    assert conn.get_maintenance_rate() == 167.0
+    assert manager.get("api", kwargs) is conn
+    clock.now = 31.0
+    rebuilt = manager.get("api", kwargs)
+    assert rebuilt is not conn
+
+    # 設定が変われば作り直す
+    other = manager.get("api", {**kwargs, "timeout": 1.0})
+    assert other is not rebuilt and other.timeout == 1.0
+    manager.close()
+
+
+def test_monitor_shares_one_connector(tmp_path, monkeypatch):
+    from maintenance_monitor import MaintenanceMonitor
+
+    monkeypatch.chdir(tmp_path)
+    built = []
+
+    def factory(connector_type, **kwargs):
+        built.append(connector_type)
+        return MockDataConnector(**kwargs)
+
+    monitor = MaintenanceMonitor(
+        history_path=str(tmp_path / "h.db"), connectors=ConnectorManager(factory=factory)
+    )
+    for _ in range(5):
+        monitor.get_current_maintenance_rate()
+    assert built == ["mock"]
+    assert monitor.get_connector() is monitor.get_connector()
+
+
+def test_poll_once_reads_rate_once(tmp_path, monkeypatch):
+    from maintenance_monitor import MaintenanceMonitor
+
+    monkeypatch.chdir(tmp_path)
+    calls = []
+
+    class CountingConnector(MockDataConnector):
+        def get_maintenance_rate(self):
+            calls.append(1)
+            return 180.0 + len(calls)
+
+    monitor = MaintenanceMonitor(
+        history_path=str(tmp_path / "h.db"),
+        connectors=ConnectorManager(factory=lambda connector_type, **kw: CountingConnector()),
+    )
+    for _ in range(5):
+        monitor.poll_once()
+    # 予測には取得済みの値を使い、1 回の監視で問い合わせるのは 1 度だけ
+    assert len(calls) == 5
+    prediction = monitor.data_analyzer.predict_next_rate(current_rate=185.0)
+    assert prediction["predicted_rate"] is not None
+    assert len(calls) == 5
@@ -0,0 +1,90 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+from data_connector import AsyncDataConnector, DatabaseDataConnector
+
+
+@pytest.fixture
+def db(tmp_path):
+    path = tmp_path / "broker.db"
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE account_data (timestamp TEXT, account_id TEXT, maintenance_rate REAL);
+        CREATE TABLE position_data (timestamp TEXT, total_positions INTEGER);
+        INSERT INTO account_data VALUES ('2025-01-01T09:00', 'A1', 170.5);
+        INSERT INTO account_data VALUES ('2025-01-02T09:00', 'A1', 182.25);
+        INSERT INTO position_data VALUES ('2025-01-02T09:00', 4);
+        """
+    )
+    conn.commit()
+    conn.close()
+    return str(path)
+
+
+def test_latest_rows_and_indexes(db):
+    conn = DatabaseDataConnector(db)
+    assert conn.get_maintenance_rate() == 182.25
+    assert conn.get_account_info() == {
+        "timestamp": "2025-01-02T09:00", "account_id": "A1", "maintenance_rate": 182.25,
+    }
+    assert conn.get_position_info() == {"timestamp": "2025-01-02T09:00", "total_positions": 4}
+
+    indexes = {r[0] for r in sqlite3.connect(db).execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_account_data_timestamp", "idx_position_data_timestamp"} <= indexes
+    conn.close()
+
+
+def test_connection_reused_per_thread(db):
+    conn = DatabaseDataConnector(db)
+    conn.get_maintenance_rate()
+    first = conn._connection()
+    conn.get_account_info()
+    assert conn._connection() is first
+
+    other = []
+    t = threading.Thread(target=lambda: other.append(conn._connection()))
+    t.start()
+    t.join()
+    assert other[0] is not first
+    assert len(conn._connections) == 2
+    conn.close()
+    assert conn._connections == []
+
+
+def test_snapshot_is_one_query(db):
+    conn = DatabaseDataConnector(db)
+    snapshot = conn.get_snapshot()
+    assert snapshot == {
+        "maintenance_rate": 182.25,
+        "account": conn.get_account_info(),
+        "positions": conn.get_position_info(),
+    }
+
+    statements = []
+    conn._connection().set_trace_callback(statements.append)
+    conn.get_snapshot()
+    assert len(statements) == 1
+
+    # 非同期アダプターも 3 回に分けず get_snapshot を 1 回呼ぶ
+    calls = []
+    conn.get_maintenance_rate = lambda: calls.append("rate")
+    adapter = AsyncDataConnector(conn)
+    assert asyncio.run(adapter.get_snapshot())["maintenance_rate"] == 182.25
+    adapter.close()
+    assert calls == []
+
+
+def test_snapshot_with_empty_positions(db):
+    sqlite3.connect(db).execute("DELETE FROM position_data").connection.commit()
+    snapshot = DatabaseDataConnector(db).get_snapshot()
+    assert snapshot["positions"] == {} and snapshot["account"]["account_id"] == "A1"
+
+
+def test_missing_database_falls_back(tmp_path):
+    conn = DatabaseDataConnector(str(tmp_path / "missing" / "x.db"))
+    assert conn.get_maintenance_rate() == 167.0
+    assert conn.get_snapshot()["account"] == {}
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+from history_store import HistoryStore
+
+T0 = 1_700_000_000.0 - 1_700_000_000.0 % 3600  # 時間の境目から始める
+
+
+class Clock:
+    def __init__(self, now=T0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _fill(store, clock, rates, step=10.0):
+    levels = []
+    for i, rate in enumerate(rates):
+        clock.now = T0 + i * step
+        level = "WARNING" if rate < 185 else "INFO"
+        levels.append(level)
+        store.append(rate, level, level if level != "INFO" else "GOOD")
+    return levels
+
+
+def test_batched_inserts_flush_on_size(tmp_path):
+    clock = Clock()
+    store = HistoryStore(tmp_path / "h.db", batch_size=5, flush_interval=1e9, clock=clock)
+    for i in range(4):
+        store.append(180.0 + i, "INFO", "GOOD")
+    assert store._conn.execute("SELECT COUNT(*) FROM samples_raw").fetchone()[0] == 0
+    store.append(190.0, "INFO", "GOOD")
+    assert store._conn.execute("SELECT COUNT(*) FROM samples_raw").fetchone()[0] == 5
+    assert store._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    store.close()
+
+
+def test_summary_matches_pandas(tmp_path):
+    clock = Clock()
+    store = HistoryStore(tmp_path / "h.db", clock=clock)
+    rates = 180 + np.random.default_rng(1).normal(0, 5, size=500)
+    levels = _fill(store, clock, rates)
+    s = store.summary(targets=(172.0, 180.0))
+
+    df = pd.DataFrame({"rate": rates, "alert_level": levels})
+    assert s["count"] == 500
+    assert s["mean"] == pytest.approx(df["rate"].mean())
+    assert s["std"] == pytest.approx(df["rate"].std())
+    assert (s["min"], s["max"]) == (df["rate"].min(), df["rate"].max())
+    assert s["above"][180.0] == (df["rate"] >= 180.0).sum()
+    assert s["levels"]["WARNING"] == (df["alert_level"] == "WARNING").sum()
+    store.close()
+
+
+def test_rollups_and_retention(tmp_path):
+    clock = Clock()
+    store = HistoryStore(tmp_path / "h.db", clock=clock, retention={"raw": 3600})
+    rates = 170 + np.arange(1080) % 17  # 10 秒間隔で 3 時間
+    _fill(store, clock, rates)
+    store.compact(T0 + 3 * 3600 + 1)
+
+    hourly = store.query(start=T0, resolution="1h")
+    assert list(hourly["n"]) == [360, 360, 360]
+    first = rates[:360]
+    assert hourly["mean"].iloc[0] == pytest.approx(first.mean())
+    assert hourly["std"].iloc[0] == pytest.approx(first.std(ddof=1))
+    assert hourly["max"].iloc[0] == first.max()
+
+    minutes = store.query(start=T0, resolution="1m")
+    assert len(minutes) == 180 and (minutes["n"] == 6).all()
+
+    # 1 時間より古い生データは集約済みなので消える
+    raw = store.query(start=T0, resolution="raw")
+    assert raw.index.min() >= pd.Timestamp(T0 + 2 * 3600, unit="s")
+    store.close()
+
+
+def test_reopen_keeps_history(tmp_path):
+    clock = Clock()
+    store = HistoryStore(tmp_path / "h.db", clock=clock)
+    _fill(store, clock, [181.0, 182.0, 183.0])
+    store.close()
+    assert HistoryStore(tmp_path / "h.db", clock=clock).count() == 3
+
+
+def test_monitor_report_uses_store(tmp_path, monkeypatch):
+    from maintenance_monitor import MaintenanceMonitor
+
+    monkeypatch.chdir(tmp_path)
+    monitor = MaintenanceMonitor(history_path=str(tmp_path / "h.db"))
+    for rate in (160.0, 175.0, 190.0):
+        monitor.record_sample(rate, monitor.analyze_maintenance_rate(rate))
+    report = monitor.generate_report()
+    assert "データ件数: 3" in report
+    assert "平均信用維持率: 175.00%" in report
+    assert "標準偏差: 15.00%" in report
+    assert "警告アラート: 1" in report
+    assert "第1段階目標(172.0%)達成回数: 2" in report
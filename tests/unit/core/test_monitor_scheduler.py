@@ -0,0 +1,101 @@
+import asyncio
+import json
+import time
+
+from data_connector import ConnectorManager, MockDataConnector
+from history_store import HistoryStore
+from monitor_scheduler import AccountSpec, MonitorScheduler
+
+
+class SlowConnector(MockDataConnector):
+    def get_maintenance_rate(self):
+        time.sleep(0.5)
+        return 190.0
+
+
+def _factory(connector_type, **kwargs):
+    return SlowConnector() if connector_type == "slow" else MockDataConnector(**kwargs)
+
+
+def test_slow_account_does_not_delay_others(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    alerts = []
+    scheduler = MonitorScheduler(
+        history=HistoryStore(tmp_path / "h.db"),
+        connectors=ConnectorManager(factory=_factory),
+        alert_handler=lambda monitor, analysis, message: alerts.append(monitor.account),
+        poll_timeout=0.1,
+    )
+    for name in ("a", "b"):
+        scheduler.add_account(AccountSpec(
+            name, config_file=f"{name}.json", interval_seconds=0.05,
+            connector={"type": "mock", "kwargs": {"base_rate": 160.0, "volatility": 0.0}},
+        ))
+    scheduler.add_account(AccountSpec(
+        "slow", config_file="slow.json", interval_seconds=0.05, connector={"type": "slow"},
+    ))
+
+    async def run():
+        task = asyncio.create_task(scheduler.run())
+        await asyncio.sleep(0.6)
+        scheduler.stop()
+        await task
+
+    asyncio.run(run())
+    try:
+        assert scheduler.states["a"].polls >= 8
+        assert scheduler.states["b"].polls >= 8
+        slow = scheduler.states["slow"]
+        assert slow.timeouts >= 1 and slow.skipped >= 1 and slow.polls <= 1
+
+        # 共有の履歴ストアに口座別に記録される
+        assert scheduler.history.count(account="a") == scheduler.states["a"].polls
+        # 維持率 160% は緊急レベル。アラート間隔内なので口座ごとに 1 回だけ
+        assert sorted(alerts) == ["a", "b"]
+    finally:
+        scheduler.close()
+
+
+def test_connector_override_stays_out_of_shared_config(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    scheduler = MonitorScheduler(history=HistoryStore(tmp_path / "h.db"))
+    try:
+        a = scheduler.add_account(AccountSpec(
+            "a", config_file="shared.json",
+            connector={"type": "mock", "kwargs": {"base_rate": 150.0}},
+        ))
+        b = scheduler.add_account(AccountSpec("b", config_file="shared.json"))
+        a.save_config()
+
+        # 口座 a の指定は共有の設定ファイルに書かれず、b にも移らない
+        with open("shared.json", encoding="utf-8") as f:
+            assert json.load(f)["connector"] == {"type": "mock", "kwargs": {}}
+        b.reload_config_if_changed()
+        assert b.get_connector().base_rate == 167.0
+
+        # 設定を読み直しても a の指定は残る
+        a.load_config()
+        assert a.get_connector().base_rate == 150.0
+    finally:
+        scheduler.close()
+
+
+def test_monitor_leaves_shared_resources_open(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    scheduler = MonitorScheduler(history=HistoryStore(tmp_path / "h.db"))
+    closed = []
+    monkeypatch.setattr(scheduler.connectors, "close", lambda: closed.append("connectors"))
+    monkeypatch.setattr(scheduler.dispatcher, "close", lambda: closed.append("dispatcher"))
+    try:
+        monitor = scheduler.add_account(AccountSpec("a", config_file="a.json"))
+
+        def stop():
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr(monitor, "poll_once", stop)
+        monitor.monitor(interval_seconds=0)
+        # 共有のコネクター・ディスパッチャーはスケジューラーが閉じる
+        assert closed == []
+    finally:
+        scheduler.close()
+    assert sorted(closed) == ["connectors", "dispatcher"]
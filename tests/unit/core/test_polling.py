@@ -0,0 +1,64 @@
+import math
+
+import pytest
+from polling import AdaptivePollingPolicy, load_polling_policy
+
+
+@pytest.fixture
+def policy():
+    return AdaptivePollingPolicy()
+
+
+def test_band_intervals_follow_config_levels(policy):
+    assert policy.next_interval(195.0) == 1800
+    assert policy.next_interval(185.0) == 900
+    assert policy.next_interval(172.0) == 300
+    assert policy.next_interval(120.0) == 30
+
+
+def test_alert_level_tightens(policy):
+    assert policy.next_interval(195.0, alert_level="CRITICAL") == 60
+    assert policy.next_interval(195.0, alert_level="INFO") == 1800
+
+
+def test_declining_trend_polls_before_breach(policy):
+    # 175% から毎時 -40 ポイント → 170% まで 7.5 分。その 1/4 以内に再確認
+    interval = policy.next_interval(175.0, slope=-40.0, critical_threshold=170.0)
+    assert interval == pytest.approx(7.5 * 60 / 4)
+    # 上昇中なら水準どおり
+    assert policy.next_interval(175.0, slope=1.0, critical_threshold=170.0) == 300
+    assert policy.time_to_breach(175.0, 170.0, slope=1.0) == math.inf
+
+
+def test_volatility_eats_margin(policy):
+    assert policy.time_to_breach(175.0, 170.0, slope=-1.0, volatility=3.0) == 0.0
+    assert policy.next_interval(175.0, volatility=3.0, critical_threshold=170.0) == 5.0
+
+
+def test_relaxes_gradually(policy):
+    assert policy.next_interval(195.0, previous=30.0) == 60.0
+    assert policy.next_interval(195.0, previous=60.0) == 120.0
+
+
+def test_load_from_config(tmp_path):
+    path = tmp_path / "config.yaml"
+    path.write_text(
+        "maintenance_levels: {good: 180, bad: 160}\n"
+        "monitoring_intervals: {good: 600, bad: 20, extra: 1}\n",
+        encoding="utf-8",
+    )
+    policy = load_polling_policy(str(path))
+    assert policy.intervals == {"good": 600.0, "bad": 20.0}
+    assert policy.next_interval(150.0) == 20.0
+    assert load_polling_policy(str(tmp_path / "missing.yaml")).intervals["critical"] == 30.0
+
+
+def test_monitor_next_interval_uses_trend(tmp_path, monkeypatch):
+    from maintenance_monitor import MaintenanceMonitor
+
+    monkeypatch.chdir(tmp_path)
+    monitor = MaintenanceMonitor(history_path=str(tmp_path / "h.db"))
+    analysis = monitor.analyze_maintenance_rate(200.0)
+    assert monitor.next_poll_interval(analysis) == 1800
+    monitor.poll_once()
+    assert monitor.data_analyzer is not None
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from streaming_stats import StreamingWindowStats
+
+
+def _exact(ts, ys):
+    x = (np.asarray(ts) - ts[0]) / 3600
+    y = np.asarray(ys)
+    dx, dy = x - x.mean(), y - y.mean()
+    sxx, sxy, syy = dx @ dx, dx @ dy, dy @ dy
+    return sxy / sxx, sxy**2 / (sxx * syy), y.std()
+
+
+def test_matches_exact_window_under_expiry():
+    rng = np.random.default_rng(0)
+    stats = StreamingWindowStats(window_seconds=3600)
+    ts = 1_700_000_000 + np.cumsum(rng.uniform(1, 30, size=5000))
+    ys = 170 + np.cumsum(rng.normal(0, 0.1, size=5000))
+    for i, (t, y) in enumerate(zip(ts, ys)):
+        stats.add(float(t), float(y))
+        if i % 500 == 499:
+            window = ts[: i + 1] > t - 3600
+            slope, r2, vol = _exact(ts[: i + 1][window], ys[: i + 1][window])
+            assert stats.n == window.sum()
+            assert stats.slope == pytest.approx(slope, rel=1e-6)
+            assert stats.r_squared == pytest.approx(r2, rel=1e-6)
+            assert stats.volatility == pytest.approx(vol, rel=1e-6)
+
+
+def test_expire_on_query_and_max_points():
+    stats = StreamingWindowStats(window_seconds=60, max_points=3)
+    for i in range(5):
+        stats.add(1000.0 + i, float(i))
+    assert stats.n == 3 and stats.mean == pytest.approx(3.0)
+    stats.expire(1000.0 + 4 + 60)
+    assert stats.n == 0 and stats.snapshot() is None
+
+
+def test_constant_series():
+    stats = StreamingWindowStats(window_seconds=600)
+    for i in range(10):
+        stats.add(1000.0 + i, 180.0)
+    snap = stats.snapshot()
+    assert snap["slope"] == pytest.approx(0.0, abs=1e-12)
+    assert snap["r_squared"] == 0.0 and snap["volatility"] == pytest.approx(0.0, abs=1e-9)
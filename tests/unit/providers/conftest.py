@@ -0,0 +1,15 @@
+import pytest
+
+from desktop_tutorial.providers import resilience, throttle
+
+
+@pytest.fixture(autouse=True)
+def _isolate_provider_state():
+    """ブレーカー・レート制限・カウンターはプロセス共通なのでテストごとに初期化する"""
+    resilience.reset_stats()
+    resilience.reset_breakers()
+    throttle.reset_limiters()
+    yield
+    resilience.reset_stats()
+    resilience.reset_breakers()
+    throttle.reset_limiters()
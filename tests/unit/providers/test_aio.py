@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import time
+from datetime import date
+
+import pytest
+
+from desktop_tutorial.providers.aio import ThreadedProvider, fetch_all, gather_limited
+from desktop_tutorial.providers.base import BaseProvider, PriceBars
+
+
+class SlowProvider(BaseProvider):
+    """呼ばれている最中の同時実行数を記録する同期プロバイダー"""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, symbol, *, start=None, end=None):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if symbol == "FAIL":
+                raise RuntimeError("boom")
+            bar = {
+                "date": date(2025, 1, 1), "open": 1.0, "high": 1.0, "low": 1.0,
+                "close": 1.0, "volume": 0,
+            }
+            return PriceBars.from_bars([bar])
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def test_gather_limited_preserves_order_and_bound():
+    running = 0
+    peak = 0
+
+    async def job(i):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return i
+
+    out = asyncio.run(gather_limited((job(i) for i in range(20)), limit=3))
+    assert out == list(range(20))
+    assert peak == 3
+
+
+def test_gather_limited_rejects_bad_limit():
+    with pytest.raises(ValueError):
+        asyncio.run(gather_limited([], limit=0))
+
+
+def test_threaded_provider_fetch_all():
+    sync = SlowProvider()
+
+    async def main():
+        async with ThreadedProvider(sync, max_workers=4) as provider:
+            return await fetch_all(provider, ["A", "B", "FAIL", "C", "D"], limit=4)
+
+    started = time.perf_counter()
+    out = asyncio.run(main())
+    assert list(out) == ["A", "B", "C", "D"]
+    assert sync.peak == 4
+    assert time.perf_counter() - started < 5 * sync.delay
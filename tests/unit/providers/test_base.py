@@ -0,0 +1,59 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from desktop_tutorial.providers.base import PriceBars
+
+
+def _frame(n=5):
+    idx = pd.date_range("2025-01-01", periods=n)
+    close = np.arange(n, dtype=float) + 100
+    return pd.DataFrame(
+        {"open": close - 1, "high": close + 1, "low": close - 2, "close": close, "volume": 7},
+        index=idx,
+    )
+
+
+def test_from_frame_shares_buffers():
+    df = _frame()
+    bars = PriceBars.from_frame(df)
+    assert len(bars) == 5
+    assert np.shares_memory(bars.close, df["close"].to_numpy())
+    back = bars.to_frame()
+    assert np.shares_memory(back["close"].to_numpy(), bars.close)
+    assert back["close"].tolist() == df["close"].tolist()
+
+
+def test_iter_yields_price_bar_dicts():
+    bars = PriceBars.from_frame(_frame(2))
+    first, second = list(bars)
+    assert first == {
+        "date": date(2025, 1, 1), "open": 99.0, "high": 101.0, "low": 98.0,
+        "close": 100.0, "volume": 7,
+    }
+    assert bars[1] == second
+    assert PriceBars.from_bars([first, second]).close.tolist() == [100.0, 101.0]
+
+
+def test_slicing_and_between_are_views():
+    bars = PriceBars.from_frame(_frame(10))
+    sub = bars.between("2025-01-03", date(2025, 1, 5))
+    assert [b["date"].day for b in sub] == [3, 4, 5]
+    assert np.shares_memory(sub.close, bars.close)
+    assert len(bars[2:4]) == 2
+    assert bars.nbytes == 10 * 6 * 8
+
+
+def test_missing_columns_filled_from_close():
+    df = pd.DataFrame({"close": [1.0, np.nan, 3.0]}, index=pd.date_range("2025-01-01", periods=3))
+    bars = PriceBars.from_frame(df)
+    assert bars.close.tolist() == [1.0, 3.0]
+    assert bars.open.tolist() == [1.0, 3.0]
+    assert bars.volume.tolist() == [0, 0]
+
+
+def test_length_mismatch_rejected():
+    with pytest.raises(ValueError):
+        PriceBars([np.datetime64("2025-01-01")], [1.0], [1.0], [1.0], [1.0, 2.0], [0])
@@ -0,0 +1,89 @@
+import pytest
+
+from desktop_tutorial.providers import resilience
+from desktop_tutorial.providers.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    ProviderError,
+    RetryPolicy,
+    call_with_retry,
+)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _flaky(failures):
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise ConnectionError("down")
+        return "ok"
+
+    return func, calls
+
+
+def test_retry_policy_backoff_and_jitter():
+    fixed = RetryPolicy(base_delay=1.0, max_delay=5.0, jitter=0.0)
+    assert [fixed.delay(n) for n in range(1, 5)] == [1.0, 2.0, 4.0, 5.0]
+    full = RetryPolicy(base_delay=1.0, max_delay=5.0, jitter=1.0)
+    assert all(0.0 <= full.delay(3) <= 4.0 for _ in range(50))
+
+
+def test_call_with_retry_recovers():
+    func, calls = _flaky(2)
+    sleeps = []
+    out = call_with_retry(func, name="p", policy=RetryPolicy(attempts=3), sleep=sleeps.append)
+    assert out == "ok" and len(calls) == 3 and len(sleeps) == 2
+    assert resilience.stats() == {"p": {"retry": 2, "success": 1}}
+
+
+def test_call_with_retry_gives_up():
+    func, calls = _flaky(10)
+    with pytest.raises(ProviderError) as exc:
+        call_with_retry(func, name="p", policy=RetryPolicy(attempts=3), sleep=lambda _: None)
+    assert isinstance(exc.value.__cause__, ConnectionError)
+    assert len(calls) == 3
+    assert resilience.stats()["p"]["failure"] == 1
+
+
+def test_circuit_breaker_fails_fast_then_half_opens():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    func, calls = _flaky(100)
+    policy = RetryPolicy(attempts=5)
+
+    with pytest.raises(CircuitOpenError):
+        call_with_retry(func, name="p", policy=policy, breaker=breaker, sleep=lambda _: None)
+    assert len(calls) == 2 and breaker.state == CircuitBreaker.OPEN
+
+    # 開いている間は呼び出さない
+    with pytest.raises(CircuitOpenError):
+        call_with_retry(func, name="p", policy=policy, breaker=breaker, sleep=lambda _: None)
+    assert len(calls) == 2
+    assert resilience.stats()["p"]["short_circuit"] == 2
+
+    # reset_timeout 経過後は 1 回だけ試す → 成功で閉じる
+    clock.now = 10
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    ok, _ = _flaky(0)
+    assert call_with_retry(ok, name="p", policy=policy, breaker=breaker) == "ok"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_failure_reopens():
+    clock = Clock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+    breaker.record_failure()
+    clock.now = 5
+    assert breaker.allow()
+    assert not breaker.allow()  # 試行は 1 回だけ
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
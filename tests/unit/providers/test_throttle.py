@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from desktop_tutorial.providers import resilience
+from desktop_tutorial.providers.throttle import SingleFlight, TokenBucket
+from desktop_tutorial.providers.yahoo import YahooProvider
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, s):
+        self.slept.append(s)
+        self.now += s
+
+
+def test_token_bucket_burst_then_rate():
+    t = FakeTime()
+    bucket = TokenBucket(rate=2.0, capacity=3, clock=t.clock, sleep=t.sleep)
+    for _ in range(3):
+        assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert bucket.acquire()
+    assert t.slept == [pytest.approx(0.5)]
+    t.now += 10  # 長く空けても capacity 以上は貯まらない
+    assert sum(bucket.try_acquire() for _ in range(5)) == 3
+
+
+def test_token_bucket_timeout():
+    t = FakeTime()
+    bucket = TokenBucket(rate=1.0, capacity=1, clock=t.clock, sleep=t.sleep)
+    bucket.acquire()
+    assert not bucket.acquire(timeout=0.5)
+    assert t.slept == []
+
+
+def test_single_flight_shares_result_and_error():
+    flight = SingleFlight("p")
+    gate = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        gate.wait(5)
+        return object()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", slow))) for _ in range(5)]
+    for th in threads:
+        th.start()
+    time.sleep(0.1)
+    gate.set()
+    for th in threads:
+        th.join()
+    assert len(calls) == 1
+    assert len({id(r) for r in results}) == 1
+    assert resilience.stats()["p"]["coalesced"] == 4
+
+    def boom():
+        raise ValueError("x")
+
+    with pytest.raises(ValueError):
+        flight.do("k", boom)
+
+
+def test_concurrent_identical_yahoo_requests_share_one_download(tmp_path, monkeypatch):
+    from desktop_tutorial import cache
+    from desktop_tutorial.providers import yahoo
+
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    calls = []
+
+    def slow_download(tickers, **kw):
+        calls.append(tickers)
+        time.sleep(0.2)
+        idx = pd.date_range("2025-01-01", periods=3)
+        return pd.DataFrame({"Close": [1.0, 2.0, 3.0]}, index=idx)
+
+    monkeypatch.setattr(yahoo._yf, "download", slow_download)
+    provider = YahooProvider()
+    out = []
+    threads = [
+        threading.Thread(
+            target=lambda: out.append(
+                provider._fetch_history("AAPL", start="2025-01-01", end="2025-01-03")
+            )
+        )
+        for _ in range(4)
+    ]
+    for th in threads:
+        th.start()
+    for th in threads:
+        th.join()
+    assert len(calls) == 1
+    assert all(len(df) == 3 for df in out)
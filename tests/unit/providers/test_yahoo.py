@@ -1,12 +1,16 @@
 import pandas as pd
 import pytest
 
+from desktop_tutorial.providers.resilience import ProviderError
 from desktop_tutorial.providers.yahoo import YahooProvider
 
 
 @pytest.mark.e2e
 def test_aapl_price_positive():
-    price = YahooProvider().fetch_price("AAPL")
+    try:
+        price = YahooProvider().fetch_price("AAPL")
+    except ProviderError as e:
+        pytest.skip(f"Yahoo Finance に接続できません: {e}")
     assert isinstance(price, float) and price > 0
 
 
@@ -20,6 +24,19 @@ def test_normalize_multiindex():
     assert list(out.columns) == ["close", "adjclose"]
 
 
+def test_normalize_shares_buffers():
+    import numpy as np
+
+    raw = pd.DataFrame(
+        {("Close", "AAPL"): [1.0, 2.0], ("Volume", "AAPL"): [10, 20]},
+        index=pd.date_range("2025-01-01", periods=2),
+    )
+    out = YahooProvider()._normalize(raw)
+    assert list(out.columns) == ["close", "volume"]
+    assert isinstance(raw.columns, pd.MultiIndex)  # 元の DF の列は変えない
+    assert np.shares_memory(out["close"].to_numpy(), raw[("Close", "AAPL")].to_numpy())
+
+
 def test_fetch_price_keyerror(monkeypatch):
     """close 列が無い場合に KeyError が返る分岐をカバー"""
     provider = YahooProvider()
@@ -28,3 +45,326 @@ def test_fetch_price_keyerror(monkeypatch):
     monkeypatch.setattr(provider, "_fetch_history", lambda *a, **kw: empty)
     with pytest.raises(KeyError):
         provider.fetch_price("DUMMY")
+
+
+# -------- fetch_many --------
+def _grouped(symbols, periods=3):
+    idx = pd.date_range("2025-01-01", periods=periods)
+    cols = pd.MultiIndex.from_product([["Close", "Adj Close"], symbols])
+    data = {(f, s): [float(i + 1) for i in range(periods)] for f, s in cols}
+    return pd.DataFrame(data, index=idx, columns=cols)
+
+
+def test_fetch_many_single_grouped_download(tmp_path, monkeypatch):
+    from desktop_tutorial import cache
+    from desktop_tutorial.providers import yahoo
+
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    calls = []
+
+    def fake_download(tickers, **kw):
+        calls.append(list(tickers))
+        return _grouped(tickers)
+
+    monkeypatch.setattr(yahoo._yf, "download", fake_download)
+    provider = YahooProvider()
+
+    out = provider.fetch_many(["AAPL", "MSFT", "AAPL"])
+    assert list(out) == ["AAPL", "MSFT"]
+    assert calls == [["AAPL", "MSFT"]]
+    assert list(out["AAPL"].columns) == ["close", "adjclose"]
+
+    # 2 回目はキャッシュ済みの銘柄を除いた分だけ取得する
+    out = provider.fetch_many(["AAPL", "MSFT", "NVDA"])
+    assert list(out) == ["AAPL", "MSFT", "NVDA"]
+    assert calls[-1] == ["NVDA"]
+
+
+def test_fetch_many_skips_missing_symbol(tmp_path, monkeypatch):
+    from desktop_tutorial import cache
+    from desktop_tutorial.providers import yahoo
+
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    monkeypatch.setattr(yahoo._yf, "download", lambda tickers, **kw: _grouped(["AAPL"]))
+    out = YahooProvider().fetch_many(["AAPL", "XXXX"])
+    assert list(out) == ["AAPL"]
+
+
+def test_fetch_history_range_downloads_only_gaps(tmp_path, monkeypatch):
+    from desktop_tutorial import cache
+    from desktop_tutorial.providers import yahoo
+
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    calls = []
+
+    def fake_download(tickers, start, end, **kw):
+        calls.append((pd.Timestamp(start), pd.Timestamp(end)))
+        idx = pd.date_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+        return pd.DataFrame({"Close": range(len(idx))}, index=idx, dtype=float)
+
+    monkeypatch.setattr(yahoo._yf, "download", fake_download)
+    provider = YahooProvider()
+
+    jan_feb = provider._fetch_history("AAPL", start="2025-01-01", end="2025-02-28")
+    assert len(jan_feb) == 59
+    jan_mar = provider._fetch_history("AAPL", start="2025-01-01", end="2025-03-31")
+    assert len(jan_mar) == 90
+    # 2 回目は 3 月分だけ（yfinance の end は排他的なので翌日）
+    assert calls[-1] == (pd.Timestamp("2025-03-01"), pd.Timestamp("2025-04-01"))
+
+    provider._fetch_history("AAPL", start="2025-02-01", end="2025-02-10")
+    assert len(calls) == 2
+
+
+def test_iter_bars_streams_in_batches(tmp_path, monkeypatch):
+    from desktop_tutorial import cache
+    from desktop_tutorial.providers import yahoo
+
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    calls = []
+
+    def fake_download(tickers, start, end, **kw):
+        calls.append((pd.Timestamp(start), pd.Timestamp(end)))
+        idx = pd.date_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+        return pd.DataFrame({"Close": range(len(idx))}, index=idx, dtype=float)
+
+    monkeypatch.setattr(yahoo._yf, "download", fake_download)
+    provider = YahooProvider()
+
+    batches = list(provider.iter_bars("AAPL", start="2024-01-01", end="2024-12-31", batch_rows=100))
+    assert [len(b) for b in batches] == [100, 100, 100, 66]
+    assert batches[0].dates[0] == pd.Timestamp("2024-01-01").to_datetime64()
+    assert len(calls) == 1
+
+    # 取得済みなら取りに行かずファイルから読むだけ
+    again = list(provider.iter_bars("AAPL", start="2024-06-01", end="2024-06-30"))
+    assert len(calls) == 1 and sum(map(len, again)) == 30
+
+
+def test_fetch_many_range_groups_missing(tmp_path, monkeypatch):
+    from desktop_tutorial import cache
+    from desktop_tutorial.providers import yahoo
+
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    calls = []
+
+    def fake_download(tickers, **kw):
+        calls.append(list(tickers))
+        return _grouped(tickers)
+
+    monkeypatch.setattr(yahoo._yf, "download", fake_download)
+    provider = YahooProvider()
+    out = provider.fetch_many(["AAPL", "MSFT"], start="2025-01-01", end="2025-01-03")
+    assert calls == [["AAPL", "MSFT"]]
+    assert len(out["AAPL"]) == 3
+
+    out = provider.fetch_many(["AAPL", "MSFT"], start="2025-01-02", end="2025-01-03")
+    assert len(calls) == 1
+    assert list(out) == ["AAPL", "MSFT"]
+
+
+# -------- 鮮度 --------
+def _latest(monkeypatch, tmp_path, close):
+    from desktop_tutorial import cache
+    from desktop_tutorial.providers import yahoo
+
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    calls = []
+
+    def fake_download(tickers, **kw):
+        calls.append(tickers)
+        idx = pd.date_range("2025-01-01", periods=2)
+        return pd.DataFrame({"Close": [close, close]}, index=idx)
+
+    monkeypatch.setattr(yahoo._yf, "download", fake_download)
+    return calls
+
+
+def _age_cache(symbol, hours):
+    import json
+
+    from desktop_tutorial import cache, codecs
+
+    path = cache._build_path(symbol, None, None, "1d", codecs.default())
+    when = pd.Timestamp.now(tz="UTC") - pd.Timedelta(hours=hours)
+    cache._meta_path(path).write_text(json.dumps({"fetched_at": when.isoformat()}))
+
+
+def test_fresh_cache_is_served(tmp_path, monkeypatch):
+    from desktop_tutorial.freshness import FreshnessPolicy
+
+    calls = _latest(monkeypatch, tmp_path, 5.0)
+    provider = YahooProvider(freshness=FreshnessPolicy(intraday_ttl=3600))
+    assert provider.fetch_price("AAPL") == 5.0
+    assert provider.fetch_price("AAPL") == 5.0
+    assert len(calls) == 1
+
+
+def test_stale_cache_served_then_revalidated(tmp_path, monkeypatch):
+    calls = _latest(monkeypatch, tmp_path, 5.0)
+    provider = YahooProvider()
+    provider.fetch_price("AAPL")
+    _age_cache("AAPL", hours=24 * 7)
+
+    from desktop_tutorial.providers import yahoo
+
+    monkeypatch.setattr(
+        yahoo._yf,
+        "download",
+        lambda tickers, **kw: pd.DataFrame(
+            {("Close", "AAPL"): [7.0]}, index=pd.date_range("2025-01-02", periods=1)
+        ),
+    )
+    assert provider.fetch_price("AAPL") == 5.0  # 待たずに古い値
+    provider.drain(timeout=5)
+    assert provider.fetch_price("AAPL") == 7.0
+    assert len(calls) == 1
+
+
+def test_expired_cache_blocks_when_swr_disabled(tmp_path, monkeypatch):
+    calls = _latest(monkeypatch, tmp_path, 5.0)
+    provider = YahooProvider(stale_while_revalidate=False)
+    provider.fetch_price("AAPL")
+    _age_cache("AAPL", hours=24 * 7)
+    provider.fetch_price("AAPL")
+    assert len(calls) == 2
+
+
+def test_fetch_returns_price_bars(monkeypatch):
+    provider = YahooProvider()
+    frame = pd.DataFrame(
+        {"Open": [1.0], "High": [2.0], "Low": [0.5], "Close": [1.5], "Volume": [10]},
+        index=pd.date_range("2025-01-02", periods=1),
+    )
+    monkeypatch.setattr(provider, "_fetch_history", lambda *a, **kw: frame)
+    (bar,) = provider.fetch("AAPL")
+    assert bar["date"].isoformat() == "2025-01-02"
+    assert (bar["open"], bar["high"], bar["low"], bar["close"], bar["volume"]) == (
+        1.0,
+        2.0,
+        0.5,
+        1.5,
+        10,
+    )
+
+
+# -------- リトライ --------
+@pytest.fixture
+def no_backoff(monkeypatch):
+    from desktop_tutorial.providers import resilience
+
+    monkeypatch.setattr(YahooProvider, "retry_delay", 0.0)
+    return resilience
+
+
+def test_outage_raises_instead_of_fake_price(tmp_path, monkeypatch, no_backoff):
+    from desktop_tutorial import cache
+    from desktop_tutorial.providers import yahoo
+
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    calls = []
+
+    def down(**kw):
+        calls.append(1)
+        raise ConnectionError("down")
+
+    monkeypatch.setattr(yahoo._yf, "download", down)
+    with pytest.raises(ProviderError):
+        YahooProvider().fetch_price("AAPL")
+    assert len(calls) == YahooProvider.retry
+    assert no_backoff.stats()["YahooProvider"]["failure"] == 1
+
+
+def test_outage_falls_back_to_stale_cache(tmp_path, monkeypatch, no_backoff):
+    from desktop_tutorial.providers import yahoo
+
+    _latest(monkeypatch, tmp_path, 5.0)
+    provider = YahooProvider(stale_while_revalidate=False)
+    provider.fetch_price("AAPL")
+    _age_cache("AAPL", hours=24 * 7)
+
+    monkeypatch.setattr(
+        yahoo._yf, "download", lambda **kw: (_ for _ in ()).throw(ConnectionError())
+    )
+    assert provider.fetch_price("AAPL") == 5.0
+    assert no_backoff.stats()["YahooProvider"]["stale_fallback"] == 1
+
+
+def test_weekend_gap_is_recorded_without_retry(tmp_path, monkeypatch, no_backoff):
+    from desktop_tutorial import cache
+    from desktop_tutorial.providers import yahoo
+    from desktop_tutorial.providers.resilience import breaker_for
+
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    calls = []
+
+    def fake_download(tickers, start, end, **kw):
+        calls.append((pd.Timestamp(start), pd.Timestamp(end)))
+        idx = pd.bdate_range(start, pd.Timestamp(end) - pd.Timedelta(days=1))
+        return pd.DataFrame({"Close": range(len(idx))}, index=idx, dtype=float)
+
+    monkeypatch.setattr(yahoo._yf, "download", fake_download)
+    provider = YahooProvider()
+    assert len(provider._fetch_history("AAPL", start="2025-01-06", end="2025-01-10")) == 5
+
+    # 土日だけの未取得範囲は空が返る。失敗ではないのでリトライもブレーカーへの計上もしない
+    week = provider._fetch_history("AAPL", start="2025-01-06", end="2025-01-12")
+    assert len(week) == 5 and len(calls) == 2
+    assert "failure" not in no_backoff.stats().get("YahooProvider", {})
+    assert breaker_for("YahooProvider").state == "closed"
+    assert breaker_for("YahooProvider")._failures == 0
+
+    # バーが無いことも記録されるので、次は取りに行かない
+    assert cache.missing("AAPL", start="2025-01-06", end="2025-01-12") == []
+    provider._fetch_history("AAPL", start="2025-01-06", end="2025-01-12")
+    assert len(calls) == 2
+
+
+def test_merge_records_empty_range_only_when_confirmed(tmp_path, monkeypatch):
+    from desktop_tutorial import cache
+
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    cache.merge(pd.DataFrame(), symbol="HOL", start="2025-01-01", end="2025-01-05")
+    assert cache.coverage("HOL") == []
+
+    cache.merge(
+        pd.DataFrame(), symbol="HOL", start="2025-01-01", end="2025-01-05", confirmed_empty=True
+    )
+    assert cache.coverage("HOL") == [(pd.Timestamp("2025-01-01"), pd.Timestamp("2025-01-05"))]
+
+
+def test_empty_grouped_latest_counts_as_failure(tmp_path, monkeypatch, no_backoff):
+    from desktop_tutorial import cache
+    from desktop_tutorial.providers import yahoo
+
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    calls = []
+
+    def empty(**kw):
+        calls.append(1)
+        return pd.DataFrame()
+
+    monkeypatch.setattr(yahoo._yf, "download", empty)
+    # 直近 5 日分が空なのは休場ではなくエラー
+    assert YahooProvider().fetch_many(["AAPL", "MSFT"]) == {}
+    assert len(calls) == YahooProvider.retry
+    assert no_backoff.stats()["YahooProvider"]["failure"] == 1
+
+
+def test_empty_grouped_range_is_recorded(tmp_path, monkeypatch, no_backoff):
+    from desktop_tutorial import cache
+    from desktop_tutorial.providers import yahoo
+
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    calls = []
+
+    def empty(**kw):
+        calls.append(1)
+        return pd.DataFrame()
+
+    monkeypatch.setattr(yahoo._yf, "download", empty)
+    provider = YahooProvider()
+    assert provider.fetch_many(["AAPL", "MSFT"], start="2025-01-11", end="2025-01-12") == {}
+    assert len(calls) == 1
+    assert "failure" not in no_backoff.stats().get("YahooProvider", {})
+    assert cache.missing("MSFT", start="2025-01-11", end="2025-01-12") == []
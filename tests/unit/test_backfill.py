@@ -0,0 +1,137 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from desktop_tutorial import backfill, cache
+from desktop_tutorial.backfill import Backfill, Chunk
+from desktop_tutorial.providers.resilience import ProviderError
+
+
+class StubProvider:
+    """yfinance と同じ形（MultiIndex 列・大文字）の日足を返すオフラインの取得元"""
+
+    def __init__(self, fail=(), empty=()):
+        self.fail = set(fail)
+        self.empty = set(empty)
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def download(self, symbol, *, start, end, freq):
+        with self._lock:
+            self.calls.append((symbol, pd.Timestamp(start), pd.Timestamp(end)))
+        if (symbol, pd.Timestamp(start)) in self.fail:
+            raise ProviderError("network down")
+        if (symbol, pd.Timestamp(start)) in self.empty:
+            return pd.DataFrame()  # yfinance はエラーを空の DF で返すことがある
+        idx = pd.bdate_range(start, end)
+        cols = pd.MultiIndex.from_product([["Close", "Adj Close"], [symbol]])
+        values = [float(d.toordinal() % 1000) for d in idx]
+        return pd.DataFrame(dict.fromkeys(cols, values), index=idx, columns=cols)
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    cache.clear_memory()
+    return tmp_path
+
+
+def test_plan_splits_only_missing_ranges(cache_dir):
+    cache.merge(
+        pd.DataFrame({"close": [1.0]}, index=pd.DatetimeIndex(["2024-03-01"])),
+        symbol="AAPL", start="2024-01-01", end="2024-06-30",
+    )
+    chunks = backfill.plan(["AAPL", "MSFT"], start="2024-01-01", end="2024-12-31", chunk_days=100)
+    assert [c for c in chunks if c.symbol == "AAPL"] == [
+        Chunk("AAPL", pd.Timestamp("2024-07-01"), pd.Timestamp("2024-10-08")),
+        Chunk("AAPL", pd.Timestamp("2024-10-09"), pd.Timestamp("2024-12-31")),
+    ]
+    msft = [c for c in chunks if c.symbol == "MSFT"]
+    assert len(msft) == 4
+    assert msft[0].start == pd.Timestamp("2024-01-01") and msft[-1].end == pd.Timestamp("2024-12-31")
+
+
+@pytest.mark.parametrize("cpu_workers", [0, 2])
+def test_backfill_fills_series_store(cache_dir, cpu_workers):
+    seen = []
+    job = Backfill(
+        StubProvider(), chunk_days=90, io_workers=4, cpu_workers=cpu_workers,
+        on_progress=lambda p: seen.append(p.done),
+    )
+    progress = job.run(["AAPL", "MSFT"], start="2023-01-01", end="2023-12-31")
+
+    assert progress.failed == 0 and progress.done == progress.total == 10
+    assert seen[-1] == 10
+    expected = len(pd.bdate_range("2023-01-01", "2023-12-31"))
+    assert progress.rows == 2 * expected
+    for symbol in ("AAPL", "MSFT"):
+        df = cache.read_range(symbol, start="2023-01-01", end="2023-12-31")
+        assert list(df.columns) == ["close", "adjclose"]
+        assert len(df) == expected and df.index.is_monotonic_increasing
+        assert cache.missing(symbol, start="2023-01-01", end="2023-12-31") == []
+
+
+def test_backfill_resumes_failed_chunks(cache_dir):
+    first = StubProvider(fail={("AAPL", pd.Timestamp("2023-04-01"))})
+    progress = Backfill(first, chunk_days=90, cpu_workers=0).run(
+        ["AAPL"], start="2023-01-01", end="2023-12-31"
+    )
+    assert (progress.done, progress.failed) == (4, 1)
+    assert progress.errors[0][0].start == pd.Timestamp("2023-04-01")
+
+    # 再実行では失敗したチャンクだけを取りに行く
+    second = StubProvider()
+    progress = Backfill(second, chunk_days=90, cpu_workers=0).run(
+        ["AAPL"], start="2023-01-01", end="2023-12-31"
+    )
+    assert second.calls == [("AAPL", pd.Timestamp("2023-04-01"), pd.Timestamp("2023-06-29"))]
+    assert (progress.done, progress.failed) == (1, 0)
+    assert cache.missing("AAPL", start="2023-01-01", end="2023-12-31") == []
+
+    # すべて取得済みなら何もしない
+    assert Backfill(second, cpu_workers=0).run(["AAPL"], start="2023-01-01", end="2023-12-31").total == 0
+
+
+@pytest.mark.parametrize("cpu_workers", [0, 2])
+def test_backfill_records_empty_settled_chunks(cache_dir, cpu_workers):
+    # 上場前・休場日だけのチャンクはバーが無くても取得済みにする
+    first = StubProvider(empty={("AAPL", pd.Timestamp("2023-04-01"))})
+    progress = Backfill(first, chunk_days=90, cpu_workers=cpu_workers).run(
+        ["AAPL"], start="2023-01-01", end="2023-12-31"
+    )
+    assert (progress.done, progress.failed) == (5, 0)
+    assert backfill.plan(["AAPL"], start="2023-01-01", end="2023-12-31", chunk_days=90) == []
+
+
+def test_backfill_retries_empty_unsettled_chunks(cache_dir):
+    class Freshness:
+        def settled_until(self, freq):
+            return pd.Timestamp("2023-06-29")
+
+    provider = StubProvider(empty={("AAPL", pd.Timestamp("2023-06-30"))})
+    provider.freshness = Freshness()
+    progress = Backfill(provider, chunk_days=90, cpu_workers=0).run(
+        ["AAPL"], start="2023-01-01", end="2023-09-27"
+    )
+    assert (progress.done, progress.failed) == (2, 1)
+    assert "not settled" in progress.errors[0][1]
+
+    # まだ確定していない範囲は次回また取りに行く
+    assert backfill.plan(["AAPL"], start="2023-01-01", end="2023-09-27", chunk_days=90) == [
+        Chunk("AAPL", pd.Timestamp("2023-06-30"), pd.Timestamp("2023-09-27"))
+    ]
+
+
+def test_main_reads_symbols_file(cache_dir, tmp_path, monkeypatch):
+    from desktop_tutorial.providers import yahoo
+
+    monkeypatch.setattr(yahoo.YahooProvider, "download", StubProvider().download)
+    symbols = tmp_path / "symbols.txt"
+    symbols.write_text("AAPL\n\nMSFT\n", encoding="utf-8")
+    code = backfill.main([
+        "--symbols-file", str(symbols), "--start", "2024-01-01", "--end", "2024-01-31",
+        "--cpu-workers", "0",
+    ])
+    assert code == 0
+    assert len(cache.read_range("MSFT", start="2024-01-01", end="2024-01-31")) == 23
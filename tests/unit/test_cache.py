@@ -31,6 +31,38 @@ def test_roundtrip_csv(tmp_path, monkeypatch):
     pd.testing.assert_frame_equal(df, loaded)
 
 
+def test_write_keeps_freq_in_metadata(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    # 休場日で間隔が飛ぶ日足でも書ける（index に freq を押し付けない）
+    index = pd.DatetimeIndex(["2025-01-03", "2025-01-06", "2025-01-07"])
+    df = pd.DataFrame({"x": [1.0, 2.0, 3.0]}, index=index)
+    path = cache.write(df, symbol="GAP", start=None, end=None)
+    assert df.index.freq is None
+    assert cache._load_meta(path)["freq"] == "1d"
+    loaded = cache.read("GAP", start=None, end=None)
+    pd.testing.assert_frame_equal(loaded, df)
+
+    # 間隔がそろっていれば読み出しで freq を戻す。メモリ層の index はそのまま
+    path = cache.write(_df(), symbol="DAY", start=None, end=None)
+    assert cache.read("DAY", start=None, end=None).index.freq == "D"
+    cached = cache._MEMORY.get(str(path))
+    assert cached.index.freq is None
+
+
+@pytest.mark.parametrize(
+    ("freq", "start", "offset"),
+    [("1wk", "2025-01-06", "W-MON"), ("1mo", "2025-01-01", "MS"), ("1h", "2025-01-06", "h")],
+)
+def test_read_yfinance_intervals(tmp_path, monkeypatch, recwarn, freq, start, offset):
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    index = pd.date_range(start, periods=4, freq=offset)
+    df = pd.DataFrame({"close": [1.0, 2.0, 3.0, 4.0]}, index=index)
+    cache.write(df, symbol="IVL", start=None, end=None, freq=freq)
+    assert cache.read("IVL", start=None, end=None, freq=freq).index.freq == offset
+    assert cache._step(freq) <= pd.Timedelta(days=1)
+    assert not [w for w in recwarn if "deprecated" in str(w.message)]
+
+
 # -------- 異常系 --------
 def test_cache_unsupported_fmt(tmp_path, monkeypatch):
     monkeypatch.setenv("DESKTOP_TUTORIAL_CACHE_DIR", str(tmp_path))
@@ -62,3 +94,148 @@ def test_write_read_both_fmt(tmp_path, monkeypatch, fmt):
     assert fp.exists()
     loaded = cache.read("BOTH", start=None, end=None, freq="1d", fmt=fmt)
     pd.testing.assert_frame_equal(df, loaded)
+
+
+# -------- 範囲マージ型ストア --------
+def _bars(start, periods):
+    idx = pd.date_range(start, periods=periods)
+    return pd.DataFrame({"close": [float(i) for i in range(periods)]}, index=idx)
+
+
+def test_missing_and_merge(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    assert cache.missing("RNG", start="2025-01-01", end="2025-01-31") == [
+        (pd.Timestamp("2025-01-01"), pd.Timestamp("2025-01-31"))
+    ]
+
+    cache.merge(_bars("2025-01-01", 10), symbol="RNG", start="2025-01-01", end="2025-01-10")
+    cache.merge(_bars("2025-01-20", 5), symbol="RNG", start="2025-01-20", end="2025-01-24")
+    gaps = cache.missing("RNG", start="2025-01-05", end="2025-01-31")
+    assert gaps == [
+        (pd.Timestamp("2025-01-11"), pd.Timestamp("2025-01-19")),
+        (pd.Timestamp("2025-01-25"), pd.Timestamp("2025-01-31")),
+    ]
+
+    # 隣接する範囲は 1 つにまとまる
+    cache.merge(_bars("2025-01-11", 9), symbol="RNG", start="2025-01-11", end="2025-01-19")
+    assert cache.coverage("RNG") == [
+        (pd.Timestamp("2025-01-01"), pd.Timestamp("2025-01-24"))
+    ]
+    assert cache.missing("RNG", start="2025-01-02", end="2025-01-24") == []
+
+
+def test_merge_overwrites_overlap_and_reads_subrange(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    cache.merge(_bars("2025-01-01", 5), symbol="OVL", start="2025-01-01", end="2025-01-05")
+    newer = _bars("2025-01-04", 4) + 100
+    cache.merge(newer, symbol="OVL", start="2025-01-04", end="2025-01-07")
+
+    full = cache.read_range("OVL", start="2025-01-01", end="2025-01-07")
+    assert len(full) == 7
+    assert full.index.is_monotonic_increasing
+    assert full.loc["2025-01-04", "close"] == 100.0
+
+    sub = cache.read_range("OVL", start="2025-01-03", end="2025-01-05")
+    assert list(sub.index.day) == [3, 4, 5]
+    # 系列ファイルは 1 本だけ
+    assert len([p for p in tmp_path.glob("OVL_*") if p.suffix != ".json"]) == 1
+
+
+def test_read_range_without_series(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    with pytest.raises(FileNotFoundError):
+        cache.read_range("NONE", start="2025-01-01", end="2025-01-02")
+
+
+# -------- 分割読み出し --------
+def _minutes(start, periods, tz=None):
+    idx = pd.date_range(start, periods=periods, freq="min", tz=tz)
+    return pd.DataFrame({"close": [float(i) for i in range(periods)], "volume": 1}, index=idx)
+
+
+def test_iter_batches_reads_row_groups(tmp_path, monkeypatch):
+    import pyarrow.parquet as pq
+
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    monkeypatch.setattr(cache, "_ROW_GROUP_ROWS", 100)
+    df = _minutes("2025-01-01", 1000)
+    cache.merge(df, symbol="MIN", start=df.index[0], end=df.index[-1], freq="1min", fmt="parquet")
+
+    read_groups = []
+    original = pq.ParquetFile.iter_batches
+
+    def spy(self, *args, **kwargs):
+        read_groups.append(list(kwargs["row_groups"]))
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(pq.ParquetFile, "iter_batches", spy)
+    lo, hi = df.index[250], df.index[420]
+    batches = list(cache.iter_batches("MIN", start=lo, end=hi, freq="1min", batch_rows=64))
+    assert batches and cache._series_file("MIN", "1min", "auto")[1] == "parquet"
+    assert all(len(b) <= 64 for b in batches)
+    pd.testing.assert_frame_equal(pd.concat(batches), df.loc[lo:hi], check_freq=False)
+    # 範囲外の行グループは読まない
+    assert read_groups == [[2, 3, 4]]
+
+    only_close = next(cache.iter_batches("MIN", freq="1min", columns=["close"]))
+    assert list(only_close.columns) == ["close"] and len(only_close) == 1000
+
+
+def test_iter_batches_tz_aware_and_missing(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    monkeypatch.setattr(cache, "_ROW_GROUP_ROWS", 50)
+    df = _minutes("2025-01-02 09:30", 300, tz="America/New_York")
+    cache.merge(df, symbol="TZ", start="2025-01-02", end="2025-01-02", freq="1min")
+
+    # tz の無い日時は系列の現地時刻とみなす
+    out = pd.concat(cache.iter_batches("TZ", start="2025-01-02 10:00", end="2025-01-02 10:59", freq="1min"))
+    assert len(out) == 60 and str(out.index.tz) == "America/New_York"
+    assert list(cache.iter_batches("TZ", start="2025-01-03", end="2025-01-04", freq="1min")) == []
+
+    with pytest.raises(FileNotFoundError):
+        next(cache.iter_batches("NONE", start="2025-01-01", end="2025-01-02"))
+
+
+# -------- メモリ層 --------
+def test_memory_tier_hit_and_invalidate(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    cache.clear_memory()
+    df = _df()
+    cache.write(df, symbol="MEM", start=None, end=None)
+
+    first = cache.read("MEM", start=None, end=None)
+    second = cache.read("MEM", start=None, end=None)
+    stats = cache.memory_stats()
+    assert (stats["misses"], stats["hits"]) == (1, 1)
+    pd.testing.assert_frame_equal(first, second)
+
+    # 呼び出し側の変更はメモリ層に残らない
+    second["x"] = [9, 9]
+    assert list(cache.read("MEM", start=None, end=None)["x"]) == [1, 2]
+
+    # 書き込みでメモリ層は無効化される
+    cache.write(df * 10, symbol="MEM", start=None, end=None)
+    assert list(cache.read("MEM", start=None, end=None)["x"]) == [10, 20]
+
+
+def test_memory_tier_lru_eviction(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    monkeypatch.setattr(cache, "_MEMORY", cache._MemoryTier(2, 10**9))
+    for sym in ("A", "B", "C"):
+        cache.write(_df(), symbol=sym, start=None, end=None)
+    cache.read("A", start=None, end=None)
+    cache.read("B", start=None, end=None)
+    cache.read("A", start=None, end=None)  # A を最近使ったものにする
+    cache.read("C", start=None, end=None)  # B が追い出される
+    stats = cache.memory_stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 1
+    cache.read("B", start=None, end=None)
+    assert cache.memory_stats()["misses"] == 4
+
+
+def test_memory_tier_byte_limit(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    monkeypatch.setattr(cache, "_MEMORY", cache._MemoryTier(10, 1))
+    cache.write(_df(), symbol="BIG", start=None, end=None)
+    cache.read("BIG", start=None, end=None)
+    assert cache.memory_stats()["entries"] == 0
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from desktop_tutorial import cache, codecs
+
+
+def _bars(periods=500, tz="America/New_York"):
+    idx = pd.date_range("2025-01-02 09:30", periods=periods, freq="min", tz=tz, name="date")
+    rng = np.random.default_rng(0)
+    close = 100 + rng.standard_normal(periods).cumsum()
+    return pd.DataFrame(
+        {"open": close, "high": close + 1, "low": close - 1, "close": close,
+         "volume": rng.integers(0, 10_000, periods)},
+        index=idx,
+    )
+
+
+@pytest.mark.parametrize("fmt", ["feather", "parquet", "npz"])
+def test_binary_codecs_roundtrip(tmp_path, fmt):
+    df = _bars()
+    path = tmp_path / f"bars.{fmt}"
+    codec = codecs.get(fmt)
+    codec.write(df, path, 100)
+    out = codec.read(path)
+    # dtype・tz・インデックス名まで戻る
+    pd.testing.assert_frame_equal(out, df, check_freq=False)
+
+    batches = list(codec.batches(path, batch_rows=64))
+    assert all(len(b) <= 64 for b in batches)
+    pd.testing.assert_frame_equal(pd.concat(batches), df, check_freq=False)
+
+
+@pytest.mark.parametrize("fmt", ["feather", "parquet", "npz"])
+def test_text_column_with_missing_roundtrip(tmp_path, fmt):
+    df = _bars(periods=4)
+    df["note"] = ["a", None, "c", "d"]
+    path = tmp_path / f"bars.{fmt}"
+    codec = codecs.get(fmt)
+    codec.write(df, path, 100)
+    out = codec.read(path)
+    # 欠損は "None" / "nan" の文字列にならず欠損のまま戻る
+    pd.testing.assert_frame_equal(out, df, check_freq=False)
+    assert out["note"].isna().tolist() == [False, True, False, False]
+
+
+def test_npz_keeps_object_columns(tmp_path):
+    df = pd.DataFrame({"tag": pd.Series(["x", None, "z"], dtype=object)})
+    codec = codecs.get("npz")
+    codec.write(df, tmp_path / "obj.npz", 100)
+    out = codec.read(tmp_path / "obj.npz")
+    pd.testing.assert_frame_equal(out, df)
+    assert out["tag"].iloc[1] is None
+
+
+def test_npz_rejects_mixed_objects(tmp_path):
+    df = pd.DataFrame({"mixed": pd.Series(["a", 1, None], dtype=object)})
+    with pytest.raises(ValueError, match="non-string objects"):
+        codecs.get("npz").write(df, tmp_path / "bad.npz", 100)
+
+
+def test_default_prefers_feather_and_env_override(monkeypatch):
+    assert codecs.default() == "feather"
+    assert codecs.available()[:3] == ["feather", "parquet", "npz"]
+
+    monkeypatch.setenv("DESKTOP_TUTORIAL_CACHE_FMT", "npz")
+    assert codecs._pick_default() == "npz"
+    monkeypatch.setenv("DESKTOP_TUTORIAL_CACHE_FMT", "xlsx")
+    with pytest.raises(ValueError, match="Unsupported fmt"):
+        codecs._pick_default()
+
+
+def test_unavailable_codec_is_skipped(monkeypatch):
+    missing = codecs.Codec("exotic", codecs._csv_write, codecs._csv_read, requires=("no_such_module",))
+    monkeypatch.setitem(codecs._REGISTRY, "exotic", missing)
+    assert "exotic" not in codecs.available()
+    with pytest.raises(ValueError, match="no_such_module"):
+        codecs.get("exotic")
+    with pytest.raises(ValueError, match="already registered"):
+        codecs.register(missing)
+
+
+def test_auto_reads_legacy_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    cache.clear_memory()
+    old = pd.DataFrame({"close": [1.0, 2.0]}, index=pd.date_range("2025-01-01", periods=2))
+    cache.write(old, symbol="OLD", start=None, end=None, fmt="csv")
+
+    # 既定の形式のファイルが無ければ旧形式を読む
+    pd.testing.assert_frame_equal(cache.read("OLD", start=None, end=None), old)
+    assert cache.fetched_at("OLD", start=None, end=None) is not None
+
+    # 書き直すと既定の形式になり、以後はそちらを読む
+    path = cache.write(old * 10, symbol="OLD", start=None, end=None)
+    assert path.suffix == ".feather"
+    assert list(cache.read("OLD", start=None, end=None)["close"]) == [10.0, 20.0]
+
+
+@pytest.mark.parametrize("fmt", ["feather", "npz"])
+def test_series_store_streams_with_other_codecs(tmp_path, monkeypatch, fmt):
+    monkeypatch.setattr(cache, "_CACHEDIR", tmp_path)
+    monkeypatch.setattr(cache, "_ROW_GROUP_ROWS", 100)
+    cache.clear_memory()
+    df = _bars(periods=450)
+    cache.merge(df.iloc[:200], symbol="SER", start=df.index[0], end=df.index[199], freq="1min", fmt=fmt)
+    # 既存の系列は auto でもその形式のまま追記される
+    cache.merge(df.iloc[200:], symbol="SER", start=df.index[200], end=df.index[-1], freq="1min")
+    assert cache._series_file("SER", "1min", cache.AUTO) == (tmp_path / f"SER_1min.{fmt}", fmt)
+
+    lo, hi = df.index[120], df.index[333]
+    batches = list(cache.iter_batches("SER", start=lo, end=hi, freq="1min", batch_rows=50))
+    assert all(len(b) <= 50 for b in batches)
+    pd.testing.assert_frame_equal(pd.concat(batches), df.loc[lo:hi], check_freq=False)
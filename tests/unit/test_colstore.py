@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from desktop_tutorial.colstore import ColumnStore
+
+
+def _bars(start, periods, freq="D", tz=None, base=0.0):
+    idx = pd.date_range(start, periods=periods, freq=freq, tz=tz)
+    close = base + np.arange(periods, dtype=float)
+    return pd.DataFrame(
+        {"open": close, "high": close + 1, "low": close - 1, "close": close, "volume": 10},
+        index=idx,
+    )
+
+
+def test_append_and_read_range(tmp_path):
+    store = ColumnStore(tmp_path)
+    assert store.append(_bars("2025-01-01", 10), symbol="AAPL") == 10
+    # 既存分と重なる行は捨て、新しい行だけ追記する
+    assert store.append(_bars("2025-01-08", 6, base=7.0), symbol="AAPL") == 3
+    assert store.length("AAPL") == 13
+    assert store.last_timestamp("AAPL") == pd.Timestamp("2025-01-13")
+
+    sub = store.read("AAPL", start="2025-01-03", end="2025-01-05")
+    assert list(sub.index.day) == [3, 4, 5]
+    assert list(sub["close"]) == [2.0, 3.0, 4.0]
+    assert sub["volume"].dtype == np.int64
+    assert sub["adjclose"].isna().all()
+
+    full = store.read("AAPL")
+    assert len(full) == 13 and full.index.is_monotonic_increasing
+
+
+def test_append_does_not_rewrite_history(tmp_path):
+    store = ColumnStore(tmp_path)
+    store.append(_bars("2025-01-01", 5), symbol="X")
+    close_file = tmp_path / "X_1d" / "close.f8"
+    head = close_file.read_bytes()
+    store.append(_bars("2025-01-06", 5, base=5.0), symbol="X")
+    assert close_file.read_bytes()[: len(head)] == head
+    assert close_file.stat().st_size == 10 * 8
+
+
+def test_partial_append_is_repaired(tmp_path):
+    store = ColumnStore(tmp_path)
+    store.append(_bars("2025-01-01", 3), symbol="X")
+    # 値の列だけ書けて時刻列を書く前に落ちた状態を作る
+    with open(tmp_path / "X_1d" / "close.f8", "ab") as f:
+        np.array([99.0]).tofile(f)
+    assert store.length("X") == 3
+    store.append(_bars("2025-01-04", 1, base=3.0), symbol="X")
+    assert list(store.read("X")["close"]) == [0.0, 1.0, 2.0, 3.0]
+
+
+def test_intraday_timezone_roundtrip(tmp_path):
+    store = ColumnStore(tmp_path)
+    df = _bars("2025-03-10 09:30", 390, freq="min", tz="America/New_York")
+    store.append(df, symbol="M", freq="1m")
+    sub = store.read("M", freq="1m", start="2025-03-10 10:00", end="2025-03-10 10:04")
+    assert len(sub) == 5
+    assert str(sub.index.tz) == "America/New_York"
+    with pytest.raises(ValueError, match="timezone"):
+        store.append(_bars("2025-03-11", 1), symbol="M", freq="1m")
+
+
+def test_rejects_unsorted_and_missing(tmp_path):
+    store = ColumnStore(tmp_path)
+    with pytest.raises(ValueError):
+        store.append(_bars("2025-01-01", 3).iloc[::-1], symbol="X")
+    with pytest.raises(FileNotFoundError):
+        store.read("NOPE")
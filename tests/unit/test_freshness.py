@@ -0,0 +1,52 @@
+import datetime as dt
+
+import pandas as pd
+
+from desktop_tutorial.freshness import FreshnessPolicy, is_intraday, load_policy
+
+NY = "America/New_York"
+
+
+def _ny(s):
+    return pd.Timestamp(s, tz=NY)
+
+
+def test_is_intraday():
+    assert is_intraday("1m") and is_intraday("5m") and is_intraday("1h")
+    assert not is_intraday("1d") and not is_intraday("1mo") and not is_intraday("1wk")
+
+
+def test_intraday_ttl():
+    policy = FreshnessPolicy(intraday_ttl=60)
+    fetched = pd.Timestamp("2025-03-10 14:00", tz="UTC")
+    assert policy.is_fresh("5m", fetched, now=fetched + pd.Timedelta(seconds=59))
+    assert not policy.is_fresh("5m", fetched, now=fetched + pd.Timedelta(seconds=60))
+
+
+def test_daily_valid_until_next_close():
+    policy = FreshnessPolicy()
+    # 月曜の場中に取得 → 当日の大引けまで
+    assert policy.expires_at("1d", _ny("2025-03-10 10:00")) == _ny("2025-03-10 16:00")
+    # 大引け後に取得 → 翌営業日の大引けまで
+    assert policy.expires_at("1d", _ny("2025-03-10 17:00")) == _ny("2025-03-11 16:00")
+    # 金曜の大引け後・土曜に取得 → 月曜の大引けまで
+    assert policy.expires_at("1d", _ny("2025-03-14 17:00")) == _ny("2025-03-17 16:00")
+    assert policy.expires_at("1d", _ny("2025-03-15 12:00")) == _ny("2025-03-17 16:00")
+
+
+def test_settled_until():
+    policy = FreshnessPolicy(intraday_ttl=60)
+    assert policy.settled_until("1d", now=_ny("2025-03-11 10:00")) == pd.Timestamp("2025-03-10")
+    assert policy.settled_until("1d", now=_ny("2025-03-11 16:30")) == pd.Timestamp("2025-03-11")
+    assert policy.settled_until("1d", now=_ny("2025-03-16 12:00")) == pd.Timestamp("2025-03-14")
+    assert policy.settled_until("1m", now=_ny("2025-03-11 10:00")) == pd.Timestamp(
+        "2025-03-11 09:59"
+    )
+
+
+def test_load_policy_reads_cache_duration(tmp_path):
+    cfg = tmp_path / "config.yaml"
+    cfg.write_text("polygon_api:\n  cache_duration: 15\n", encoding="utf-8")
+    assert load_policy(cfg).intraday_ttl == 15.0
+    assert load_policy(tmp_path / "missing.yaml") == FreshnessPolicy()
+    assert FreshnessPolicy().market_close == dt.time(16, 0)
@@ -0,0 +1,87 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from desktop_tutorial.margin import Collateral, MarginEngine, Position
+
+
+def _engine():
+    return MarginEngine(
+        [Position("AAPL", 100, entry_price=200.0), Position("TSLA", -10, entry_price=300.0)],
+        [Collateral("7203.T", 1000, haircut=0.2)],
+        cash=10_000.0,
+        fees=500.0,
+    )
+
+
+def _expected(prices):
+    exposure = 100 * prices["AAPL"] + 10 * prices["TSLA"]
+    pnl = 100 * (prices["AAPL"] - 200.0) - 10 * (prices["TSLA"] - 300.0)
+    equity = 10_000.0 + 1000 * 0.8 * prices["7203.T"] + pnl - 500.0
+    return equity / exposure * 100
+
+
+def test_rate_needs_all_prices():
+    engine = _engine()
+    assert np.isnan(engine.update_price("AAPL", 210.0))
+    engine.update_price("TSLA", 290.0)
+    assert not engine.ready
+    prices = {"AAPL": 210.0, "TSLA": 290.0, "7203.T": 30.0}
+    assert engine.update_price("7203.T", 30.0) == pytest.approx(_expected(prices))
+
+
+def test_incremental_updates_match_full_computation():
+    engine = _engine()
+    rng = np.random.default_rng(0)
+    prices = {"AAPL": 210.0, "TSLA": 290.0, "7203.T": 30.0}
+    engine.update_prices(prices)
+    for _ in range(25_000):
+        symbol = ["AAPL", "TSLA", "7203.T"][rng.integers(3)]
+        prices[symbol] *= 1 + rng.normal(0, 0.001)
+        rate = engine.update_price(symbol, prices[symbol])
+    assert rate == pytest.approx(_expected(prices), rel=1e-9)
+    assert engine.update_price("UNKNOWN", 1.0) == rate
+
+
+def test_scenarios_match_repricing():
+    engine = _engine()
+    base = {"AAPL": 210.0, "TSLA": 290.0, "7203.T": 30.0}
+    engine.update_prices(base)
+
+    uniform = engine.scenarios(np.array([-0.1, 0.0, 0.05]))
+    for shock, rate in zip([-0.1, 0.0, 0.05], uniform):
+        assert rate == pytest.approx(_expected({s: p * (1 + shock) for s, p in base.items()}))
+
+    matrix = engine.scenarios({"AAPL": [-0.2, 0.1]})
+    assert matrix[0] == pytest.approx(_expected({**base, "AAPL": 168.0}))
+    assert matrix[1] == pytest.approx(_expected({**base, "AAPL": 231.0}))
+
+    # 現在値は変えない
+    assert engine.rate == pytest.approx(_expected(base))
+
+
+def test_scenarios_vectorized_shape():
+    engine = _engine()
+    engine.update_prices({"AAPL": 210.0, "TSLA": 290.0, "7203.T": 30.0})
+    shocks = np.random.default_rng(1).normal(0, 0.05, size=(5000, len(engine.symbols)))
+    rates = engine.scenarios(shocks)
+    assert rates.shape == (5000,) and np.isfinite(rates).all()
+
+
+def test_from_monitor_config_and_refresh(tmp_path):
+    path = tmp_path / "monitor_config.json"
+    path.write_text(json.dumps({"positions": [
+        {"ticker": "AAPL", "shares": 100}, {"ticker": "MSFT", "shares": 50},
+    ]}), encoding="utf-8")
+    engine = MarginEngine.from_monitor_config(path, cash=20_000.0)
+
+    class StubProvider:
+        def fetch_many(self, symbols):
+            closes = {"AAPL": [199.0, 200.0], "MSFT": [399.0, 400.0]}
+            return {s: pd.DataFrame({"close": closes[s]}) for s in symbols}
+
+    # 建値の指定が無ければ最初の価格が基準（評価損益 0）
+    assert engine.refresh(StubProvider()) == pytest.approx(20_000 / 40_000 * 100)
+    assert engine.update_price("AAPL", 210.0) == pytest.approx((20_000 + 1_000) / 41_000 * 100)
@@ -0,0 +1,114 @@
+import math
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from desktop_tutorial.margin import Collateral, MarginEngine, Position
+from desktop_tutorial.risk import MarginRiskSimulator, ReturnModel
+
+
+def _closes(cov, days=500, seed=0, symbols=("AAPL", "MSFT")):
+    rng = np.random.default_rng(seed)
+    returns = rng.multivariate_normal(np.zeros(len(symbols)), cov, size=days)
+    index = pd.bdate_range("2024-01-01", periods=days + 1)
+    prices = 100 * np.exp(np.vstack([np.zeros(len(symbols)), np.cumsum(returns, axis=0)]))
+    return pd.DataFrame(prices, index=index, columns=list(symbols))
+
+
+def _single_stock_engine():
+    # 維持率 = (現金 + 評価損益) / 評価額 = (50 + p - 100) / p × 100（p=100 で 50%）
+    engine = MarginEngine([Position("AAPL", 1, entry_price=100.0)], cash=50.0)
+    engine.update_price("AAPL", 100.0)
+    return engine
+
+
+def test_from_prices_estimates_covariance():
+    cov = np.array([[4e-4, 2e-4], [2e-4, 9e-4]])
+    model = ReturnModel.from_prices(_closes(cov, days=5000))
+    assert model.symbols == ("AAPL", "MSFT")
+    assert model.cov == pytest.approx(cov, rel=0.1)
+    assert not model.drift.any()
+
+    with pytest.raises(ValueError):
+        ReturnModel.from_prices(_closes(cov, days=5))
+
+
+def test_reorder_follows_engine_symbols():
+    cov = np.array([[4e-4, 0.0], [0.0, 9e-4]])
+    model = ReturnModel.from_prices(_closes(cov, symbols=("MSFT", "AAPL")))
+    reordered = model.reorder(["AAPL", "MSFT"])
+    assert reordered.cov[0, 0] == pytest.approx(model.cov[1, 1])
+    with pytest.raises(KeyError):
+        model.reorder(["TSLA"])
+
+
+def test_breach_probability_matches_lognormal():
+    sigma = 0.02
+    engine = _single_stock_engine()
+    model = ReturnModel(("AAPL",), np.zeros(1), np.array([[sigma**2]]))
+    sim = MarginRiskSimulator(engine, model, hours_per_day=6.5)
+    result = sim.simulate(hours=65, paths=200_000, seed=1)  # 10 取引日
+
+    # 期間末に 45% を割る ⇔ p < 50 / 0.55
+    z = math.log(50 / 0.55 / 100) / (sigma * math.sqrt(10))
+    expected = 0.5 * (1 + math.erf(z / math.sqrt(2)))
+    assert np.mean(result.final_rates <= 45.0) == pytest.approx(expected, abs=0.005)
+    # 途中で割った経路も数えるので期間末だけより大きい
+    assert result.breach_probability(45.0) > expected
+    assert result.breach_probability(60.0) == 1.0
+    assert result.breach_probability(0.0) == 0.0
+
+
+def test_seed_reproducible_and_process_pool():
+    cov = np.array([[4e-4, 2e-4], [2e-4, 9e-4]])
+    engine = MarginEngine(
+        [Position("AAPL", 100, entry_price=200.0), Position("MSFT", -20, entry_price=400.0)],
+        [Collateral("MSFT", 50)],
+        cash=5_000.0,
+    )
+    engine.update_prices({"AAPL": 210.0, "MSFT": 390.0})
+    sim = MarginRiskSimulator(engine, ReturnModel.from_prices(_closes(cov)))
+
+    a = sim.simulate(hours=12, paths=5_000, seed=7, chunk=1_000)
+    b = sim.simulate(hours=12, paths=5_000, seed=7, chunk=1_000)
+    assert np.array_equal(a.min_rates, b.min_rates)
+    assert (a.min_rates <= a.final_rates + 1e-9).all()
+    assert (a.min_rates <= engine.rate).all()
+
+    pooled = sim.simulate(hours=12, paths=5_000, seed=7, chunk=1_000, workers=2)
+    assert pooled.paths == 5_000
+    assert pooled.breach_probability(engine.rate - 5) == pytest.approx(
+        a.breach_probability(engine.rate - 5), abs=0.03
+    )
+
+
+def test_from_provider_uses_fetch_many():
+    cov = np.array([[4e-4, 0.0], [0.0, 9e-4]])
+    closes = _closes(cov)
+    calls = []
+
+    class StubProvider:
+        def fetch_many(self, symbols, *, start=None, end=None):
+            calls.append((list(symbols), start, end))
+            return {s: closes[[s]].rename(columns={s: "close"}) for s in symbols if s != "TSLA"}
+
+    model = ReturnModel.from_provider(StubProvider(), ["AAPL", "MSFT"])
+    assert model.symbols == ("AAPL", "MSFT")
+    assert calls[0][1] is not None and calls[0][2] is not None
+    with pytest.raises(ValueError, match="TSLA"):
+        ReturnModel.from_provider(StubProvider(), ["AAPL", "TSLA"])
+
+
+def test_100k_paths_within_a_second():
+    cov = np.array([[4e-4, 2e-4], [2e-4, 9e-4]])
+    engine = MarginEngine([Position("AAPL", 100), Position("MSFT", 50)], cash=20_000.0)
+    engine.update_prices({"AAPL": 200.0, "MSFT": 400.0})
+    sim = MarginRiskSimulator(engine, ReturnModel.from_prices(_closes(cov)))
+    sim.simulate(hours=24, paths=1_000, seed=0)  # 初回の import などを除く
+
+    t0 = time.perf_counter()
+    result = sim.simulate(hours=24, paths=100_000, seed=0)
+    assert time.perf_counter() - t0 < 1.0
+    assert result.paths == 100_000